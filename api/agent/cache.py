@@ -0,0 +1,41 @@
+"""
+Compiled agent graphs shared across requests.
+
+Building an agent binds the tools to the model and compiles a StateGraph; none of
+that depends on the request, so each agent is built once per tool list version
+(Toolbox.version) and reused. Request state only lives in the input passed to
+ainvoke. Build times are kept per agent so startup and tool-change rebuilds show up
+at GET /agents.
+"""
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AgentCache:
+    def __init__(self):
+        self._graphs = {}
+        self._stats = {}
+
+    def get(self, name: str, version: int, build):
+        """The graph `build()` returns, rebuilt only when `version` changes."""
+        entry = self._graphs.get(name)
+        stats = self._stats.setdefault(name, {"builds": 0, "hits": 0, "version": None,
+                                              "last_build_ms": None, "total_build_ms": 0.0})
+        if entry and entry[0] == version:
+            stats["hits"] += 1
+            return entry[1]
+
+        start = time.perf_counter()
+        graph = build()
+        elapsed = (time.perf_counter() - start) * 1000
+        self._graphs[name] = (version, graph)
+        stats.update(version=version, last_build_ms=round(elapsed, 2))
+        stats["builds"] += 1
+        stats["total_build_ms"] = round(stats["total_build_ms"] + elapsed, 2)
+        logger.info("Built agent %s for tool list version %s in %.1f ms", name, version, elapsed)
+        return graph
+
+    def stats(self) -> dict:
+        return {name: dict(values) for name, values in self._stats.items()}
@@ -1,5 +1,6 @@
 import os
 import json
+import functools
 from langgraph.graph import StateGraph, END, START
 from typing import TypedDict, Annotated, List, Literal, Optional
 from langchain_core.messages import AnyMessage, SystemMessage, HumanMessage, AIMessage, ChatMessage, ToolMessage
@@ -11,15 +12,20 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-def react_agent(llm: ChatOpenAI,tools: List[StructuredTool],event: str):
-    
-    llm = ChatOpenAI(
+@functools.lru_cache(maxsize=1)
+def report_llm() -> ChatOpenAI:
+    # The report graphs use their own model; built once instead of per request
+    return ChatOpenAI(
         base_url=os.environ["BASE_URL"],
         model='gpt-4o-mini',
         api_key=os.environ["OPENAI_API_KEY"],
     )
 
+def react_agent(llm: ChatOpenAI,tools: List[StructuredTool],event: str):
+    
+    llm = report_llm()
     model_with_tool = llm.bind_tools(tools)
+    tools_by_name = {tool.name: tool for tool in tools}
 
     def call_model(state: AgentState):
         message = state['messages']
@@ -44,10 +50,10 @@ def react_agent(llm: ChatOpenAI,tools: List[StructuredTool],event: str):
         print("drafing")
         messages = state['messages']
         report_messages = [SystemMessage(content=REPORT_MAKER_REPORT)] + messages
-        report_model = llm.invoke(report_messages)
+        report_model = llm.invoke(report_messages, {"run_name": "report_final"})
 
         graph_messages = [SystemMessage(content=VIS_REPORT)] + messages
-        graph_model = llm.invoke(graph_messages)
+        graph_model = llm.invoke(graph_messages, {"run_name": "report_graph"})
         print("finish")
         return{
             "messages": [report_messages] + [graph_messages],
@@ -56,7 +62,6 @@ def react_agent(llm: ChatOpenAI,tools: List[StructuredTool],event: str):
             }
     
     async def call_tool(state: AgentState):
-        tools_by_name = {tool.name: tool for tool in tools}
         messages = []
         for tool_call in state["messages"][-1].tool_calls:
             tool = tools_by_name[tool_call["name"]]
@@ -98,21 +103,14 @@ def react_agent(llm: ChatOpenAI,tools: List[StructuredTool],event: str):
 
     builder.add_edge("gen_report",END)
 
-    app = builder.compile()
-    print(app.get_graph().draw_mermaid())
-
     return builder.compile()
 
 
 def react_sick_agent(llm: ChatOpenAI,tools: List[StructuredTool],event: str):
     
-    llm = ChatOpenAI(
-        base_url=os.environ["BASE_URL"],
-        model='gpt-4o-mini',
-        api_key=os.environ["OPENAI_API_KEY"],
-    )
-
+    llm = report_llm()
     model_with_tool = llm.bind_tools(tools)
+    tools_by_name = {tool.name: tool for tool in tools}
 
     def call_model(state: AgentState):
         message = state['messages']
@@ -136,11 +134,11 @@ def react_sick_agent(llm: ChatOpenAI,tools: List[StructuredTool],event: str):
         print("drafing")
         messages = state['messages']
         report_messages = [SystemMessage(content=REPORT_MAKER_REPORT)] + messages
-        report_model = llm.invoke(report_messages)
+        report_model = llm.invoke(report_messages, {"run_name": "report_final"})
 
         r = report_model.content
         graph_messages = [SystemMessage(content=VIS_REPORT)] + r
-        graph_model = llm.invoke(graph_messages)
+        graph_model = llm.invoke(graph_messages, {"run_name": "report_graph"})
         print("finish")
         return{
             "messages": [report_messages] + [graph_messages],
@@ -149,7 +147,6 @@ def react_sick_agent(llm: ChatOpenAI,tools: List[StructuredTool],event: str):
             }
     
     async def call_tool(state: AgentState):
-        tools_by_name = {tool.name: tool for tool in tools}
         messages = []
         for tool_call in state["messages"][-1].tool_calls:
             tool = tools_by_name[tool_call["name"]]
@@ -191,7 +188,4 @@ def react_sick_agent(llm: ChatOpenAI,tools: List[StructuredTool],event: str):
 
     builder.add_edge("gen_report",END)
 
-    app = builder.compile()
-    print(app.get_graph().draw_mermaid())
-
     return builder.compile()
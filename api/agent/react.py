@@ -9,9 +9,9 @@ class ReactState(TypedDict):
     
 def p_react_agent(llm : ChatOpenAI , tools : list, system_prompt : str | None = None):
     model_with_tools = llm.bind_tools(tools)
+    tools_by_name = {tool.name: tool for tool in tools}
 
     async def call_tools(state: ReactState):
-        tools_by_name = {tool.name: tool for tool in tools}
         messages = []
         for tool_call in state["messages"][-1].tool_calls:
             tool = tools_by_name[tool_call["name"]]
@@ -0,0 +1,60 @@
+"""
+Server-sent events for an agent run.
+
+stream_events turns LangGraph's astream_events into a small set of SSE events the
+web client can render as they arrive:
+
+    node         {"node", "status": "start" | "end"}    graph node transitions
+    token        {"node", "name", "text"}               LLM output; in gen_report name is
+                                                        report_final or report_graph
+    tool_call    {"name", "args"}
+    tool_result  {"name", "content"}
+    done         the same body the non-streaming endpoint returns
+    error        {"message"}
+"""
+import json
+from fastapi.encoders import jsonable_encoder
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    # nginx buffers proxied responses unless told otherwise
+    "X-Accel-Buffering": "no",
+}
+
+
+def sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data), ensure_ascii=False)}\n\n"
+
+
+def _text(content) -> str:
+    if isinstance(content, str):
+        return content
+    # Content blocks (list of str / {"type": "text", "text": ...})
+    return "".join(part if isinstance(part, str) else part.get("text", "") for part in content or [])
+
+
+async def stream_events(agent, inputs: dict, final):
+    """Yield SSE strings for one run of `agent`; `final(state)` builds the done payload."""
+    state = None
+    try:
+        async for event in agent.astream_events(inputs, version="v2"):
+            kind, name = event["event"], event["name"]
+            node = event.get("metadata", {}).get("langgraph_node")
+
+            if kind in ("on_chain_start", "on_chain_end") and name == node:
+                yield sse("node", {"node": node, "status": "start" if kind == "on_chain_start" else "end"})
+            elif kind == "on_chat_model_stream":
+                text = _text(event["data"]["chunk"].content)
+                if text:
+                    yield sse("token", {"node": node, "name": name, "text": text})
+            elif kind == "on_tool_start":
+                yield sse("tool_call", {"name": name, "args": event["data"].get("input")})
+            elif kind == "on_tool_end":
+                output = event["data"].get("output")
+                yield sse("tool_result", {"name": name, "content": getattr(output, "content", output)})
+            elif kind == "on_chain_end" and not event.get("parent_ids"):
+                state = event["data"].get("output")
+
+        yield sse("done", final(state or {}))
+    except Exception as e:
+        yield sse("error", {"message": str(e)})
@@ -0,0 +1,262 @@
+"""
+Warm MCP sessions and the cached LangChain tool list for the API.
+
+The toolbox opens a few streamable-http sessions to MCP_URL when the app starts and
+keeps them open, so a request only pays for its tool calls. Tool schemas are listed
+once and turned into LangChain tools; the list is fetched again when the server
+sends tools/list_changed, after a reconnect and every MCP_TOOLS_REFRESH seconds, and
+`version` goes up only when the schemas actually differ.
+
+Each session lives in its own task (the mcp transports are anyio task groups, which
+must be entered and exited in the same task). A call on a dead session reconnects
+it and retries once; the MCP tools only read, so a retry is safe.
+"""
+import os
+import json
+import asyncio
+import hashlib
+import logging
+from datetime import timedelta
+from mcp import ClientSession, McpError, types
+from mcp.client.streamable_http import streamablehttp_client
+from langchain_core.tools import StructuredTool, ToolException
+
+logger = logging.getLogger(__name__)
+
+# McpError code the client uses when a call runs past read_timeout_seconds
+TIMEOUT_CODE = 408
+
+
+def _tool_content(result: types.CallToolResult):
+    """Same (content, artifact) shape langchain-mcp-adapters returns."""
+    texts = [part.text for part in result.content if isinstance(part, types.TextContent)]
+    others = [part for part in result.content if not isinstance(part, types.TextContent)]
+    content = "" if not texts else texts[0] if len(texts) == 1 else texts
+    if result.isError:
+        raise ToolException(content)
+    return content, others or None
+
+
+class _Session:
+    """One MCP session held open by a background task until close()."""
+
+    def __init__(self, url: str, call_timeout: float, on_message):
+        self.url = url
+        self.call_timeout = call_timeout
+        self.on_message = on_message
+        self.session = None
+        self.error = None
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._task = None
+
+    @property
+    def alive(self) -> bool:
+        return self.session is not None and self._task is not None and not self._task.done()
+
+    async def open(self, timeout: float):
+        self._task = asyncio.create_task(self._run())
+        await asyncio.wait_for(self._ready.wait(), timeout)
+        if not self.alive:
+            raise ConnectionError(f"MCP session to {self.url} failed: {self.error}")
+
+    async def _run(self):
+        try:
+            async with streamablehttp_client(self.url) as (read, write, _):
+                async with ClientSession(read, write,
+                                         read_timeout_seconds=timedelta(seconds=self.call_timeout),
+                                         message_handler=self.on_message) as session:
+                    await session.initialize()
+                    self.session = session
+                    self._ready.set()
+                    await self._closing.wait()
+        except Exception as e:
+            self.error = e
+            logger.warning("MCP session closed: %s", e)
+        finally:
+            self.session = None
+            self._ready.set()
+
+    async def request(self, coro):
+        """Await `coro` on this session; fails at once if the transport dies meanwhile."""
+        call = asyncio.ensure_future(coro)
+        await asyncio.wait([call, self._task], return_when=asyncio.FIRST_COMPLETED)
+        if not call.done():
+            call.cancel()
+            raise ConnectionError(f"MCP session to {self.url} closed: {self.error}")
+        return call.result()
+
+    async def close(self):
+        self._closing.set()
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self._task, 5)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                self._task.cancel()
+
+
+class Toolbox:
+    def __init__(self, url: str, size: int = 2, refresh_seconds: float = 300,
+                 connect_timeout: float = 10, call_timeout: float = 120):
+        self.url = url
+        self.size = max(1, size)
+        self.refresh_seconds = refresh_seconds
+        self.connect_timeout = connect_timeout
+        self.call_timeout = call_timeout
+        self.tools = []
+        self.version = 0
+        self._fingerprint = None
+        self._sessions = [None] * self.size
+        self._next = 0
+        self._locks = [asyncio.Lock() for _ in range(self.size)]
+        self._refresh_lock = asyncio.Lock()
+        self._background = set()
+        self._refresher = None
+        self.stats = {"connects": 0, "reconnects": 0, "retries": 0, "refreshes": 0, "changes": 0}
+
+    async def start(self):
+        """Open the sessions and load the tool list; the app still starts if MCP is down."""
+        try:
+            await asyncio.gather(*(self._session(i) for i in range(self.size)))
+            await self.refresh()
+        except Exception as e:
+            logger.warning("MCP server not reachable at startup, connecting on first request: %s", e)
+        if self.refresh_seconds > 0:
+            self._refresher = asyncio.create_task(self._refresh_loop())
+
+    async def close(self):
+        if self._refresher:
+            self._refresher.cancel()
+        for task in list(self._background):
+            task.cancel()
+        await asyncio.gather(*(s.close() for s in self._sessions if s), return_exceptions=True)
+        self._sessions = [None] * self.size
+
+    async def get_tools(self) -> list:
+        """The cached LangChain tools, loading them first if startup could not."""
+        if not self.tools:
+            await self.refresh()
+        return self.tools
+
+    async def _session(self, index: int) -> _Session:
+        current = self._sessions[index]
+        if current and current.alive:
+            return current
+        async with self._locks[index]:
+            current = self._sessions[index]
+            if current and current.alive:
+                return current
+            if current:
+                await current.close()
+                self.stats["reconnects"] += 1
+            fresh = _Session(self.url, self.call_timeout, self._on_message)
+            await fresh.open(self.connect_timeout)
+            self._sessions[index] = fresh
+            self.stats["connects"] += 1
+            if current:
+                # A restarted server may come back with a different tool list
+                self._spawn(self.refresh())
+            return fresh
+
+    def _pick(self) -> int:
+        # Streamable-http sessions multiplex requests, so sessions are shared round-robin
+        index = self._next
+        self._next = (self._next + 1) % self.size
+        return index
+
+    async def _discard(self, index: int, session: _Session):
+        async with self._locks[index]:
+            if self._sessions[index] is session:
+                await session.close()
+
+    async def _request(self, method: str, *args):
+        """ClientSession.<method>(*args) on the next session, reconnecting once on failure."""
+        index = self._pick()
+        for attempt in range(2):
+            session = await self._session(index)
+            try:
+                return await session.request(getattr(session.session, method)(*args))
+            except McpError as e:
+                if attempt or e.error.code == TIMEOUT_CODE:
+                    raise
+            except Exception:
+                if attempt:
+                    raise
+            self.stats["retries"] += 1
+            await self._discard(index, session)
+
+    async def call_tool(self, name: str, arguments: dict) -> types.CallToolResult:
+        return await self._request("call_tool", name, arguments)
+
+    async def refresh(self) -> bool:
+        """Fetch the tool list; rebuild the LangChain tools when the schemas changed."""
+        async with self._refresh_lock:
+            listed = (await self._request("list_tools")).tools
+            self.stats["refreshes"] += 1
+            schemas = sorted((t.model_dump(mode="json") for t in listed), key=lambda t: t["name"])
+            fingerprint = hashlib.sha1(json.dumps(schemas, sort_keys=True).encode("utf-8")).hexdigest()
+            if fingerprint == self._fingerprint:
+                return False
+            self.tools = [self._langchain_tool(tool) for tool in listed]
+            self._fingerprint = fingerprint
+            self.version += 1
+            self.stats["changes"] += 1
+            logger.info("MCP tool list version %s: %s tools", self.version, len(self.tools))
+            return True
+
+    def _langchain_tool(self, tool: types.Tool) -> StructuredTool:
+        async def call(**arguments):
+            return _tool_content(await self.call_tool(tool.name, arguments))
+
+        return StructuredTool(
+            name=tool.name,
+            description=tool.description or "",
+            args_schema=tool.inputSchema,
+            coroutine=call,
+            response_format="content_and_artifact",
+            metadata=tool.annotations.model_dump() if tool.annotations else None,
+        )
+
+    async def _on_message(self, message):
+        if isinstance(message, types.ServerNotification) and \
+                isinstance(message.root, types.ToolListChangedNotification):
+            self._spawn(self.refresh())
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        task.add_done_callback(_log_failure)
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning("MCP tool list refresh failed: %s", e)
+
+    def status(self) -> dict:
+        return {
+            "url": self.url,
+            "sessions": self.size,
+            "alive": sum(1 for s in self._sessions if s and s.alive),
+            "tools": len(self.tools),
+            "version": self.version,
+            **self.stats,
+        }
+
+
+def _log_failure(task: asyncio.Task):
+    if not task.cancelled() and task.exception():
+        logger.warning("MCP background task failed: %s", task.exception())
+
+
+def from_env() -> Toolbox:
+    return Toolbox(
+        os.environ.get("MCP_URL"),
+        size=int(os.environ.get("MCP_SESSIONS", 2)),
+        refresh_seconds=float(os.environ.get("MCP_TOOLS_REFRESH", 300)),
+        connect_timeout=float(os.environ.get("MCP_CONNECT_TIMEOUT", 10)),
+        call_timeout=float(os.environ.get("MCP_CALL_TIMEOUT", 120)),
+    )
@@ -0,0 +1,74 @@
+"""
+Synthetic attendance exports in the layout /preview-csv and /upload-csv accept
+(Thai headers, dd/mm/YYYY dates, 12-hour shift strings, HH.MM hours).
+
+    cd api
+    python -m bench.export attendance.csv [--rows 500000] [--seed 42]
+"""
+import csv
+import random
+import argparse
+from datetime import date, timedelta
+
+HEADERS = [
+    'รหัสพนักงาน', 'ชื่อพนักงาน', 'อีเมล', 'ตำแหน่ง', 'กลุ่มผู้ใช้งาน', 'ทีม',
+    'กะทำงาน / ช่วงวันที่',
+    'กะทำงาน / ช่วงวันที่\nเข้างาน วันที่', 'กะทำงาน / ช่วงวันที่\nเข้างาน เวลา ',
+    'กะทำงาน / ช่วงวันที่\nออกงาน วันที่', 'กะทำงาน / ช่วงวันที่\nออกงาน เวลา ',
+    'เข้างาน\nวันที่', 'เข้างาน\nเวลา ', 'เข้างานด้วยสถานที่',
+    'ออกงาน\nวันที่', 'ออกงาน\nเวลา ', 'ออกงานด้วยสถานที่',
+    'ชั่วโมงการทำงาน\n(HH.MM)', 'สาย\n(HH.MM)', 'สาย/ครั้ง', 'ล่วงเวลา\n(HH.MM)', 'ลางาน\n(HH.MM)',
+    'Onsite', 'ปรับเวลา', 'ไม่เข้า-ออกงาน', 'บันทึกการทำงาน',
+]
+
+GROUPS = {"Back Office": ["0"], "R&D": ["Data", "Dev.", "นศง(intern)"], "Services": ["0"], "Sales & Marketing": ["0"]}
+SHIFTS = ["08:00 AM - 05:00 PM", "08:30 AM - 05:30 PM", "09:00 AM - 06:00 PM"]
+LEAVES = ["Annual Leave (Full Day)", "Sick Leave (Full Day)", "Errand Leave (Half Day)"]
+
+
+def rows(count: int, seed: int = 42, employees: int = 1000):
+    rng = random.Random(seed)
+    staff = []
+    for i in range(employees):
+        group = rng.choice(list(GROUPS))
+        staff.append((str(10000 + i), f"พนักงาน ทดสอบ {i:04d}", f"user{i}@example.com", "Officer",
+                      group, rng.choice(GROUPS[group]), rng.choice(SHIFTS)))
+
+    day, written = date(2025, 1, 1), 0
+    while written < count:
+        d = day.strftime("%d/%m/%Y")
+        for emp_id, name, email, position, group, team, shift in staff[:count - written]:
+            start, end = shift.split(" - ")
+            shift_cols = [d, start, d, end]
+            if rng.random() < 0.04:
+                yield [emp_id, name, email, position, group, team, shift, *shift_cols,
+                       "", "", "", "", "", "", "0.00", "0.00", "", "0.00", "8.00",
+                       "", "", "", rng.choice(LEAVES)]
+                continue
+            late = rng.random() < 0.1
+            yield [emp_id, name, email, position, group, team, shift, *shift_cols,
+                   d, "08:55" if not late else "09:20", "Office", d, "18:05", "Office",
+                   "9.10", "0.20" if late else "0.00", "1" if late else "", "0.05", "0.00",
+                   "", "", "", ""]
+        written += min(len(staff), count - written)
+        day += timedelta(days=1)
+
+
+def write_export(path: str, count: int, seed: int = 42):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADERS)
+        writer.writerows(rows(count, seed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path")
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    write_export(args.path, args.rows, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Per-row INSERT loop (the old /upload-csv path) vs the batched BulkLoad, and the
+MergeLoad upsert on a new and on an already imported file.
+
+    cd api
+    python -m bench.ingest [--rows 500000] [--batch 1000 5000 20000] [--loop-rows 50000] [--keep]
+
+Writes a CSV of --rows transformed attendance rows, reads it back with pandas, then
+loads it into scratch tables (bench_ingest_loop / bench_ingest_bulk) once with one
+cursor.execute per row and a single commit, and once per --batch size with BulkLoad.
+--loop-rows limits the slow loop to the first N rows; its rows/s is what is compared.
+The same rows are then upserted twice into bench_ingest_merge: the second pass must
+skip every row, and the row count, the full-day leave rows (no check-in date) and
+the leave totals must match the file.
+Uses the MYSQL_*_NW settings from .env, so point them at a throwaway database.
+"""
+import os
+import time
+import random
+import hashlib
+import argparse
+import tempfile
+from datetime import date, timedelta
+import pandas as pd
+from db.connection import get_db_connection
+from db import ingest
+from db.migrate import KEY_INDEX
+
+CREATE_TABLE = """CREATE TABLE {table} (
+    employee_id INT,
+    employee_name VARCHAR(255),
+    employee_position VARCHAR(255),
+    employee_group VARCHAR(64),
+    employee_team VARCHAR(64),
+    checkin_date DATE NULL,
+    checkin_time VARCHAR(16),
+    checkout_date DATE NULL,
+    checkout_time VARCHAR(16),
+    work_range_date VARCHAR(64),
+    work_date DATE NULL,
+    work_hours DECIMAL(7,2),
+    late_hours DECIMAL(7,2),
+    overtime_hours DECIMAL(7,2),
+    leave_hours DECIMAL(7,2),
+    work_record VARCHAR(255),
+    late_count INT,
+    leave_annual TINYINT NOT NULL DEFAULT 0,
+    leave_sick TINYINT NOT NULL DEFAULT 0,
+    leave_errand TINYINT NOT NULL DEFAULT 0
+)"""
+
+GROUPS = ["Back Office", "R&D", "Services", "Sales & Marketing"]
+RECORDS = ["0", "0", "0", "0", "Annual Leave (Full Day)", "Sick Leave (Half Day)", "Errand Leave (Full Day)"]
+
+
+def write_csv(path: str, rows: int, seed: int = 42):
+    rng = random.Random(seed)
+    employees = 1000
+    day, written = date(2025, 1, 1), 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(",".join(ingest.COLUMNS) + "\n")
+        while written < rows:
+            for i in range(min(employees, rows - written)):
+                record = rng.choice(RECORDS)
+                late = rng.random() < 0.1
+                # Full-day leave has no check-in / check-out, only the shift's day
+                dated = "Full Day" not in record
+                checkin = day.isoformat() if dated else ""
+                f.write(",".join(map(str, [
+                    10000 + i, f"พนักงาน {i:04d}", "Officer", rng.choice(GROUPS), "0",
+                    checkin, "08:55" if dated else "", checkin, "18:05" if dated else "",
+                    "08:00 AM - 17:00 PM", day.isoformat(),
+                    9.1 if dated else 0, 0.15 if late and dated else 0, 0.05 if dated else 0,
+                    8 if record != "0" else 0, record, int(late and dated),
+                    int("Annual" in record), int("Sick" in record), int("Errand" in record),
+                ])) + "\n")
+            written += min(employees, rows - written)
+            day += timedelta(days=1)
+
+
+def read_csv(path: str):
+    df = pd.read_csv(path, dtype={"employee_team": str, "work_record": str})
+    return df.astype(object).where(df.notna(), None)
+
+
+def reset(cursor, table: str):
+    cursor.execute(f"DROP TABLE IF EXISTS {table}")
+    cursor.execute(CREATE_TABLE.format(table=table))
+
+
+def per_row(conn, table: str, df) -> float:
+    cursor = conn.cursor()
+    sql = f"INSERT INTO {table} ({', '.join(ingest.COLUMNS)}) VALUES ({', '.join(['%s'] * len(ingest.COLUMNS))})"
+    start = time.perf_counter()
+    for _, row in df.iterrows():
+        cursor.execute(sql, tuple(row[col] for col in ingest.COLUMNS))
+    conn.commit()
+    cursor.close()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--batch", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--loop-rows", type=int, help="only time the per-row loop on the first N rows")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch tables")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "attendance.csv")
+        write_csv(path, args.rows)
+        df = read_csv(path)
+        with open(path, "rb") as f:
+            digest = hashlib.sha1(f.read())
+    print(f"{len(df)} rows")
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        ingest.ensure_progress_table(cursor)
+
+        loop_df = df.head(args.loop_rows) if args.loop_rows else df
+        reset(cursor, "bench_ingest_loop")
+        seconds = per_row(conn, "bench_ingest_loop", loop_df)
+        loop_rate = len(loop_df) / seconds
+        print(f"{'per-row loop':<18}{len(loop_df):>9} rows {seconds:>8.1f}s {loop_rate:>10,.0f} rows/s")
+
+        for batch in args.batch:
+            reset(cursor, "bench_ingest_bulk")
+            file_id = ingest.import_id("bench_ingest_bulk", digest)
+            ingest.start_import(cursor, file_id, "bench_ingest_bulk", len(df), force=True)
+            conn.commit()
+            load = ingest.BulkLoad(conn, "bench_ingest_bulk", file_id, bump_version=False)
+            load.run(ingest.frame_batches(df, batch))
+            report = load.report()
+            print(f"{'bulk batch ' + str(batch):<18}{report['rows_inserted']:>9} rows {report['seconds']:>8.1f}s "
+                  f"{report['rows_per_sec']:>10,.0f} rows/s {report['rows_per_sec'] / loop_rate:>7.1f}x")
+            cursor.execute(f"DELETE FROM {ingest.PROGRESS_TABLE} WHERE import_id = %s", (file_id,))
+            conn.commit()
+
+        reset(cursor, "bench_ingest_merge")
+        cursor.execute(f"ALTER TABLE bench_ingest_merge ADD INDEX {KEY_INDEX} (employee_id, checkin_date)")
+        file_id = ingest.import_id("bench_ingest_merge", digest)
+        for label in ["upsert new", "upsert again"]:
+            ingest.start_import(cursor, file_id, "bench_ingest_merge", len(df), force=True)
+            conn.commit()
+            load = ingest.MergeLoad(conn, "bench_ingest_merge", file_id, bump_version=False)
+            load.run(ingest.frame_batches(df, ingest.BATCH_SIZE))
+            report = load.report()
+            print(f"{label:<18}{len(df):>9} rows {report['seconds']:>8.1f}s {report['rows_per_sec']:>10,.0f} rows/s "
+                  f"inserted {report['rows_inserted']} updated {report['rows_updated']} "
+                  f"skipped {report['rows_skipped']}")
+        # Full-day leave rows share a NULL checkin_date and the shift string; the upsert
+        # must keep one row per day for them too, so counts and leave totals match the file
+        cursor.execute("""SELECT COUNT(*), SUM(checkin_date IS NULL), SUM(leave_hours),
+            SUM(leave_annual + leave_sick + leave_errand) FROM bench_ingest_merge""")
+        count, undated, leave_hours, leave_days = cursor.fetchone()
+        expected = (len(df), int(df["checkin_date"].isna().sum()), round(df["leave_hours"].astype(float).sum(), 2),
+                    int(df[["leave_annual", "leave_sick", "leave_errand"]].astype(int).values.sum()))
+        got = (count, int(undated), round(float(leave_hours), 2), int(leave_days))
+        print(f"bench_ingest_merge rows / undated rows / leave hours / leave days: {got} "
+              f"({'ok' if got == expected else f'expected {expected}'})")
+        cursor.execute(f"DELETE FROM {ingest.PROGRESS_TABLE} WHERE import_id = %s", (file_id,))
+        conn.commit()
+    finally:
+        if not args.keep:
+            cursor.execute("DROP TABLE IF EXISTS bench_ingest_loop")
+            cursor.execute("DROP TABLE IF EXISTS bench_ingest_bulk")
+            cursor.execute("DROP TABLE IF EXISTS bench_ingest_merge")
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
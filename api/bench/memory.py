@@ -0,0 +1,101 @@
+"""
+Peak memory of parsing an upload: whole file in memory (the old path) vs streamed chunks.
+
+    cd api
+    python -m bench.memory [--rows 50000 200000 800000] [--chunk 20000] [--batch 5000]
+
+For every size an export is generated (bench.export) and each mode runs in a fresh
+subprocess, up to the rows the database would receive (ingest.frame_batches), so
+the insert itself is left out:
+
+    whole   file.read() -> decode -> StringIO -> read_csv -> transform the whole frame
+    stream  sha1 pass + read_csv(chunksize) -> transform one chunk at a time
+
+Prints the tracemalloc peak (Python and numpy allocations) and the growth of the
+process max RSS during the run. The stream column should stay flat as rows grow.
+"""
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import subprocess
+import tracemalloc
+
+
+def _max_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2**20
+
+
+def child(mode: str, path: str, chunk: int, batch: int):
+    import pandas as pd
+    from db import ingest
+    from upload import stream
+    from upload.transform import transform_upload
+
+    rss_before = _max_rss_mb()
+    tracemalloc.start()
+    start = time.perf_counter()
+    rows = 0
+    with open(path, "rb") as f:
+        if mode == "whole":
+            contents = f.read()
+            df = transform_upload(pd.read_csv(io.StringIO(contents.decode("utf-8"))))
+            for rows_batch in ingest.frame_batches(df, batch):
+                rows += len(rows_batch)
+        else:
+            stream.file_digest(f)
+            for df in stream.transformed_chunks(f, chunk):
+                for rows_batch in ingest.frame_batches(df, batch):
+                    rows += len(rows_batch)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(json.dumps({"rows": rows, "seconds": seconds, "peak_mb": peak / 2**20,
+                      "rss_growth_mb": _max_rss_mb() - rss_before}))
+
+
+def measure(mode: str, path: str, chunk: int, batch: int) -> dict:
+    out = subprocess.run([sys.executable, "-m", "bench.memory", "--child", mode, path,
+                          "--chunk", str(chunk), "--batch", str(batch)],
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[50_000, 200_000, 800_000])
+    parser.add_argument("--chunk", type=int, default=20000, help="rows parsed at a time (UPLOAD_CHUNK_ROWS)")
+    parser.add_argument("--batch", type=int, default=5000, help="rows per insert batch (UPLOAD_BATCH_SIZE)")
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child[0], args.child[1], args.chunk, args.batch)
+        return
+
+    from bench.export import write_export
+
+    print(f"{'rows':>9}{'file MB':>9}{'whole peak':>12}{'stream peak':>13}{'whole rss+':>12}{'stream rss+':>13}"
+          f"{'whole s':>9}{'stream s':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in args.rows:
+            path = os.path.join(tmp, f"export_{count}.csv")
+            write_export(path, count)
+            whole = measure("whole", path, args.chunk, args.batch)
+            streamed = measure("stream", path, args.chunk, args.batch)
+            assert whole["rows"] == streamed["rows"] == count
+            print(f"{count:>9}{os.path.getsize(path) / 2**20:>9.1f}"
+                  f"{whole['peak_mb']:>10.1f}MB{streamed['peak_mb']:>11.1f}MB"
+                  f"{whole['rss_growth_mb']:>10.1f}MB{streamed['rss_growth_mb']:>11.1f}MB"
+                  f"{whole['seconds']:>9.2f}{streamed['seconds']:>10.2f}")
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
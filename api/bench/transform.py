@@ -0,0 +1,115 @@
+"""
+Per-row cost of the CSV transform: the old row-at-a-time code vs upload.transform.
+
+    cd api
+    python -m bench.transform [--rows 1000000]
+
+Generates an export (bench.export) plus a few malformed rows, parses it once, then
+times the preview and upload transforms both ways and checks they give the same
+frame, so this doubles as the regression check for the vectorized version.
+"""
+import os
+import time
+import argparse
+import tempfile
+import pandas as pd
+from bench.export import HEADERS, write_export
+from db.migrate import LEAVE_FLAGS
+from upload import transform
+
+
+def legacy_preview_dates(df):
+    for col in transform.DATE_COLUMNS:
+        df[col] = pd.to_datetime(df[col], format='%d/%m/%Y', errors='coerce')
+        df[col] = df[col].apply(lambda x: x.strftime('%Y-%m-%d') if pd.notnull(x) else '')
+
+
+def legacy_upload_dates(df):
+    for col in transform.DATE_COLUMNS:
+        df[col] = pd.to_datetime(df[col], format='%d/%m/%Y', errors='coerce')
+        df[col] = df[col].dt.strftime('%Y-%m-%d').astype(object)
+        df[col] = df[col].where(df[col].notna(), None)
+
+
+def legacy_convert_end_time(value):
+    try:
+        start, end = value.split(" - ")
+        hour_map = {
+            "05:00 PM": "17:00 PM",
+            "05:30 PM": "17:30 PM",
+            "06:00 PM": "18:00 PM",
+        }
+        end_converted = hour_map.get(end.strip(), end)
+        return f"{start.strip()} - {end_converted}"
+    except:
+        return value
+
+
+def legacy_preview(df):
+    df = df.drop(transform.DROP_COLUMNS, axis=1).rename(columns=transform.RENAME_COLUMNS)
+    legacy_preview_dates(df)
+    df['work_range_date'] = df['work_range_date'].apply(legacy_convert_end_time)
+    return df.fillna('0')
+
+
+def legacy_upload(df):
+    df = df.drop(transform.DROP_COLUMNS, axis=1).rename(columns=transform.RENAME_COLUMNS)
+    legacy_upload_dates(df)
+    df['work_range_date'] = df['work_range_date'].apply(legacy_convert_end_time)
+    cols = transform.DATE_COLUMNS + transform.HOUR_COLUMNS
+    for col in transform.HOUR_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+    text_cols = [col for col in df.columns if col not in cols]
+    df[text_cols] = df[text_cols].fillna('0')
+    df['employee_id'] = pd.to_numeric(df['employee_id']).astype(int)
+    df['late_count'] = df['late_count'].astype(int)
+    for flag, label in LEAVE_FLAGS.items():
+        df[flag] = df['work_record'].astype(str).str.contains(label, case=False, regex=False).astype(int)
+    return df
+
+
+def odd_rows():
+    """Shapes the real exports are not supposed to have but the transform must survive."""
+    base = dict.fromkeys(HEADERS, "")
+    base.update({'รหัสพนักงาน': "1", 'ชื่อพนักงาน': "x"})
+    cases = [
+        {'กะทำงาน / ช่วงวันที่': "08:00 AM-05:00 PM", 'เข้างาน\nวันที่': "31/02/2025"},
+        {'กะทำงาน / ช่วงวันที่': "08:00 AM - 05:00 PM - 06:00 PM", 'เข้างาน\nวันที่': "2025-01-01"},
+        {'กะทำงาน / ช่วงวันที่': " 08:00 AM  -  05:30 PM ", 'ออกงาน\nวันที่': "1/2/2025"},
+        {'กะทำงาน / ช่วงวันที่': "08:00 AM - 07:00 PM ", 'บันทึกการทำงาน': "sick leave (Full Day)"},
+    ]
+    return [{**base, **case} for case in cases]
+
+
+def timed(fn, df):
+    start = time.perf_counter()
+    out = fn(df.copy())
+    return out, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    odd = pd.DataFrame(odd_rows(), columns=HEADERS).to_csv(index=False, header=False)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "export.csv")
+        write_export(path, args.rows)
+        with open(path, "a", encoding="utf-8", newline="") as f:
+            f.write(odd)
+        df = pd.read_csv(path)
+    print(f"{len(df)} rows")
+
+    print(f"{'transform':<10}{'old ns/row':>12}{'new ns/row':>12}{'speedup':>9}  same")
+    for name, old_fn, new_fn in [("preview", legacy_preview, transform.preview_rows),
+                                 ("upload", legacy_upload, transform.transform_upload)]:
+        old, old_s = timed(old_fn, df)
+        new, new_s = timed(new_fn, df)
+        same = old.equals(new[old.columns]) and list(old.columns) == list(new.columns)
+        print(f"{name:<10}{old_s / len(df) * 1e9:>12.0f}{new_s / len(df) * 1e9:>12.0f}{old_s / new_s:>8.1f}x  "
+              f"{'yes' if same else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
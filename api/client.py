@@ -1,23 +1,47 @@
 import os
-import io
+import asyncio
+import logging
 import json
-import pandas as pd
 from dotenv import load_dotenv
 load_dotenv()
 from fastapi import FastAPI
 from fastapi import UploadFile, File
-from mysql.connector import connect, Error
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from langchain_core.messages import HumanMessage,AIMessage
 from langchain_openai import ChatOpenAI
 from model.module import RequestMessage, AgentResponse
 from prompt.p import DATA_ADMIN
-from langchain_mcp_adapters.client import MultiServerMCPClient
-from langchain_mcp_adapters.tools import load_mcp_tools
+from contextlib import asynccontextmanager
+from agent import toolbox as mcp_toolbox
+from agent.cache import AgentCache
+from agent.stream import stream_events, SSE_HEADERS
 from agent.graph import react_agent,react_sick_agent
 from agent.react import p_react_agent
-
-app = FastAPI(title="AI Assistant")
+from db.connection import get_db_connection
+from db.version import ensure_data_version, bump_data_version
+from db.rollup import ensure_rollup_tables, refresh_rollups
+from db import migrate
+from db import ingest
+from upload import stream as upload_stream
+from upload import preview as upload_preview
+
+logger = logging.getLogger(__name__)
+
+# Warm MCP sessions and the cached tool list, shared by every request
+toolbox = mcp_toolbox.from_env()
+agents = AgentCache()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await toolbox.start()
+    if toolbox.tools:
+        for name in AGENTS:
+            await get_agent(name)
+    yield
+    await toolbox.close()
+
+app = FastAPI(title="AI Assistant", lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -27,21 +51,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-DB_CONFIG = {
-    "host": os.environ.get("MYSQL_HOST_NW"),
-    "user": os.environ.get("MYSQL_USER_NW"),
-    "password": os.environ.get("MYSQL_PASSWORD_NW"),
-    "database": os.environ.get("MYSQL_DATABASE_NW"),
-    "port": 6033
-}
-
-def get_db_connection():
-    try:
-        return connect(**DB_CONFIG)
-    except Error as e:
-        raise Exception(f"{str(e)}")
-
-
 llm = ChatOpenAI(
     api_key=os.environ.get("OPENAI_API_KEY"),
     base_url=os.environ.get("BASE_URL"),
@@ -51,172 +60,104 @@ llm = ChatOpenAI(
     top_p=0
 )
 
+AGENTS = {
+    "chat": lambda tools: p_react_agent(llm, tools, DATA_ADMIN),
+    "check_in_report": lambda tools: react_agent(llm, tools, "async"),
+    "leave_report": lambda tools: react_sick_agent(llm, tools, "async"),
+}
+
+async def get_agent(name: str):
+    """Compiled graph for `name`, rebuilt only when the MCP tool list changes."""
+    tools = await toolbox.get_tools()
+    return agents.get(name, toolbox.version, lambda: AGENTS[name](tools))
+
 @app.post("/preview-csv")
-async def preview_csv(file: UploadFile = File(...)):
-    contents = await file.read()
-    df = pd.read_csv(io.StringIO(contents.decode("utf-8")))
-    df = df.drop([
-        'กะทำงาน / ช่วงวันที่\nเข้างาน วันที่',
-        'กะทำงาน / ช่วงวันที่\nเข้างาน เวลา ',
-        'กะทำงาน / ช่วงวันที่\nออกงาน วันที่',
-        'กะทำงาน / ช่วงวันที่\nออกงาน เวลา ',
-        'เข้างานด้วยสถานที่',
-        'ออกงานด้วยสถานที่',
-        'Onsite',
-        'ปรับเวลา',
-        'ไม่เข้า-ออกงาน',
-        'อีเมล',
-    ], axis=1)
-
-    df = df.rename(columns={
-        'รหัสพนักงาน': 'employee_id',
-        'ชื่อพนักงาน': 'employee_name',
-        'ตำแหน่ง': 'employee_position',
-        'กลุ่มผู้ใช้งาน': 'employee_group',
-        'ทีม': 'employee_team',
-        'เข้างาน\nวันที่': 'checkin_date',
-        'เข้างาน\nเวลา ': 'checkin_time',
-        'ออกงาน\nวันที่': 'checkout_date',
-        'ออกงาน\nเวลา ': 'checkout_time',
-        'กะทำงาน / ช่วงวันที่': 'work_range_date',
-        'ชั่วโมงการทำงาน\n(HH.MM)': 'work_hours',
-        'สาย\n(HH.MM)': 'late_hours',
-        'ล่วงเวลา\n(HH.MM)': 'overtime_hours',
-        'ลางาน\n(HH.MM)': 'leave_hours',
-        'บันทึกการทำงาน': 'work_record',
-        'สาย/ครั้ง': 'late_count'
-    })
-    date_cols = ['checkin_date', 'checkout_date']
-    for col in date_cols:
-        df[col] = pd.to_datetime(df[col], format='%d/%m/%Y', errors='coerce')
-        df[col] = df[col].apply(lambda x: x.strftime('%Y-%m-%d') if pd.notnull(x) else '')
-
-    def convert_end_time(value):
-        try:
-            start, end = value.split(" - ")
-            hour_map = {
-                "05:00 PM": "17:00 PM",
-                "05:30 PM": "17:30 PM",
-                "06:00 PM": "18:00 PM",
-                "06:00 PM": "18:00 PM",
-            }
-            end_converted = hour_map.get(end.strip(), end)
-            return f"{start.strip()} - {end_converted}"
-        except:
-            return value
-        
-    df['work_range_date'] = df['work_range_date'].apply(convert_end_time)
-
-    df = df.fillna('0')
-    preview = df.head(50).to_dict(orient="records")
-    return {"headers": df.columns.tolist(), "rows": preview}
+async def preview_csv(file: UploadFile = File(...), rows: int = upload_preview.PREVIEW_ROWS,
+                      validate: bool = False):
+    return await asyncio.to_thread(upload_preview.preview, file.file, rows, validate)
 
-@app.post("/upload-csv")
-async def upload_csv(file: UploadFile = File(...)):
-    contents = await file.read()
-    df = pd.read_csv(io.StringIO(contents.decode("utf-8")))
-    df = df.drop([
-        'กะทำงาน / ช่วงวันที่\nเข้างาน วันที่',
-        'กะทำงาน / ช่วงวันที่\nเข้างาน เวลา ',
-        'กะทำงาน / ช่วงวันที่\nออกงาน วันที่',
-        'กะทำงาน / ช่วงวันที่\nออกงาน เวลา ',
-        'เข้างานด้วยสถานที่',
-        'ออกงานด้วยสถานที่',
-        'Onsite',
-        'ปรับเวลา',
-        'ไม่เข้า-ออกงาน',
-        'อีเมล',
-    ], axis=1)
-
-    df = df.rename(columns={
-        'รหัสพนักงาน': 'employee_id',
-        'ชื่อพนักงาน': 'employee_name',
-        'ตำแหน่ง': 'employee_position',
-        'กลุ่มผู้ใช้งาน': 'employee_group',
-        'ทีม': 'employee_team',
-        'เข้างาน\nวันที่': 'checkin_date',
-        'เข้างาน\nเวลา ': 'checkin_time',
-        'ออกงาน\nวันที่': 'checkout_date',
-        'ออกงาน\nเวลา ': 'checkout_time',
-        'กะทำงาน / ช่วงวันที่': 'work_range_date',
-        'ชั่วโมงการทำงาน\n(HH.MM)': 'work_hours',
-        'สาย\n(HH.MM)': 'late_hours',
-        'ล่วงเวลา\n(HH.MM)': 'overtime_hours',
-        'ลางาน\n(HH.MM)': 'leave_hours',
-        'บันทึกการทำงาน': 'work_record',
-        'สาย/ครั้ง': 'late_count'
-    })
-    date_cols = ['checkin_date', 'checkout_date']
-    for col in date_cols:
-        df[col] = pd.to_datetime(df[col], format='%d/%m/%Y', errors='coerce')
-        df[col] = df[col].apply(lambda x: x.strftime('%Y-%m-%d') if pd.notnull(x) else '')
-
-    def convert_end_time(value):
-        try:
-            start, end = value.split(" - ")
-            hour_map = {
-                "05:00 PM": "17:00 PM",
-                "05:30 PM": "17:30 PM",
-                "06:00 PM": "18:00 PM",
-                "06:00 PM": "18:00 PM",
-            }
-            end_converted = hour_map.get(end.strip(), end)
-            return f"{start.strip()} - {end_converted}"
-        except:
-            return value
-        
-    df['work_range_date'] = df['work_range_date'].apply(convert_end_time)
-
-    df = df.fillna('0')
+def stop_import(conn, cursor, table: str, file_id: str, dates):
+    """Bring the rollups up to date with the batches a failed import committed."""
     try:
+        refresh_rollups(cursor, table, dates)
+        bump_data_version(cursor)
+        ingest.stop_import(cursor, file_id)
+        conn.commit()
+    except Exception as e:
+        # The import stays RUNNING (raw rows are read) until it is resumed or db.rollup rebuilds
+        logger.warning("Could not refresh rollups after a failed import into %s: %s", table, e)
+        conn.rollback()
+
+def import_csv(fileobj, table: str, batch_size: int, force: bool, mode: str = "upsert"):
+    """
+    Stream `fileobj` into `table`: parse and transform UPLOAD_CHUNK_ROWS rows at a time
+    and commit every batch_size rows, so memory stays flat however large the file is.
+    mode=upsert merges on (employee_id, checkin_date, work_range_date); insert appends.
+    """
+    if mode not in ingest.MODES:
+        return {"error": f"mode must be one of {ingest.MODES}"}
+    load = None
+    conn = cursor = None
+    dates = set()
+
+    def batches():
+        for chunk in upload_stream.transformed_chunks(fileobj):
+            dates.update(chunk['checkin_date'].unique())
+            yield from ingest.frame_batches(chunk, batch_size)
+
+    try:
+        file_id = ingest.import_id(table, upload_stream.file_digest(fileobj))
         conn = get_db_connection()
         cursor = conn.cursor()
+        ensure_data_version(cursor)
+        ensure_rollup_tables(cursor)
+        ingest.ensure_progress_table(cursor)
+        # ALTER TABLE on the live table is a one-off (python -m db.migrate), not part of an upload
+        if migrate.pending(cursor, table):
+            return {"error": f"{table} is not migrated to the typed schema yet. "
+                             f"Run `python -m db.migrate {table}` first."}
+
+        rows_done, finished = ingest.start_import(cursor, file_id, table, force=force)
+        conn.commit()
+        if finished:
+            return {"message": "This file was already imported. Upload with force=true to import it again.",
+                    "rows_inserted": 0, "rows_skipped": rows_done}
 
-        for _, row in df.iterrows():
-            sql = """INSERT INTO employee_2025 (
-                employee_id, employee_name, employee_position,
-                employee_group, employee_team,
-                checkin_date, checkin_time, checkout_date, checkout_time,
-                work_range_date, work_hours, late_hours, overtime_hours,
-                leave_hours, work_record, late_count
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"""
-
-            values = (
-                int(row['employee_id']),
-                row['employee_name'],
-                row['employee_position'],
-                row['employee_group'],
-                row['employee_team'],
-                row['checkin_date'],
-                row['checkin_time'],
-                row['checkout_date'],
-                row['checkout_time'],
-                row['work_range_date'],
-                float(row['work_hours']),
-                float(row['late_hours']),
-                float(row['overtime_hours']),
-                float(row['leave_hours']),
-                row['work_record'],
-                int(row['late_count']),
-            )
-            cursor.execute(sql, values)
+        loader = ingest.MergeLoad if mode == "upsert" else ingest.BulkLoad
+        load = loader(conn, table, file_id, rows_done)
+        load.run(batches())
 
+        refresh_rollups(cursor, table, dates)
+        bump_data_version(cursor)
+        ingest.finish_import(cursor, file_id, load.position)
         conn.commit()
-        return {"message": "✅ CSV data imported successfully."}
+        return {"message": "✅ CSV data imported successfully.", **load.report()}
 
     except Exception as e:
-        return {"error": str(e)}
-    
+        if conn:
+            conn.rollback()
+        error = {"error": str(e)}
+        if load and load.batches:
+            stop_import(conn, cursor, table, file_id, dates)
+        if load and load.rows_done:
+            error.update(load.report(), hint="Committed batches are kept. Upload the same file again to resume.")
+        return error
+
     finally:
         if cursor:
             cursor.close()
         if conn:
             conn.close()
 
-@app.post("/chat")
-async def chat(chatmessage: RequestMessage):
+@app.post("/upload-csv")
+async def upload_csv(file: UploadFile = File(...), batch_size: int = ingest.BATCH_SIZE, force: bool = False,
+                     mode: str = "upsert"):
+    # Parsing and inserting block, so keep them off the event loop
+    return await asyncio.to_thread(import_csv, file.file, "employee_2025", batch_size, force, mode)
+
+def chat_messages(chatmessage: RequestMessage):
     messages = []
-    
+
     for chat in chatmessage.messages:
         if chat.role == 'ai':
             messages.append(AIMessage(content=chat.content))
@@ -224,30 +165,15 @@ async def chat(chatmessage: RequestMessage):
             messages.append(HumanMessage(content=chat.content))
         elif chat.role == 'system':
             messages.append({"role": "system", "content": chat.content})
+    return messages
 
-    client = MultiServerMCPClient(
-        {
-            "db": {
-                "url": os.environ.get("MCP_URL"),
-                "transport": "streamable_http",
-            }
-        }
-    )
+def chat_result(result):
+    return {
+        "response": result["messages"][-1].content,
+        "full_messages": result["messages"]
+    }
 
-    async with client.session("db") as session:
-        tools = await load_mcp_tools(session)
-        
-        agent = p_react_agent(llm, tools, DATA_ADMIN)
-        result = await agent.ainvoke({"messages": messages})   
-        final_result = result["messages"][-1].content
-
-        return {
-            "response": final_result,
-            "full_messages": result["messages"]
-        }
-        
-@app.post("/create-check-in-report", response_model=AgentResponse)
-async def create_report(request: RequestMessage):
+def report_messages(request: RequestMessage):
     messages = []
 
     for msg in request.messages:
@@ -255,70 +181,66 @@ async def create_report(request: RequestMessage):
             messages.append(HumanMessage(content=msg.content))
         elif msg.role == 'ai':
             messages.append(AIMessage(content=msg.content))
-        
-    client = MultiServerMCPClient(
-        {
-            "db": {
-                "url":os.environ.get("MCP_URL"),
-                "transport": "streamable_http",
-            }
-        }
+    return messages
+
+def report_result(result):
+    plann = result.get("report_plan","Noting was generated.")
+    queryy = result.get("report_query","Noting was generated.")
+    reportt = result.get("report_final","Noting was generated.")
+    graphh = result.get("report_graph","Noting was generated.")
+
+    return AgentResponse(
+        response=reportt + graphh,
+        plan=plann,
+        query=queryy,
+        report=reportt,
+        graph=graphh
     )
 
-    async with client.session("db") as session:
-        tools = await load_mcp_tools(session)
-        agent = react_agent(llm, tools, "async")
-        result = await agent.ainvoke({"messages": messages, "recursion_limit": 15})
-        
-        plann = result.get("report_plan","Noting was generated.")
-        queryy = result.get("report_query","Noting was generated.")
-        reportt = result.get("report_final","Noting was generated.")
-        graphh = result.get("report_graph","Noting was generated.")      
-
-        return AgentResponse(
-            response=reportt + graphh,
-            plan=plann,
-            query=queryy,
-            report=reportt,
-            graph=graphh
-        )
-    
-@app.post("/create-take-leave-report", response_model=AgentResponse)
-async def create_sick_report(request: RequestMessage):
-    messages = []
+async def stream_agent(name: str, inputs: dict, final):
+    agent = await get_agent(name)
+    return StreamingResponse(stream_events(agent, inputs, final),
+                             media_type="text/event-stream", headers=SSE_HEADERS)
 
-    for msg in request.messages:
-        if msg.role == 'human':
-            messages.append(HumanMessage(content=msg.content))
-        elif msg.role == 'ai':
-            messages.append(AIMessage(content=msg.content))
+@app.post("/chat")
+async def chat(chatmessage: RequestMessage):
+    agent = await get_agent("chat")
+    result = await agent.ainvoke({"messages": chat_messages(chatmessage)})
+    return chat_result(result)
 
+@app.post("/chat/stream")
+async def chat_stream(chatmessage: RequestMessage):
+    return await stream_agent("chat", {"messages": chat_messages(chatmessage)}, chat_result)
 
-    client = MultiServerMCPClient(
-        {
-            "db": {
-                "url":os.environ.get("MCP_URL"),
-                "transport": "streamable_http",
-            }
-        }
-    )
-    async with client.session("db") as session:
-        tools = await load_mcp_tools(session)
-        agent = react_sick_agent(llm, tools, "async")
-        result = await agent.ainvoke({"messages": messages, "recursion_limit": 15})
-        
-        plann = result.get("report_plan","Noting was generated.")
-        queryy = result.get("report_query","Noting was generated.")
-        reportt = result.get("report_final","Noting was generated.")
-        graphh = result.get("report_graph","Noting was generated.")      
-
-        return AgentResponse(
-            response=reportt + graphh,
-            plan=plann,
-            query=queryy,
-            report=reportt,
-            graph=graphh
-        )
+@app.post("/create-check-in-report", response_model=AgentResponse)
+async def create_report(request: RequestMessage):
+    agent = await get_agent("check_in_report")
+    result = await agent.ainvoke({"messages": report_messages(request), "recursion_limit": 15})
+    return report_result(result)
+
+@app.post("/create-check-in-report/stream")
+async def create_report_stream(request: RequestMessage):
+    inputs = {"messages": report_messages(request), "recursion_limit": 15}
+    return await stream_agent("check_in_report", inputs, report_result)
+
+@app.post("/create-take-leave-report", response_model=AgentResponse)
+async def create_sick_report(request: RequestMessage):
+    agent = await get_agent("leave_report")
+    result = await agent.ainvoke({"messages": report_messages(request), "recursion_limit": 15})
+    return report_result(result)
+
+@app.post("/create-take-leave-report/stream")
+async def create_sick_report_stream(request: RequestMessage):
+    inputs = {"messages": report_messages(request), "recursion_limit": 15}
+    return await stream_agent("leave_report", inputs, report_result)
+
+@app.get("/mcp-sessions")
+async def mcp_sessions():
+    return toolbox.status()
+
+@app.get("/agents")
+async def agent_builds():
+    return agents.stats()
 
 @app.get("/")
 async def health_check():
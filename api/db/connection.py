@@ -0,0 +1,16 @@
+import os
+from mysql.connector import connect, Error
+
+DB_CONFIG = {
+    "host": os.environ.get("MYSQL_HOST_NW"),
+    "user": os.environ.get("MYSQL_USER_NW"),
+    "password": os.environ.get("MYSQL_PASSWORD_NW"),
+    "database": os.environ.get("MYSQL_DATABASE_NW"),
+    "port": 6033
+}
+
+def get_db_connection():
+    try:
+        return connect(**DB_CONFIG)
+    except Error as e:
+        raise Exception(f"{str(e)}")
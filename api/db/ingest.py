@@ -0,0 +1,248 @@
+"""
+Bulk load of the transformed attendance rows into an employee_20XX table.
+
+Rows are written in batches with executemany, which mysql.connector sends as one
+multi-row INSERT ... VALUES (...), (...) per batch, and every batch is committed on
+its own so an import no longer holds its locks for the whole file.
+
+import_progress keeps, per file (sha1 of the upload) and table, how many rows are
+committed; it is updated in the same transaction as each batch. Uploading the same
+file again after a failure continues after the last committed batch, and a file
+that already finished is not inserted a second time.
+
+Every batch also bumps data_version, so the MCP result cache never serves answers
+from before rows it can already see. The rollups are refreshed once, in the
+transaction that finishes the import; while it runs the table has an import_progress
+row with finished = RUNNING and rows_done > 0, and the MCP server reads its raw rows
+instead of its rollups (mcp_server.rolled_up_tables). When an import fails, the
+rollups are refreshed for what it committed and the row becomes STOPPED (see
+stop_import), so the rollups are used again whether or not the file is ever resumed;
+db.rollup's rebuild does the same for an import whose process died.
+
+MergeLoad (mode=upsert) makes the rows themselves idempotent: a row is identified by
+(employee_id, day, work_range_date), so exports with overlapping months can be
+imported again. The day is checkin_date, or work_date (the shift's day) on full-day
+leave rows, which have no check-in; rows imported before work_date existed have
+neither on leave days, so those leave rows are not matched and get inserted again. Each batch goes into a temporary staging table and is merged with
+three set statements (count unchanged rows, UPDATE ... JOIN the changed ones, INSERT
+... SELECT the new ones) instead of a lookup per row.
+"""
+import os
+import time
+import hashlib
+from db.version import bump_data_version
+
+PROGRESS_TABLE = "import_progress"
+STAGE_TABLE = "import_stage"
+
+BATCH_SIZE = int(os.environ.get("UPLOAD_BATCH_SIZE", 5000))
+
+COLUMNS = [
+    "employee_id", "employee_name", "employee_position",
+    "employee_group", "employee_team",
+    "checkin_date", "checkin_time", "checkout_date", "checkout_time",
+    "work_range_date", "work_date", "work_hours", "late_hours", "overtime_hours",
+    "leave_hours", "work_record", "late_count",
+    "leave_annual", "leave_sick", "leave_errand",
+]
+
+# Natural key of an attendance row; the day is COALESCE(checkin_date, work_date)
+# since full-day leave has no check-in date
+KEY_COLUMNS = ["employee_id", "work_range_date"]
+VALUE_COLUMNS = [col for col in COLUMNS if col not in KEY_COLUMNS]
+
+
+def _key(alias: str) -> list:
+    return [f"{alias}.employee_id", f"COALESCE({alias}.checkin_date, {alias}.work_date)", f"{alias}.work_range_date"]
+
+
+_ID, _CHECKIN, _WORK_DATE, _SHIFT = (COLUMNS.index(col) for col in
+                                     ["employee_id", "checkin_date", "work_date", "work_range_date"])
+
+
+def row_key(row) -> tuple:
+    """The natural key of one frame_batches row, as _key() computes it in SQL."""
+    day = row[_CHECKIN] if row[_CHECKIN] is not None else row[_WORK_DATE]
+    return row[_ID], day, row[_SHIFT]
+
+MODES = ["upsert", "insert"]
+
+# import_progress.finished
+RUNNING, FINISHED, STOPPED = 0, 1, 2
+
+
+def ensure_progress_table(cursor):
+    # DDL commits implicitly in MySQL, so call this before starting an import.
+    cursor.execute(f"""CREATE TABLE IF NOT EXISTS {PROGRESS_TABLE} (
+        import_id CHAR(40) PRIMARY KEY,
+        table_name VARCHAR(64) NOT NULL,
+        rows_total INT NOT NULL,
+        rows_done INT NOT NULL DEFAULT 0,
+        finished TINYINT NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    )""")
+
+
+def import_id(table: str, digest) -> str:
+    """Id of one file imported into `table`; `digest` is a hashlib object over the upload."""
+    return hashlib.sha1(f"{table}:{digest.hexdigest()}".encode("utf-8")).hexdigest()
+
+
+def start_import(cursor, import_id: str, table: str, rows_total: int = 0, force: bool = False):
+    """
+    (rows already committed, finished) for this file; force starts again from row 0.
+    A stopped import is resumed (RUNNING again). rows_total may be 0 when the file is
+    streamed and counted as it is loaded.
+    """
+    cursor.execute(f"""INSERT INTO {PROGRESS_TABLE} (import_id, table_name, rows_total)
+        VALUES (%s, %s, %s)
+        ON DUPLICATE KEY UPDATE rows_total = VALUES(rows_total)""", (import_id, table, rows_total))
+    if force:
+        cursor.execute(f"UPDATE {PROGRESS_TABLE} SET rows_done = 0, finished = %s WHERE import_id = %s",
+                       (RUNNING, import_id))
+    else:
+        cursor.execute(f"UPDATE {PROGRESS_TABLE} SET finished = %s WHERE import_id = %s AND finished = %s",
+                       (RUNNING, import_id, STOPPED))
+    cursor.execute(f"SELECT rows_done, finished FROM {PROGRESS_TABLE} WHERE import_id = %s", (import_id,))
+    rows_done, finished = cursor.fetchone()
+    return int(rows_done), finished == FINISHED
+
+
+def finish_import(cursor, import_id: str, rows_total: int):
+    cursor.execute(f"UPDATE {PROGRESS_TABLE} SET finished = %s, rows_total = %s WHERE import_id = %s",
+                   (FINISHED, rows_total, import_id))
+
+
+def stop_import(cursor, import_id: str):
+    """
+    Mark a failed import STOPPED; call in the transaction that refreshes the rollups
+    for the rows it committed. Uploading the file again still resumes it.
+    """
+    cursor.execute(f"UPDATE {PROGRESS_TABLE} SET finished = %s WHERE import_id = %s AND finished = %s",
+                   (STOPPED, import_id, RUNNING))
+
+
+def stop_imports(cursor, table: str):
+    """Mark every running import into `table` STOPPED, once its rollups are rebuilt."""
+    cursor.execute(f"UPDATE {PROGRESS_TABLE} SET finished = %s WHERE table_name = %s AND finished = %s",
+                   (STOPPED, table, RUNNING))
+
+
+def frame_batches(df, batch_size: int = BATCH_SIZE):
+    """Lists of plain-Python row tuples in COLUMNS order, batch_size rows at a time."""
+    frame = df[COLUMNS]
+    for offset in range(0, len(frame), batch_size):
+        # object dtype turns numpy scalars into int / float the connector can bind
+        yield frame.iloc[offset:offset + batch_size].to_numpy(dtype=object).tolist()
+
+
+class BulkLoad:
+    """Inserts batches into `table`, committing each one together with its progress."""
+
+    def __init__(self, conn, table: str, import_id: str, rows_done: int = 0, bump_version: bool = True):
+        self.conn = conn
+        self.bump_version = bump_version
+        self.table = table
+        self.import_id = import_id
+        self.resumed_from = rows_done
+        self.rows_done = rows_done
+        self.inserted = 0
+        self.batches = 0
+        self.seconds = 0.0
+        # Rows of the file seen so far, committed or skipped
+        self.position = 0
+        self.sql = f"INSERT INTO {table} ({', '.join(COLUMNS)}) VALUES ({', '.join(['%s'] * len(COLUMNS))})"
+
+    def run(self, batches):
+        """Load `batches`; a later call continues with the next batches of the same file."""
+        cursor = self.conn.cursor()
+        start = time.perf_counter()
+        try:
+            for batch in batches:
+                end = self.position + len(batch)
+                if end <= self.rows_done:
+                    # Committed by an earlier attempt at this file
+                    self.position = end
+                    continue
+                rows = batch[max(0, self.rows_done - self.position):]
+
+                self.write(cursor, rows)
+                if self.bump_version:
+                    bump_data_version(cursor)
+                cursor.execute(f"UPDATE {PROGRESS_TABLE} SET rows_done = %s WHERE import_id = %s",
+                               (end, self.import_id))
+                self.conn.commit()
+                self.rows_done = self.position = end
+                self.batches += 1
+        finally:
+            self.seconds += time.perf_counter() - start
+            cursor.close()
+
+    def write(self, cursor, rows):
+        cursor.executemany(self.sql, rows)
+        self.inserted += len(rows)
+
+    def report(self) -> dict:
+        return {
+            "rows_inserted": self.inserted,
+            "rows_committed": self.rows_done,
+            "resumed_from": self.resumed_from,
+            "batches": self.batches,
+            "seconds": round(self.seconds, 2),
+            "rows_per_sec": round((self.rows_done - self.resumed_from) / self.seconds) if self.seconds else 0,
+        }
+
+
+class MergeLoad(BulkLoad):
+    """
+    Upserts batches by natural key (row_key) through STAGE_TABLE: new keys are inserted, rows
+    whose values changed are updated and identical rows are skipped. Within a batch
+    the last row of a key wins; the earlier ones count as skipped.
+    """
+
+    def __init__(self, conn, table: str, import_id: str, rows_done: int = 0, bump_version: bool = True):
+        super().__init__(conn, table, import_id, rows_done, bump_version)
+        self.updated = 0
+        self.skipped = 0
+        self.sql = f"INSERT INTO {STAGE_TABLE} ({', '.join(COLUMNS)}) VALUES ({', '.join(['%s'] * len(COLUMNS))})"
+
+        key = " AND ".join(f"{t} <=> {s}" for t, s in zip(_key("t"), _key("s")))
+        same = " AND ".join(f"t.{col} <=> s.{col}" for col in VALUE_COLUMNS)
+        self.count_sql = f"""SELECT COUNT(*) FROM {STAGE_TABLE} s
+            WHERE EXISTS (SELECT 1 FROM {table} t WHERE {key} AND {same})"""
+        self.update_sql = f"""UPDATE {table} t JOIN {STAGE_TABLE} s ON {key}
+            SET {', '.join(f"t.{col} = s.{col}" for col in VALUE_COLUMNS)}
+            WHERE NOT ({same})"""
+        self.insert_sql = f"""INSERT INTO {table} ({', '.join(COLUMNS)})
+            SELECT {', '.join(f"s.{col}" for col in COLUMNS)} FROM {STAGE_TABLE} s
+            LEFT JOIN {table} t ON {key}
+            WHERE t.employee_id IS NULL"""
+
+    def run(self, batches):
+        # Temporary tables are per connection and do not commit the open transaction
+        cursor = self.conn.cursor()
+        cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {STAGE_TABLE}")
+        cursor.execute(f"CREATE TEMPORARY TABLE {STAGE_TABLE} LIKE {self.table}")
+        try:
+            super().run(batches)
+        finally:
+            cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {STAGE_TABLE}")
+            cursor.close()
+
+    def write(self, cursor, rows):
+        latest = {row_key(row): row for row in rows}
+
+        cursor.execute(f"DELETE FROM {STAGE_TABLE}")
+        cursor.executemany(self.sql, list(latest.values()))
+        cursor.execute(self.count_sql)
+        unchanged = cursor.fetchone()[0]
+        cursor.execute(self.update_sql)
+        cursor.execute(self.insert_sql)
+        inserted = cursor.rowcount
+
+        self.inserted += inserted
+        self.updated += len(latest) - unchanged - inserted
+        self.skipped += unchanged + len(rows) - len(latest)
+
+    def report(self) -> dict:
+        return {**super().report(), "rows_updated": self.updated, "rows_skipped": self.skipped}
@@ -0,0 +1,124 @@
+"""
+Typed attendance schema for the employee_YYYY tables.
+
+- checkin_date / checkout_date become DATE (blank strings become NULL)
+- the HH.MM hour fields become DECIMAL and late_count INT
+- leave_annual / leave_sick / leave_errand flags hold the leave type classified
+  from work_record, so leave counts are plain integer sums
+- work_date (DATE) holds the shift's day, which /upload-csv fills; rows imported
+  before it existed keep NULL
+- a composite (employee_group, employee_team, checkin_date) index for the rows in a
+  date range, an (employee_group, leave_hours) one for the leave rows the date
+  tools count whatever their date, and an (employee_id, checkin_date) one for the
+  upsert import's lookups by natural key
+
+Safe to re-run; only the missing steps are applied. This is a one-off command: the
+ALTER TABLE rebuilds the table, so /upload-csv only checks (pending()) and refuses
+a table that still needs it. Usage:
+
+    python -m db.migrate employee_2023 employee_2024 employee_2025
+"""
+
+LEAVE_FLAGS = {
+    "leave_annual": "Annual Leave",
+    "leave_sick": "Sick Leave",
+    "leave_errand": "Errand Leave",
+}
+
+HOUR_COLUMNS = ["work_hours", "late_hours", "overtime_hours", "leave_hours"]
+DATE_COLUMNS = ["checkin_date", "checkout_date"]
+INDEX_NAME = "idx_group_team_date"
+LEAVE_INDEX = "idx_group_leave"
+KEY_INDEX = "idx_employee_date"
+
+
+def _columns(cursor, table):
+    cursor.execute("""SELECT column_name, data_type FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s""", (table,))
+    return {name.lower(): data_type.lower() for name, data_type in cursor.fetchall()}
+
+
+def _has_index(cursor, table, name=INDEX_NAME):
+    cursor.execute("""SELECT 1 FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s LIMIT 1""", (table, name))
+    return bool(cursor.fetchall())
+
+
+def is_typed(cursor, table) -> bool:
+    return _columns(cursor, table).get("checkin_date") == "date"
+
+
+def _alters(cursor, table, columns) -> list:
+    alters = []
+    for col in DATE_COLUMNS:
+        if columns.get(col) != "date":
+            alters.append(f"MODIFY {col} DATE NULL")
+    for col in HOUR_COLUMNS:
+        if columns.get(col) != "decimal":
+            alters.append(f"MODIFY {col} DECIMAL(7,2) NOT NULL DEFAULT 0")
+    if columns.get("late_count") != "int":
+        alters.append("MODIFY late_count INT NOT NULL DEFAULT 0")
+    if columns.get("employee_group") != "varchar":
+        alters.append("MODIFY employee_group VARCHAR(64) NOT NULL")
+    if columns.get("employee_team") != "varchar":
+        alters.append("MODIFY employee_team VARCHAR(64) NOT NULL")
+    for flag in LEAVE_FLAGS:
+        if flag not in columns:
+            alters.append(f"ADD COLUMN {flag} TINYINT NOT NULL DEFAULT 0")
+    if "work_date" not in columns:
+        alters.append("ADD COLUMN work_date DATE NULL")
+    if not _has_index(cursor, table):
+        alters.append(f"ADD INDEX {INDEX_NAME} (employee_group, employee_team, checkin_date)")
+    if not _has_index(cursor, table, LEAVE_INDEX):
+        alters.append(f"ADD INDEX {LEAVE_INDEX} (employee_group, leave_hours)")
+    if not _has_index(cursor, table, KEY_INDEX):
+        alters.append(f"ADD INDEX {KEY_INDEX} (employee_id, checkin_date)")
+    return alters
+
+
+def pending(cursor, table) -> list:
+    """The ALTER TABLE steps `table` still needs; only reads information_schema."""
+    columns = _columns(cursor, table)
+    if not columns:
+        raise ValueError(f"Table {table} does not exist")
+    return _alters(cursor, table, columns)
+
+
+def migrate_table(cursor, table):
+    columns = _columns(cursor, table)
+    if not columns:
+        raise ValueError(f"Table {table} does not exist")
+
+    for col in DATE_COLUMNS:
+        if columns.get(col) != "date":
+            # '' and other non-dates would abort the DATE conversion
+            cursor.execute(f"""UPDATE {table} SET {col} = NULL
+                WHERE {col} IS NOT NULL AND {col} NOT REGEXP '^[0-9]{{4}}-[0-9]{{2}}-[0-9]{{2}}$'""")
+
+    alters = _alters(cursor, table, columns)
+    new_flags = [flag for flag in LEAVE_FLAGS if flag not in columns]
+    if alters:
+        cursor.execute(f"ALTER TABLE {table} " + ", ".join(alters))
+    if new_flags:
+        cursor.execute(f"UPDATE {table} SET " + ", ".join(
+            f"{flag} = work_record LIKE '%{LEAVE_FLAGS[flag]}%'" for flag in new_flags
+        ))
+
+
+if __name__ == "__main__":
+    import sys
+    from dotenv import load_dotenv
+    load_dotenv()
+    from db.connection import get_db_connection
+
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        for table in sys.argv[1:]:
+            if not (table.startswith("employee_") and table[len("employee_"):].isdigit()):
+                raise SystemExit(f"Not a year table: {table}")
+            migrate_table(cursor, table)
+            conn.commit()
+            print(f"Migrated {table}")
+    finally:
+        conn.close()
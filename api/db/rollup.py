@@ -0,0 +1,196 @@
+"""
+Pre-aggregated attendance rollups read by the MCP check-in and leave tools.
+
+attendance_daily holds one row per (year table, employee, team, day, has_leave)
+and attendance_monthly the same per month. has_leave keeps the `leave_hours > 0`
+split the leave tools filter on, so every tool query can be answered from the
+rollups with the same result as scanning the raw employee_20XX rows.
+
+rollup_state lists the year tables whose rollups are complete; the MCP server
+falls back to the raw table for anything not listed there, and for a listed table
+while an import into it is running (see db.ingest). Rebuilding a table also marks
+an import that died part way as stopped, so its rollups are used again.
+
+Build the rollups for existing tables once with:
+
+    python -m db.rollup employee_2023 employee_2024 employee_2025
+"""
+
+from db.migrate import is_typed
+from db.ingest import ensure_progress_table, stop_imports
+
+DAILY_TABLE = "attendance_daily"
+MONTHLY_TABLE = "attendance_monthly"
+STATE_TABLE = "rollup_state"
+
+_METRICS = """
+    SUM(work_hours),
+    SUM(late_hours),
+    SUM(leave_hours),
+    SUM(CASE WHEN late_count = 1 THEN 1 ELSE 0 END),
+    SUM(CASE WHEN work_record LIKE '%Annual Leave%' THEN 1 ELSE 0 END),
+    SUM(CASE WHEN work_record LIKE '%Sick Leave%' THEN 1 ELSE 0 END),
+    SUM(CASE WHEN work_record LIKE '%Errand Leave%' THEN 1 ELSE 0 END)
+"""
+
+_ROLLED_METRICS = """
+    SUM(work_hours),
+    SUM(late_hours),
+    SUM(leave_hours),
+    SUM(late_times),
+    SUM(annual_days),
+    SUM(sick_days),
+    SUM(errand_days)
+"""
+
+_METRIC_COLUMNS = "work_hours, late_hours, leave_hours, late_times, annual_days, sick_days, errand_days"
+
+_CHUNK = 500
+
+
+def ensure_rollup_tables(cursor):
+    # DDL commits implicitly in MySQL, so call this before starting an import.
+    cursor.execute(f"""CREATE TABLE IF NOT EXISTS {DAILY_TABLE} (
+        source_table VARCHAR(32) NOT NULL,
+        employee_group VARCHAR(64) NOT NULL,
+        employee_name VARCHAR(255) NOT NULL,
+        employee_team VARCHAR(64) NOT NULL,
+        checkin_date VARCHAR(10) NOT NULL,
+        has_leave TINYINT NOT NULL,
+        work_hours DECIMAL(14,4) NOT NULL,
+        late_hours DECIMAL(14,4) NOT NULL,
+        leave_hours DECIMAL(14,4) NOT NULL,
+        late_times INT NOT NULL,
+        annual_days INT NOT NULL,
+        sick_days INT NOT NULL,
+        errand_days INT NOT NULL,
+        PRIMARY KEY (source_table, employee_group, employee_name, employee_team, checkin_date, has_leave),
+        KEY idx_daily_date (source_table, checkin_date)
+    )""")
+    cursor.execute(f"""CREATE TABLE IF NOT EXISTS {MONTHLY_TABLE} (
+        source_table VARCHAR(32) NOT NULL,
+        employee_group VARCHAR(64) NOT NULL,
+        employee_name VARCHAR(255) NOT NULL,
+        employee_team VARCHAR(64) NOT NULL,
+        month CHAR(7) NOT NULL,
+        has_leave TINYINT NOT NULL,
+        work_hours DECIMAL(14,4) NOT NULL,
+        late_hours DECIMAL(14,4) NOT NULL,
+        leave_hours DECIMAL(14,4) NOT NULL,
+        late_times INT NOT NULL,
+        annual_days INT NOT NULL,
+        sick_days INT NOT NULL,
+        errand_days INT NOT NULL,
+        PRIMARY KEY (source_table, employee_group, employee_name, employee_team, month, has_leave)
+    )""")
+    cursor.execute(f"""CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+        source_table VARCHAR(32) PRIMARY KEY,
+        refreshed_at DATETIME NOT NULL
+    )""")
+
+
+def _chunks(values):
+    values = list(values)
+    for i in range(0, len(values), _CHUNK):
+        yield values[i:i + _CHUNK]
+
+
+def _refresh_daily(cursor, source_table, dates):
+    # Rows without a check-in date are rolled up under '' (NULL in typed tables)
+    blank = "checkin_date IS NULL" if is_typed(cursor, source_table) else "(checkin_date = '' OR checkin_date IS NULL)"
+    if "" in dates:
+        dates = [d for d in dates if d != ""]
+        cursor.execute(f"DELETE FROM {DAILY_TABLE} WHERE source_table = %s AND checkin_date = ''", (source_table,))
+        _insert_daily(cursor, source_table, blank, ())
+    for chunk in _chunks(dates):
+        marks = ", ".join(["%s"] * len(chunk))
+        cursor.execute(
+            f"DELETE FROM {DAILY_TABLE} WHERE source_table = %s AND checkin_date IN ({marks})",
+            (source_table, *chunk),
+        )
+        _insert_daily(cursor, source_table, f"checkin_date IN ({marks})", chunk)
+
+
+def _insert_daily(cursor, source_table, condition, params):
+    cursor.execute(f"""
+        INSERT INTO {DAILY_TABLE} (
+            source_table, employee_group, employee_name, employee_team, checkin_date, has_leave,
+            {_METRIC_COLUMNS}
+        )
+        SELECT
+            %s, employee_group, employee_name, employee_team, COALESCE(checkin_date, ''), leave_hours > 0,
+            {_METRICS}
+        FROM {source_table}
+        WHERE {condition}
+        GROUP BY employee_group, employee_name, employee_team, COALESCE(checkin_date, ''), leave_hours > 0
+    """, (source_table, *params))
+
+
+def _refresh_monthly(cursor, source_table, months):
+    for chunk in _chunks(months):
+        marks = ", ".join(["%s"] * len(chunk))
+        cursor.execute(
+            f"DELETE FROM {MONTHLY_TABLE} WHERE source_table = %s AND month IN ({marks})",
+            (source_table, *chunk),
+        )
+        cursor.execute(f"""
+            INSERT INTO {MONTHLY_TABLE} (
+                source_table, employee_group, employee_name, employee_team, month, has_leave,
+                {_METRIC_COLUMNS}
+            )
+            SELECT
+                source_table, employee_group, employee_name, employee_team, LEFT(checkin_date, 7), has_leave,
+                {_ROLLED_METRICS}
+            FROM {DAILY_TABLE}
+            WHERE source_table = %s AND LEFT(checkin_date, 7) IN ({marks})
+            GROUP BY source_table, employee_group, employee_name, employee_team, LEFT(checkin_date, 7), has_leave
+        """, (source_table, *chunk))
+
+
+def refresh_rollups(cursor, source_table, dates):
+    """
+    Recompute the daily rows for `dates` and the monthly rows for the months they
+    fall in. Call in the transaction that makes the last of the new rows visible
+    (db.ingest commits batches on their own and refreshes once, when it finishes).
+    """
+    dates = sorted({"" if d is None else str(d) for d in dates})
+    if not dates:
+        return
+    _refresh_daily(cursor, source_table, dates)
+    _refresh_monthly(cursor, source_table, sorted({d[:7] for d in dates}))
+
+
+def rebuild_rollups(cursor, source_table):
+    cursor.execute(f"DELETE FROM {DAILY_TABLE} WHERE source_table = %s", (source_table,))
+    cursor.execute(f"DELETE FROM {MONTHLY_TABLE} WHERE source_table = %s", (source_table,))
+    cursor.execute(f"SELECT DISTINCT checkin_date FROM {source_table}")
+    dates = [row[0] for row in cursor.fetchall()]
+    refresh_rollups(cursor, source_table, dates)
+    cursor.execute(f"""INSERT INTO {STATE_TABLE} (source_table, refreshed_at) VALUES (%s, NOW())
+        ON DUPLICATE KEY UPDATE refreshed_at = NOW()""", (source_table,))
+    # The rollups now cover the rows of an import that died part way, too
+    stop_imports(cursor, source_table)
+
+
+if __name__ == "__main__":
+    import sys
+    from dotenv import load_dotenv
+    load_dotenv()
+    from db.connection import get_db_connection
+    from db.version import ensure_data_version, bump_data_version
+
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        ensure_rollup_tables(cursor)
+        ensure_data_version(cursor)
+        ensure_progress_table(cursor)
+        for table in sys.argv[1:]:
+            if not (table.startswith("employee_") and table[len("employee_"):].isdigit()):
+                raise SystemExit(f"Not a year table: {table}")
+            rebuild_rollups(cursor, table)
+            print(f"Rebuilt rollups for {table}")
+        bump_data_version(cursor)
+        conn.commit()
+    finally:
+        conn.close()
@@ -0,0 +1,15 @@
+def ensure_data_version(cursor):
+    # DDL commits implicitly in MySQL, so this must run before the import's inserts.
+    cursor.execute("""CREATE TABLE IF NOT EXISTS data_version (
+        id TINYINT PRIMARY KEY,
+        version BIGINT NOT NULL
+    )""")
+
+def bump_data_version(cursor):
+    """
+    Increment the data_version counter inside the caller's transaction so the MCP
+    server's result cache drops everything computed before the rows it commits;
+    db.ingest calls it in every batch's transaction.
+    """
+    cursor.execute("""INSERT INTO data_version (id, version) VALUES (1, 1)
+        ON DUPLICATE KEY UPDATE version = version + 1""")
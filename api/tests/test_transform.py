@@ -0,0 +1,139 @@
+import io
+import numpy as np
+import pandas as pd
+from upload import transform
+from upload.preview import preview
+from upload.stream import TEXT_DTYPES
+
+RAW_COLUMNS = transform.DROP_COLUMNS + list(transform.RENAME_COLUMNS)
+RAW_NAMES = {name: raw for raw, name in transform.RENAME_COLUMNS.items()}
+
+
+def raw_row(**values):
+    """One export row as read with TEXT_DTYPES: blanks are NaN, values by table column name."""
+    row = dict.fromkeys(RAW_COLUMNS, np.nan)
+    row.update({RAW_NAMES['employee_id']: 10001, RAW_NAMES['employee_name']: "พนักงาน ทดสอบ",
+                RAW_NAMES['employee_group']: "R&D", RAW_NAMES['employee_team']: "Data",
+                RAW_NAMES['work_range_date']: "08:00 AM - 05:00 PM", RAW_NAMES['work_date']: "02/01/2025"})
+    row.update({RAW_NAMES[name]: value for name, value in values.items()})
+    return row
+
+
+def raw_frame(*rows):
+    return pd.DataFrame(list(rows), columns=RAW_COLUMNS)
+
+
+def export_csv(*rows) -> io.BytesIO:
+    return io.BytesIO(raw_frame(*rows).to_csv(index=False).encode("utf-8"))
+
+
+WORKED = raw_row(checkin_date="02/01/2025", checkin_time="08:55", checkout_date="02/01/2025", checkout_time="18:05",
+                 work_hours="9.10", late_hours="0.00", overtime_hours="0.05", leave_hours="0.00")
+HALF_DAY = raw_row(checkin_date="02/01/2025", checkin_time="13:00", checkout_date="02/01/2025", checkout_time="17:05",
+                   work_hours="4.00", leave_hours="4.00", work_record="Errand Leave (Half Day)")
+FULL_DAY = raw_row(leave_hours="8.00", work_record="sick leave (Full Day)")
+
+
+def test_convert_end_times_maps_known_afternoon_ends():
+    values = pd.Series(["08:00 AM - 05:00 PM", "08:30 AM - 05:30 PM", "09:00 AM - 06:00 PM"], dtype=object)
+    assert list(transform.convert_end_times(values)) == [
+        "08:00 AM - 17:00 PM", "08:30 AM - 17:30 PM", "09:00 AM - 18:00 PM"]
+
+
+def test_convert_end_times_keeps_unmapped_and_malformed_shifts():
+    values = pd.Series(["08:00 AM - 07:00 PM", "08:00 AM-05:00 PM", "08:00 AM - 05:00 PM - 06:00 PM", ""],
+                       dtype=object)
+    assert list(transform.convert_end_times(values)) == list(values)
+
+
+def test_convert_end_times_strips_padding_around_the_dash():
+    values = pd.Series([" 08:00 AM  -  05:30 PM "], dtype=object)
+    assert list(transform.convert_end_times(values)) == ["08:00 AM - 17:30 PM"]
+
+
+def test_convert_end_times_keeps_nan():
+    out = transform.convert_end_times(pd.Series([np.nan, "08:00 AM - 05:00 PM"], dtype=object))
+    assert pd.isna(out[0])
+    assert out[1] == "08:00 AM - 17:00 PM"
+
+
+def test_iso_dates():
+    values = pd.Series(["31/01/2025", "1/2/2025", "31/02/2025", "2025-01-01", "x", None], dtype=object)
+    assert list(transform.iso_dates(values)) == ["2025-01-31", "2025-02-01", None, None, None, None]
+
+
+def test_by_value_converts_each_distinct_value_once():
+    seen = []
+
+    def convert(values):
+        seen.extend(values)
+        return values.str.upper()
+
+    out = transform.by_value(pd.Series(["a", "b", np.nan, "a", "b", "a"], index=range(10, 16)), convert)
+    assert sorted(seen) == ["a", "b"]
+    assert list(out.index) == list(range(10, 16))
+    assert [v if isinstance(v, str) else None for v in out] == ["A", "B", None, "A", "B", "A"]
+
+
+def test_transform_upload_worked_day():
+    row = transform.transform_upload(raw_frame(WORKED)).iloc[0]
+    assert row['employee_id'] == 10001
+    assert row['checkin_date'] == "2025-01-02"
+    assert row['work_date'] == "2025-01-02"
+    assert row['work_range_date'] == "08:00 AM - 17:00 PM"
+    assert row['work_hours'] == 9.10
+    assert row['late_count'] == 0
+    assert row['work_record'] == '0'
+    assert (row['leave_annual'], row['leave_sick'], row['leave_errand']) == (0, 0, 0)
+
+
+def test_transform_upload_half_day_leave():
+    row = transform.transform_upload(raw_frame(HALF_DAY)).iloc[0]
+    assert row['checkin_date'] == "2025-01-02"
+    assert (row['work_hours'], row['leave_hours']) == (4.0, 4.0)
+    assert (row['leave_annual'], row['leave_sick'], row['leave_errand']) == (0, 0, 1)
+
+
+def test_transform_upload_full_day_leave():
+    row = transform.transform_upload(raw_frame(FULL_DAY)).iloc[0]
+    # No check-in / check-out: dates are None, hours 0, text '0'; the shift day is kept
+    assert row['checkin_date'] is None
+    assert row['checkout_date'] is None
+    assert row['work_date'] == "2025-01-02"
+    assert (row['work_hours'], row['late_hours'], row['overtime_hours'], row['leave_hours']) == (0, 0, 0, 8.0)
+    assert row['late_count'] == 0
+    assert row['checkin_time'] == '0'
+    # Leave types match case-insensitively
+    assert (row['leave_annual'], row['leave_sick'], row['leave_errand']) == (0, 1, 0)
+
+
+def test_transform_upload_drops_and_renames_columns():
+    df = transform.transform_upload(raw_frame(WORKED, FULL_DAY))
+    assert not set(transform.DROP_COLUMNS) & set(df.columns)
+    assert set(transform.RENAME_COLUMNS.values()) <= set(df.columns)
+    assert df['employee_id'].dtype.kind == 'i'
+    assert df['late_count'].dtype.kind == 'i'
+
+
+def test_preview_rows_fills_blanks_for_display():
+    df = transform.preview_rows(raw_frame(FULL_DAY))
+    row = df.iloc[0]
+    assert row['checkin_date'] == ''
+    assert row['checkout_date'] == ''
+    assert row['work_hours'] == '0'
+    assert row['checkin_time'] == '0'
+
+
+def test_preview_rows_with_nrows():
+    fileobj = export_csv(WORKED, HALF_DAY, FULL_DAY, WORKED)
+    df = transform.preview_rows(pd.read_csv(fileobj, nrows=2, dtype=TEXT_DTYPES, encoding="utf-8"))
+    assert len(df) == 2
+    assert list(df['work_record']) == ['0', "Errand Leave (Half Day)"]
+
+
+def test_preview_shows_first_rows_and_counts_all():
+    result = preview(export_csv(WORKED, HALF_DAY, FULL_DAY, WORKED), rows=3)
+    assert len(result["rows"]) == 3
+    assert result["total_rows"] == 4
+    assert result["rows"][2]["checkin_date"] == ''
+    assert result["validation"] == {"missing_columns": [], "unexpected_columns": []}
@@ -0,0 +1,105 @@
+"""
+/preview-csv without parsing the whole upload.
+
+The rows shown are read with nrows, so only the first `rows` data rows are parsed
+and transformed. The header is checked against the columns the transform needs,
+and count_rows() counts the data rows on the raw bytes, block by block, skipping
+newlines inside quoted fields (the export's headers contain some), which costs a
+small fraction of parsing.
+
+With validate, scan() also parses the id and date columns of the whole file, a large
+chunk at a time, and checks them the way the import will (ids must be numbers,
+dates dd/mm/YYYY); that part grows with the file, so it is opt-in.
+"""
+import os
+import pandas as pd
+from upload import transform
+from upload.stream import TEXT_DTYPES, READ_BLOCK
+
+PREVIEW_ROWS = int(os.environ.get("PREVIEW_ROWS", 50))
+SCAN_CHUNK_ROWS = 200_000
+
+ID_COLUMN = 'รหัสพนักงาน'
+CHECKIN_COLUMN = 'เข้างาน\nวันที่'
+CHECKOUT_COLUMN = 'ออกงาน\nวันที่'
+EXPECTED_COLUMNS = transform.DROP_COLUMNS + list(transform.RENAME_COLUMNS)
+
+
+def check_header(columns) -> dict:
+    return {
+        "missing_columns": [col for col in EXPECTED_COLUMNS if col not in columns],
+        "unexpected_columns": [col for col in columns if col not in EXPECTED_COLUMNS],
+    }
+
+
+def count_rows(fileobj) -> int:
+    """Data rows in the file: record-ending newlines outside quotes, minus the header."""
+    fileobj.seek(0)
+    records, quoted, last = 0, False, b"\n"
+    for block in iter(lambda: fileobj.read(READ_BLOCK), b""):
+        if b'"' not in block and not quoted:
+            records += block.count(b"\n")
+        else:
+            # Splitting on quotes alternates outside / inside a quoted field ("" escapes
+            # toggle twice, so they cancel out)
+            for i, part in enumerate(block.split(b'"')):
+                if i:
+                    quoted = not quoted
+                if not quoted:
+                    records += part.count(b"\n")
+        last = block[-1:]
+    fileobj.seek(0)
+    if last != b"\n":
+        records += 1
+    return max(0, records - 1)
+
+
+def scan(fileobj) -> dict:
+    """Row count, invalid ids / dates and the check-in date range of the whole file."""
+    total = bad_ids = bad_checkin = bad_checkout = 0
+    first = last = None
+    fileobj.seek(0)
+    chunks = pd.read_csv(fileobj, usecols=[ID_COLUMN, CHECKIN_COLUMN, CHECKOUT_COLUMN], dtype=str,
+                         chunksize=SCAN_CHUNK_ROWS, encoding="utf-8")
+    for chunk in chunks:
+        total += len(chunk)
+        ids = chunk[ID_COLUMN]
+        bad_ids += int((pd.to_numeric(ids, errors='coerce').isna() | ids.isna()).sum())
+
+        checkin = transform.by_value(chunk[CHECKIN_COLUMN], transform.iso_dates)
+        # Blank dates are normal (full-day leave); only values that are not dates count
+        bad_checkin += int((checkin.isna() & chunk[CHECKIN_COLUMN].notna()).sum())
+        checkout = transform.by_value(chunk[CHECKOUT_COLUMN], transform.iso_dates)
+        bad_checkout += int((checkout.isna() & chunk[CHECKOUT_COLUMN].notna()).sum())
+
+        dates = checkin.dropna()
+        if len(dates):
+            first = min(first or dates.min(), dates.min())
+            last = max(last or dates.max(), dates.max())
+    fileobj.seek(0)
+    return {
+        "total_rows": total,
+        "invalid": {"employee_id": bad_ids, "checkin_date": bad_checkin, "checkout_date": bad_checkout},
+        "date_range": [first, last],
+    }
+
+
+def preview(fileobj, rows: int = PREVIEW_ROWS, validate: bool = False) -> dict:
+    fileobj.seek(0)
+    columns = list(pd.read_csv(fileobj, nrows=0, encoding="utf-8").columns)
+    validation = check_header(columns)
+    if validation["missing_columns"]:
+        return {"headers": [], "rows": [], "total_rows": None, "validation": validation}
+
+    if validate:
+        validation.update(scan(fileobj))
+        total = validation.pop("total_rows")
+    else:
+        total = count_rows(fileobj)
+    df = transform.preview_rows(pd.read_csv(fileobj, nrows=rows, dtype=TEXT_DTYPES, encoding="utf-8"))
+    return {
+        "headers": df.columns.tolist(),
+        "rows": df.to_dict(orient="records"),
+        "total_rows": total,
+        "validation": validation,
+    }
@@ -0,0 +1,44 @@
+"""
+Chunked reading of an uploaded attendance export.
+
+FastAPI keeps an upload in a SpooledTemporaryFile (in memory while small, on disk
+after that). Instead of reading it into bytes, decoding it to one str and parsing
+the whole thing, the file object is hashed block by block and handed to pandas with
+chunksize, so only one chunk of rows is held (raw and transformed) at a time and
+peak memory does not grow with the file.
+"""
+import os
+import hashlib
+import pandas as pd
+from upload.transform import transform_upload, RENAME_COLUMNS, HOUR_COLUMNS
+
+READ_BLOCK = 1 << 20
+
+# Rows parsed and transformed at a time; pandas has a fixed cost per chunk, so this is
+# larger than the insert batch size
+CHUNK_ROWS = int(os.environ.get("UPLOAD_CHUNK_ROWS", 20000))
+
+# Text columns are read as str so every chunk gets the same dtypes whatever its values;
+# ids and hours keep the C parser's numeric conversion
+TEXT_DTYPES = {raw: str for raw, name in RENAME_COLUMNS.items() if name not in HOUR_COLUMNS + ['employee_id']}
+
+
+def file_digest(fileobj):
+    """sha1 over the whole file, read one block at a time; leaves the file at the start."""
+    fileobj.seek(0)
+    digest = hashlib.sha1()
+    for block in iter(lambda: fileobj.read(READ_BLOCK), b""):
+        digest.update(block)
+    fileobj.seek(0)
+    return digest
+
+
+def read_chunks(fileobj, chunk_rows: int = CHUNK_ROWS):
+    """Raw DataFrames of up to chunk_rows rows."""
+    fileobj.seek(0)
+    return pd.read_csv(fileobj, chunksize=chunk_rows, dtype=TEXT_DTYPES, encoding="utf-8")
+
+
+def transformed_chunks(fileobj, chunk_rows: int = CHUNK_ROWS):
+    for chunk in read_chunks(fileobj, chunk_rows):
+        yield transform_upload(chunk)
@@ -0,0 +1,120 @@
+"""
+Attendance export (CSV from the time attendance system) -> employee_20XX rows.
+
+normalize() is the stage /preview-csv and /upload-csv share: drop the unused columns,
+rename to the table's names, dd/mm/YYYY dates to ISO and the 12-hour shift ends to
+the 24-hour form the tools expect. transform_upload() adds the typed values and
+leave flags the import writes.
+
+An export repeats the same few hundred dates, shifts and work records on every row,
+so those columns are converted once per distinct value (pd.factorize) with pandas
+string / datetime ops and expanded back, instead of a Python call per row.
+"""
+import numpy as np
+import pandas as pd
+from db.migrate import LEAVE_FLAGS
+
+DROP_COLUMNS = [
+    'กะทำงาน / ช่วงวันที่\nเข้างาน เวลา ',
+    'กะทำงาน / ช่วงวันที่\nออกงาน วันที่',
+    'กะทำงาน / ช่วงวันที่\nออกงาน เวลา ',
+    'เข้างานด้วยสถานที่',
+    'ออกงานด้วยสถานที่',
+    'Onsite',
+    'ปรับเวลา',
+    'ไม่เข้า-ออกงาน',
+    'อีเมล',
+]
+
+RENAME_COLUMNS = {
+    'รหัสพนักงาน': 'employee_id',
+    'ชื่อพนักงาน': 'employee_name',
+    'ตำแหน่ง': 'employee_position',
+    'กลุ่มผู้ใช้งาน': 'employee_group',
+    'ทีม': 'employee_team',
+    'เข้างาน\nวันที่': 'checkin_date',
+    'เข้างาน\nเวลา ': 'checkin_time',
+    'ออกงาน\nวันที่': 'checkout_date',
+    'ออกงาน\nเวลา ': 'checkout_time',
+    'กะทำงาน / ช่วงวันที่': 'work_range_date',
+    # Day of the shift; the only date a full-day leave row has
+    'กะทำงาน / ช่วงวันที่\nเข้างาน วันที่': 'work_date',
+    'ชั่วโมงการทำงาน\n(HH.MM)': 'work_hours',
+    'สาย\n(HH.MM)': 'late_hours',
+    'ล่วงเวลา\n(HH.MM)': 'overtime_hours',
+    'ลางาน\n(HH.MM)': 'leave_hours',
+    'บันทึกการทำงาน': 'work_record',
+    'สาย/ครั้ง': 'late_count'
+}
+
+DATE_COLUMNS = ['checkin_date', 'checkout_date', 'work_date']
+HOUR_COLUMNS = ['work_hours', 'late_hours', 'overtime_hours', 'leave_hours', 'late_count']
+
+# Shift end times as exported -> as stored
+END_TIMES = {
+    "05:00 PM": "17:00 PM",
+    "05:30 PM": "17:30 PM",
+    "06:00 PM": "18:00 PM",
+}
+
+
+def by_value(series, convert):
+    """convert() applied to the distinct values of `series` only; missing values stay NaN."""
+    codes, uniques = pd.factorize(series)
+    converted = np.asarray(convert(pd.Series(uniques, dtype=object)), dtype=object)
+    out = np.empty(len(codes), dtype=object)
+    out[:] = np.nan
+    present = codes >= 0
+    out[present] = converted[codes[present]]
+    return pd.Series(out, index=series.index)
+
+
+def iso_dates(values):
+    """dd/mm/YYYY -> YYYY-MM-DD, None where the value is not a date."""
+    parsed = pd.to_datetime(values, format='%d/%m/%Y', errors='coerce')
+    return parsed.dt.strftime('%Y-%m-%d').astype(object).where(parsed.notna(), None)
+
+
+def convert_end_times(values):
+    """'08:00 AM - 05:00 PM' -> '08:00 AM - 17:00 PM'; values that are not 'start - end' are kept."""
+    text = values.astype(str)
+    parts = text.str.split(" - ", regex=False)
+    shift = parts.str.len() == 2
+    start = parts.str[0].str.strip()
+    end = parts.str[1]
+    end = end.str.strip().map(END_TIMES).fillna(end)
+    return (start + " - " + end).where(shift, values)
+
+
+def normalize(df):
+    """Drop / rename the export columns, ISO dates (None when missing) and 24-hour shift ends."""
+    df = df.drop(DROP_COLUMNS, axis=1)
+    df = df.rename(columns=RENAME_COLUMNS)
+    for col in DATE_COLUMNS:
+        df[col] = by_value(df[col], iso_dates).where(lambda s: s.notna(), None)
+    df['work_range_date'] = by_value(df['work_range_date'], convert_end_times)
+    return df
+
+
+def transform_upload(df):
+    """Rows ready for db.ingest: typed values, None for missing dates, leave flags."""
+    df = normalize(df)
+    for col in HOUR_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+    text_cols = [col for col in df.columns if col not in DATE_COLUMNS + HOUR_COLUMNS]
+    df[text_cols] = df[text_cols].fillna('0')
+    df['employee_id'] = pd.to_numeric(df['employee_id']).astype(int)
+    df['late_count'] = df['late_count'].astype(int)
+
+    # Leave type is classified once here instead of LIKE-scanning work_record per query
+    for flag, label in LEAVE_FLAGS.items():
+        df[flag] = by_value(df['work_record'].astype(str),
+                            lambda s: s.str.contains(label, case=False, regex=False)).astype(int)
+    return df
+
+
+def preview_rows(df):
+    """normalize() as /preview-csv shows it: '' for missing dates, '0' for other blanks."""
+    df = normalize(df)
+    df[DATE_COLUMNS] = df[DATE_COLUMNS].fillna('')
+    return df.fillna('0')
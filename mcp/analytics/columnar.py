@@ -0,0 +1,195 @@
+"""
+Optional in-process backend for closed year tables: Parquet snapshots queried with DuckDB.
+
+A year that no longer receives imports (employee_2023, employee_2024, ...) can be
+snapshotted once:
+
+    python -m analytics.columnar employee_2023 employee_2024
+
+and listed in COLUMNAR_TABLES. The check-in/leave aggregations for those tables then
+run on the snapshot instead of MySQL; every other table stays on MySQL.
+
+The snapshot stores what MySQL itself computed per row (late flag, leave type flags,
+has_leave) next to the hour columns as DECIMAL, and the session uses a
+case/accent-insensitive collation like MySQL's default one, so the aggregates are the
+same as on the MySQL path. Re-run the snapshot if a listed table ever changes.
+
+DuckDB is optional: without it (pip install duckdb) the backend stays disabled.
+"""
+import os
+import json
+import logging
+import threading
+from decimal import Decimal
+from db import metrics
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+logger = logging.getLogger("MCP Server")
+
+# Metric expressions for attendance_source over a snapshot (see db.aggregate)
+SNAPSHOT_METRICS = {
+    "scope": "",
+    "scope_params": (),
+    "late_times": "late_times",
+    "annual": "leave_annual",
+    "sick": "leave_sick",
+    "errand": "leave_errand",
+    "has_leave": "has_leave",
+    "undated": "checkin_date = ''",
+}
+
+_SNAPSHOT_SELECT = """
+    SELECT
+        employee_group,
+        employee_name,
+        employee_team,
+        COALESCE(CAST(checkin_date AS CHAR), ''),
+        CAST(work_hours AS DECIMAL(18,4)),
+        CAST(late_hours AS DECIMAL(18,4)),
+        CAST(leave_hours AS DECIMAL(18,4)),
+        CASE WHEN late_count = 1 THEN 1 ELSE 0 END,
+        CASE WHEN work_record LIKE '%Annual Leave%' THEN 1 ELSE 0 END,
+        CASE WHEN work_record LIKE '%Sick Leave%' THEN 1 ELSE 0 END,
+        CASE WHEN work_record LIKE '%Errand Leave%' THEN 1 ELSE 0 END,
+        leave_hours > 0
+    FROM {table}
+"""
+
+_SNAPSHOT_COLUMNS = [
+    ("employee_group", "VARCHAR"),
+    ("employee_name", "VARCHAR"),
+    ("employee_team", "VARCHAR"),
+    ("checkin_date", "VARCHAR"),
+    ("work_hours", "DECIMAL(18,4)"),
+    ("late_hours", "DECIMAL(18,4)"),
+    ("leave_hours", "DECIMAL(18,4)"),
+    ("late_times", "INTEGER"),
+    ("leave_annual", "INTEGER"),
+    ("leave_sick", "INTEGER"),
+    ("leave_errand", "INTEGER"),
+    ("has_leave", "BOOLEAN"),
+]
+
+_BATCH = 50_000
+
+
+def snapshot_path(directory: str, table: str) -> str:
+    return os.path.join(directory, f"{table}.parquet")
+
+
+def write_snapshot(mysql_conn, table: str, directory: str) -> int:
+    """Copy `table` from MySQL into `directory`/`table`.parquet; returns the row count."""
+    if duckdb is None:
+        raise RuntimeError("duckdb is not installed (pip install duckdb)")
+    import pandas as pd
+
+    os.makedirs(directory, exist_ok=True)
+    path = snapshot_path(directory, table)
+    names = [name for name, _ in _SNAPSHOT_COLUMNS]
+    casts = ", ".join(f"CAST({name} AS {kind}) AS {name}" for name, kind in _SNAPSHOT_COLUMNS)
+
+    local = duckdb.connect()
+    cursor = mysql_conn.cursor()
+    try:
+        local.execute(f"CREATE TABLE snapshot ({', '.join(f'{n} {k}' for n, k in _SNAPSHOT_COLUMNS)})")
+        cursor.execute(_SNAPSHOT_SELECT.format(table=table))
+        total = 0
+        while True:
+            rows = cursor.fetchmany(_BATCH)
+            if not rows:
+                break
+            # Decimals go through as text so DuckDB parses them exactly
+            chunk = pd.DataFrame.from_records(rows, columns=names)
+            for name, kind in _SNAPSHOT_COLUMNS:
+                if kind.startswith("DECIMAL"):
+                    chunk[name] = chunk[name].map(lambda v: None if v is None else str(v))
+            local.register("chunk", chunk)
+            local.execute(f"INSERT INTO snapshot SELECT {casts} FROM chunk")
+            local.unregister("chunk")
+            total += len(rows)
+        local.execute(f"COPY snapshot TO '{path}' (FORMAT PARQUET)")
+    finally:
+        cursor.close()
+        local.close()
+
+    with open(path + ".json", "w") as f:
+        json.dump({"table": table, "rows": total}, f)
+    return total
+
+
+class ColumnarEngine:
+    """
+    Read-only DuckDB session over the snapshots of `tables` in `directory`.
+    Tables without a snapshot file are skipped (and stay on MySQL).
+    """
+
+    def __init__(self, directory: str, tables):
+        self.directory = directory
+        self.tables = frozenset()
+        self._conn = None
+        self._lock = threading.Lock()
+        if duckdb is None:
+            if tables:
+                logger.warning("COLUMNAR_TABLES is set but duckdb is not installed; using MySQL only")
+            return
+
+        found = []
+        for table in tables:
+            if os.path.exists(snapshot_path(directory, table)):
+                found.append(table)
+            else:
+                logger.warning(f"No columnar snapshot for {table} in {directory}; using MySQL for it")
+        if not found:
+            return
+
+        self._conn = duckdb.connect()
+        # Match MySQL's default utf8mb4 collation for =, IN, GROUP BY and ORDER BY
+        self._conn.execute("PRAGMA default_collation='nocase.noaccent'")
+        for table in found:
+            path = snapshot_path(directory, table).replace("'", "''")
+            self._conn.execute(f"CREATE VIEW {table} AS SELECT * FROM read_parquet('{path}')")
+        self.tables = frozenset(found)
+        logger.info(f"Columnar backend serving {sorted(found)}")
+
+    def source(self, table: str) -> dict:
+        return {"table": table, **SNAPSHOT_METRICS}
+
+    def execute(self, query: str, params: tuple):
+        """Run a db.aggregate query (with %s placeholders) and return (columns, rows)."""
+        with self._lock:
+            cursor = self._conn.cursor()
+        try:
+            with metrics.phase("execute"):
+                result = cursor.execute(query.replace("%s", "?"), list(params))
+            with metrics.phase("fetch"):
+                rows = result.fetchall()
+            columns = [desc[0] for desc in result.description]
+            metrics.add_rows(len(rows))
+        finally:
+            cursor.close()
+        # MySQL returns SUM() of integers as DECIMAL; keep the values identical
+        return columns, [
+            tuple(Decimal(v) if isinstance(v, int) and not isinstance(v, bool) else v for v in row)
+            for row in rows
+        ]
+
+
+if __name__ == "__main__":
+    import sys
+    from mysql.connector import connect
+    from mcp_server import DB_CONFIG
+
+    directory = os.environ.get("COLUMNAR_DIR", "snapshots")
+    conn = connect(**DB_CONFIG)
+    try:
+        for table in sys.argv[1:]:
+            if not (table.startswith("employee_") and table[len("employee_"):].isdigit()):
+                raise SystemExit(f"Not a year table: {table}")
+            rows = write_snapshot(conn, table, directory)
+            print(f"Wrote {rows} rows of {table} to {snapshot_path(directory, table)}")
+    finally:
+        conn.close()
@@ -0,0 +1,96 @@
+"""
+Overtime from shift strings and check-in/check-out times, computed column-wise.
+
+Shift strings come in the formats written by the API's CSV import: a 12-hour start
+and an end whose hour may already be rewritten to 24-hour ("08:00 AM - 17:00 PM")
+or not ("08:30 AM - 05:30 PM"). Times without AM/PM are read as 24-hour.
+Overtime for a day is the time checked out after the shift end, never negative.
+"""
+import pandas as pd
+
+_TIME = r"(\d{1,2}):(\d{2})(?::\d{2})?\s*([AaPp][Mm])?"
+_SHIFT = rf"^\s*{_TIME}\s*-\s*{_TIME}\s*$"
+_CLOCK = rf"^\s*{_TIME}\s*$"
+
+DAY_COLUMNS = [
+    "employee_name",
+    "checkin_date",
+    "work_range_date",
+    "checkin_time",
+    "checkout_time",
+    "worked_minutes",
+    "overtime_minutes",
+]
+
+SUMMARY_COLUMNS = [
+    "employee_name",
+    "days",
+    "overtime_days",
+    "overtime_minutes",
+    "overtime_hhmm",
+    "unparsed_days",
+]
+
+
+def _to_minutes(hours, minutes, meridiem):
+    hours = pd.to_numeric(hours, errors="coerce")
+    minutes = pd.to_numeric(minutes, errors="coerce")
+    meridiem = meridiem.fillna("").str.upper()
+    # "17:00 PM" is already 24-hour; only 1-11 PM need shifting
+    hours = hours.mask(meridiem.eq("PM") & (hours < 12), hours + 12)
+    hours = hours.mask(meridiem.eq("AM") & (hours == 12), 0)
+    return hours * 60 + minutes
+
+
+def _parse_clock(series):
+    parts = series.astype(str).str.extract(_CLOCK)
+    return _to_minutes(parts[0], parts[1], parts[2])
+
+
+def _hhmm(minutes):
+    minutes = minutes.round().astype(int)
+    return (minutes // 60).astype(str).str.zfill(2) + ":" + (minutes % 60).astype(str).str.zfill(2)
+
+
+def overtime_by_day(columns, rows) -> pd.DataFrame:
+    df = pd.DataFrame.from_records(rows, columns=columns)
+    if df.empty:
+        return pd.DataFrame(columns=DAY_COLUMNS + ["parsed"])
+
+    shift = df["work_range_date"].astype(str).str.extract(_SHIFT)
+    shift_start = _to_minutes(shift[0], shift[1], shift[2])
+    shift_end = _to_minutes(shift[3], shift[4], shift[5])
+    # Overnight shift ends on the next day
+    shift_end = shift_end.mask(shift_end <= shift_start, shift_end + 24 * 60)
+
+    checkin_day = pd.to_datetime(df["checkin_date"].astype(str), format="%Y-%m-%d", errors="coerce")
+    checkout_day = pd.to_datetime(df["checkout_date"].astype(str), format="%Y-%m-%d", errors="coerce")
+    day_offset = (checkout_day - checkin_day).dt.days.fillna(0) * 24 * 60
+
+    checkin = _parse_clock(df["checkin_time"])
+    checkout = _parse_clock(df["checkout_time"]) + day_offset
+
+    parsed = shift_end.notna() & checkin.notna() & checkout.notna()
+    df["worked_minutes"] = (checkout - checkin).clip(lower=0).where(parsed, 0).round().astype(int)
+    df["overtime_minutes"] = (checkout - shift_end).clip(lower=0).where(parsed, 0).round().astype(int)
+    df["parsed"] = parsed
+    return df[DAY_COLUMNS + ["parsed"]]
+
+
+def overtime_summary(days: pd.DataFrame) -> pd.DataFrame:
+    if days.empty:
+        return pd.DataFrame(columns=SUMMARY_COLUMNS)
+    summary = days.groupby("employee_name", sort=True).agg(
+        days=("overtime_minutes", "size"),
+        overtime_days=("overtime_minutes", lambda s: int((s > 0).sum())),
+        overtime_minutes=("overtime_minutes", "sum"),
+        unparsed_days=("parsed", lambda s: int((~s).sum())),
+    ).reset_index()
+    summary["overtime_hhmm"] = _hhmm(summary["overtime_minutes"])
+    return summary[SUMMARY_COLUMNS]
+
+
+def to_rows(df: pd.DataFrame, columns) -> list:
+    """Plain Python rows (no numpy scalars, no NaN) ready for db.encode."""
+    df = df[columns].astype(object)
+    return df.where(df.notna(), None).to_dict("split")["data"]
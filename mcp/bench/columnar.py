@@ -0,0 +1,83 @@
+"""
+MySQL vs the DuckDB snapshot backend for the check-in / leave aggregations.
+
+    cd mcp
+    python -m analytics.columnar employee_2024      # once
+    python -m bench.columnar employee_2024 [repeat]
+
+Runs each report shape the tools use on the raw MySQL table and on the Parquet
+snapshot, reports the median latency of both and checks the JSON results are equal.
+Needs the MYSQL_*_NW settings from .env and duckdb.
+"""
+import os
+import sys
+import time
+import statistics
+from mysql.connector import connect
+from mcp_server import DB_CONFIG, RAW_METRICS, TYPED_METRICS
+from analytics import columnar
+from db import aggregate
+from db.encode import encode_result, convert_rows
+
+
+def cases(group, team, start_date, end_date):
+    return [
+        ("check_in year", dict(report="check_in", groups=[group])),
+        ("leave year", dict(report="leave", groups=[group], leave_only=True)),
+        ("check_in team", dict(report="check_in", groups=[group], teams=[team])),
+        ("check_in date", dict(report="check_in", groups=[group], start_date=start_date, end_date=end_date)),
+        ("leave date", dict(report="leave", groups=[group], start_date=start_date, end_date=end_date)),
+        ("check_in all groups", dict(report="check_in", groups=[])),
+        ("leave all groups", dict(report="leave", groups=[], leave_only=True)),
+    ]
+
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return out, statistics.median(times)
+
+
+def main():
+    table = sys.argv[1] if len(sys.argv) > 1 else "employee_2024"
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    year = table[-4:]
+
+    engine = columnar.ColumnarEngine(os.environ.get("COLUMNAR_DIR", "snapshots"), [table])
+    if table not in engine.tables:
+        raise SystemExit(f"No snapshot for {table}; run python -m analytics.columnar {table} first")
+
+    conn = connect(**DB_CONFIG)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""SELECT data_type FROM information_schema.columns
+            WHERE table_schema = DATABASE() AND table_name = %s AND column_name = 'leave_annual'""", (table,))
+        typed = bool(cursor.fetchall())
+        cursor.execute(f"SELECT employee_group, employee_team FROM {table} WHERE employee_team <> '0' LIMIT 1")
+        group, team = cursor.fetchone() or ("R&D", "Data")
+        cursor.close()
+        mysql_src = {"table": table, "scope": "", "scope_params": (), **(TYPED_METRICS if typed else RAW_METRICS)}
+
+        print(f"{table} ({'typed' if typed else 'raw'}), group={group!r} team={team!r}, median of {repeat} runs")
+        print(f"{'case':<22}{'mysql ms':>10}{'duckdb ms':>11}{'speedup':>9}  same result")
+        for name, args in cases(group, team, f"{year}-03-01", f"{year}-05-31"):
+            args = {"teams": [], **args}
+            query, params = aggregate.build(src=mysql_src, **args)
+            (m_cols, m_rows), m_ms = timed(lambda: aggregate.execute(conn, query, params), repeat)
+
+            query, params = aggregate.build(src=engine.source(table), **args)
+            (d_cols, d_rows), d_ms = timed(lambda: engine.execute(query, params), repeat)
+
+            exact = encode_result(m_cols, m_rows) == encode_result(d_cols, d_rows)
+            same = exact or sorted(map(repr, convert_rows(m_cols, m_rows))) == sorted(map(repr, convert_rows(d_cols, d_rows)))
+            verdict = "yes" if exact else ("same rows, different order" if same else "NO")
+            print(f"{name:<22}{m_ms:>10.2f}{d_ms:>11.2f}{m_ms / d_ms:>8.1f}x  {verdict}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
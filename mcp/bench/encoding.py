@@ -0,0 +1,91 @@
+"""
+Compare tool result encodings on a synthetic 200-employee department.
+
+    cd mcp
+    python -m bench.encoding [employees]
+
+Reports payload bytes, prompt tokens (when tiktoken is installed) and encode time for
+the old dict rows + JSONEncoder.default path and the "records" / "compact" formats.
+"""
+import sys
+import json
+import time
+import random
+from decimal import Decimal
+from db.encode import encode_result
+
+COLUMNS = [
+    "employee_group",
+    "employee_name",
+    "จำนวนวันรวมการทำงาน",
+    "จำนวนวันรวมที่มาสาย",
+    "จำนวนครั้งที่มาสาย",
+    "จำนวนวันที่ลางาน",
+]
+
+
+class DecimalEncoder(json.JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            return float(obj)
+        return super().default(obj)
+
+
+def make_rows(employees: int):
+    rng = random.Random(42)
+    return [
+        (
+            "Back Office",
+            f"พนักงาน ทดสอบ {i:04d}",
+            Decimal(f"{rng.uniform(150, 250):.2f}"),
+            Decimal(f"{rng.uniform(0, 10):.2f}"),
+            Decimal(rng.randint(0, 40)),
+            Decimal(f"{rng.uniform(0, 15):.2f}"),
+        )
+        for i in range(employees)
+    ]
+
+
+def timed(fn, repeat=200):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        out = fn()
+    return out, (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    employees = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    rows = make_rows(employees)
+    dict_rows = [dict(zip(COLUMNS, row)) for row in rows]
+
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("o200k_base")
+        count_tokens = lambda text: len(encoding.encode(text))
+    except Exception:
+        # tiktoken missing, or its vocabulary cannot be downloaded
+        count_tokens = lambda text: None
+
+    cases = {
+        "dict + DecimalEncoder (old)": lambda: json.dumps(dict_rows, ensure_ascii=False, cls=DecimalEncoder),
+        "records": lambda: encode_result(COLUMNS, rows, "records"),
+        "compact": lambda: encode_result(COLUMNS, rows, "compact"),
+    }
+
+    print(f"{employees} employees")
+    print(f"{'format':<30}{'bytes':>10}{'tokens':>10}{'encode us':>12}")
+    measured = {}
+    for name, fn in cases.items():
+        text, micros = timed(fn)
+        measured[name] = (len(text.encode("utf-8")), count_tokens(text))
+        print(f"{name:<30}{measured[name][0]:>10}{str(measured[name][1]):>10}{micros:>12.1f}")
+
+    (old_bytes, old_tokens), (new_bytes, new_tokens) = measured["dict + DecimalEncoder (old)"], measured["compact"]
+    saving = f"compact saves {100 - 100 * new_bytes / old_bytes:.1f}% bytes"
+    if old_tokens:
+        saving += f", {100 - 100 * new_tokens / old_tokens:.1f}% tokens"
+    print(saving)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Synthetic employee_YYYY tables with the layout /upload-csv writes.
+
+    cd mcp
+    python -m bench.synthetic --employees 1000 --years 2023 2024 2025 [--drop]
+
+Writes into the database from the MYSQL_*_NW settings, so point .env at a throwaway
+local server first, for example:
+
+    docker run -d --name attendance-bench -p 6033:3306 \
+        -e MYSQL_ROOT_PASSWORD=bench -e MYSQL_DATABASE=attendance mysql:8.0
+
+Every employee gets one row per working day (Mon-Fri) with a shift string, check-in
+/ check-out times, HH.MM hour fields, late counts and leave records, using Thai names
+and the real groups/teams. The output is deterministic for a given --seed.
+"""
+import argparse
+import random
+import time
+from datetime import date, timedelta
+from mysql.connector import connect
+
+GROUPS = {
+    "Back Office": ["0"],
+    "R&D": ["Data", "Dev.", "นศง(intern)"],
+    "Services": ["0"],
+    "Sales & Marketing": ["0"],
+}
+POSITIONS = ["Officer", "Senior Officer", "Developer", "Data Engineer", "Manager", "Intern"]
+FIRST_NAMES = ["สมชาย", "สมหญิง", "กิตติ", "ณัฐพล", "ปิยะ", "วรรณา", "ศิริพร", "อนุชา", "ธนากร", "พิมพ์ชนก",
+               "ชยพล", "จิราพร", "ภาณุ", "สุภาวดี", "ธีรวัฒน์", "นภัสสร", "วิศรุต", "กมลชนก", "ปกรณ์", "อรอุมา"]
+LAST_NAMES = ["ใจดี", "รักษ์ไทย", "ศรีสุข", "มั่นคง", "วงศ์ใหญ่", "บุญมา", "แก้วประเสริฐ", "ทองดี", "สายสุวรรณ",
+              "พงษ์ไพบูลย์", "เจริญผล", "อินทร์แก้ว", "สุขสวัสดิ์", "ชัยมงคล", "นาคประเสริฐ"]
+# (start, end as written by /upload-csv, start minutes, end minutes)
+SHIFTS = [
+    ("08:00 AM", "17:00 PM", 8 * 60, 17 * 60),
+    ("08:30 AM", "17:30 PM", 8 * 60 + 30, 17 * 60 + 30),
+    ("09:00 AM", "18:00 PM", 9 * 60, 18 * 60),
+]
+LEAVES = [("Annual Leave", 0.4), ("Sick Leave", 0.4), ("Errand Leave", 0.2)]
+
+COLUMNS = [
+    "employee_id", "employee_name", "employee_position", "employee_group", "employee_team",
+    "checkin_date", "checkin_time", "checkout_date", "checkout_time", "work_range_date",
+    "work_hours", "late_hours", "overtime_hours", "leave_hours", "work_record", "late_count",
+]
+
+# Same column types as the tables created before the typed-schema migration
+CREATE_TABLE = """CREATE TABLE IF NOT EXISTS {table} (
+    employee_id INT,
+    employee_name VARCHAR(255),
+    employee_position VARCHAR(255),
+    employee_group VARCHAR(64),
+    employee_team VARCHAR(64),
+    checkin_date VARCHAR(10),
+    checkin_time VARCHAR(16),
+    checkout_date VARCHAR(10),
+    checkout_time VARCHAR(16),
+    work_range_date VARCHAR(64),
+    work_hours FLOAT,
+    late_hours FLOAT,
+    overtime_hours FLOAT,
+    leave_hours FLOAT,
+    work_record VARCHAR(255),
+    late_count INT
+)"""
+
+
+def make_employees(count: int, rng: random.Random):
+    employees = []
+    for i in range(count):
+        group = rng.choice(list(GROUPS))
+        employees.append({
+            "id": 10000 + i,
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i:04d}",
+            "position": rng.choice(POSITIONS),
+            "group": group,
+            "team": rng.choice(GROUPS[group]),
+            "shift": rng.choice(SHIFTS),
+            "punctuality": rng.uniform(0.02, 0.25),
+        })
+    return employees
+
+
+def _clock(minutes: int) -> str:
+    return f"{minutes // 60 % 24:02d}:{minutes % 60:02d}"
+
+
+def _hhmm(minutes: int) -> float:
+    return float(f"{minutes // 60}.{minutes % 60:02d}")
+
+
+def make_rows(employees, year: int, rng: random.Random):
+    day = date(year, 1, 1)
+    while day.year == year:
+        if day.weekday() < 5:
+            for emp in employees:
+                yield _make_row(emp, day, rng)
+        day += timedelta(days=1)
+
+
+def _make_row(emp, day: date, rng: random.Random):
+    start_label, end_label, start, end = emp["shift"]
+    shift = f"{start_label} - {end_label}"
+    base = (emp["id"], emp["name"], emp["position"], emp["group"], emp["team"])
+
+    if rng.random() < 0.04:
+        leave = rng.choices([name for name, _ in LEAVES], [w for _, w in LEAVES])[0]
+        half = rng.random() < 0.25
+        minutes = 4 * 60 if half else 8 * 60
+        record = f"{leave} ({'Half Day' if half else 'Full Day'})"
+        if half:
+            checkin = start + 4 * 60 + rng.randint(-5, 20)
+            checkout = end + rng.randint(0, 30)
+            return (*base, day.isoformat(), _clock(checkin), day.isoformat(), _clock(checkout), shift,
+                    _hhmm(checkout - checkin), 0.0, 0.0, _hhmm(minutes), record, 0)
+        return (*base, "", "0", "", "0", shift, 0.0, 0.0, 0.0, _hhmm(minutes), record, 0)
+
+    late = rng.random() < emp["punctuality"]
+    checkin = start + (rng.randint(1, 45) if late else -rng.randint(0, 25))
+    overtime = rng.randint(30, 180) if rng.random() < 0.15 else rng.randint(0, 20)
+    checkout = end + overtime
+    checkout_day = day + timedelta(days=1) if checkout >= 24 * 60 else day
+    late_minutes = max(0, checkin - start)
+    return (*base, day.isoformat(), _clock(checkin), checkout_day.isoformat(), _clock(checkout), shift,
+            _hhmm(checkout - checkin), _hhmm(late_minutes), _hhmm(max(0, checkout - end)), 0.0,
+            "0", 1 if late_minutes else 0)
+
+
+def load(conn, table: str, rows, batch: int = 5000) -> int:
+    cursor = conn.cursor()
+    sql = f"INSERT INTO {table} ({', '.join(COLUMNS)}) VALUES ({', '.join(['%s'] * len(COLUMNS))})"
+    total, pending = 0, []
+    for row in rows:
+        pending.append(row)
+        if len(pending) >= batch:
+            cursor.executemany(sql, pending)
+            conn.commit()
+            total += len(pending)
+            pending = []
+    if pending:
+        cursor.executemany(sql, pending)
+        conn.commit()
+        total += len(pending)
+    cursor.close()
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--employees", type=int, default=1000)
+    parser.add_argument("--years", type=int, nargs="+", default=[2023, 2024, 2025])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--drop", action="store_true", help="drop and recreate the year tables first")
+    args = parser.parse_args()
+
+    from mcp_server import DB_CONFIG
+
+    rng = random.Random(args.seed)
+    employees = make_employees(args.employees, rng)
+    conn = connect(**DB_CONFIG)
+    try:
+        cursor = conn.cursor()
+        for year in args.years:
+            table = f"employee_{year}"
+            if args.drop:
+                cursor.execute(f"DROP TABLE IF EXISTS {table}")
+            cursor.execute(CREATE_TABLE.format(table=table))
+            start = time.perf_counter()
+            count = load(conn, table, make_rows(employees, year, rng))
+            elapsed = time.perf_counter() - start
+            print(f"{table}: {count} rows for {len(employees)} employees in {elapsed:.1f}s ({count / elapsed:,.0f} rows/s)")
+        cursor.close()
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Latency / throughput benchmark for every MCP tool, called in-process.
+
+    cd mcp
+    python -m bench.synthetic --employees 1000 --drop     # once, on a throwaway database
+    python -m bench.tools [--year 2024] [--calls 50] [--concurrency 1 4 16] [--cache] [--json out.json]
+
+Each tool is called `--calls` times at every concurrency level through the same
+Tool.run path FastMCP uses (argument validation included). The result cache is
+disabled unless --cache is given, so the numbers are for the database path.
+Reports p50 / p95 latency, calls per second and error count per tool; a tool without
+sample arguments below is listed as skipped so new tools are not silently left out.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+
+def sample_arguments(year: int) -> dict:
+    table = f"employee_{year}"
+    start, end = f"{year}-03-01", f"{year}-05-31"
+    return {
+        "today_date": {},
+        "add_number": {"number": [1.5, 2.5, 3]},
+        "database_overview": {},
+        "execute_select_or_show": {"query": f"SELECT employee_group, COUNT(*) AS n FROM {table} GROUP BY employee_group"},
+        "check_in_data_year": {"group": "R&D", "year": table},
+        "sick_count_year": {"group": "R&D", "year": table},
+        "check_in_RD_year": {"group": "R&D", "team": "Data", "year": table},
+        "sick_RD_year": {"group": "R&D", "team": "Data", "year": table},
+        "check_in_data_groups": {"groups": ["all"], "year": table},
+        "sick_count_groups": {"groups": ["all"], "year": table},
+        "check_in_data_date": {"group": "R&D", "year": table, "start_date": start, "end_date": end},
+        "sick_count_by_date": {"group": "R&D", "year": table, "start_date": start, "end_date": end},
+        "check_in_RD_date": {"group": "R&D", "team": "Data", "year": table, "start_date": start, "end_date": end},
+        "sick_RD_date": {"group": "R&D", "team": "Data", "year": table, "start_date": start, "end_date": end},
+        "attendance_by_range": {"group": "R&D", "start_date": f"{year - 1}-12-01", "end_date": f"{year}-01-31"},
+        "get_overtime": {"name": "%0001%", "year": table, "start_date": start, "end_date": end},
+    }
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def _is_error(result) -> bool:
+    text = "".join(getattr(part, "text", "") for part in result)
+    return '"status": "error"' in text
+
+
+async def run_tool(tool, arguments, calls: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                result = await tool.run(arguments)
+                errors += _is_error(result)
+            except Exception:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(calls)))
+    elapsed = time.perf_counter() - start
+    return {
+        "calls": calls,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "calls_per_s": round(calls / elapsed, 1),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--year", type=int, default=2024)
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--cache", action="store_true", help="keep the result cache on")
+    parser.add_argument("--tools", nargs="*", help="only these tools")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    if not args.cache:
+        os.environ["RESULT_CACHE_ENTRIES"] = "0"
+    import mcp_server
+
+    tools = await mcp_server.mcp.get_tools()
+    samples = sample_arguments(args.year)
+    names = args.tools or sorted(tools)
+    skipped = [name for name in names if name not in samples]
+    report = {}
+
+    for concurrency in args.concurrency:
+        print(f"\nconcurrency {concurrency}, {args.calls} calls per tool")
+        print(f"{'tool':<26}{'p50 ms':>9}{'p95 ms':>9}{'calls/s':>9}{'errors':>8}")
+        for name in names:
+            if name in skipped:
+                continue
+            # One warm-up call so connection setup and first-time caches are not counted
+            await tools[name].run(samples[name])
+            stats = await run_tool(tools[name], samples[name], args.calls, concurrency)
+            report.setdefault(name, {})[concurrency] = stats
+            print(f"{name:<26}{stats['p50_ms']:>9.2f}{stats['p95_ms']:>9.2f}{stats['calls_per_s']:>9.1f}{stats['errors']:>8}")
+
+    if skipped:
+        print(f"\nskipped (no sample arguments in bench/tools.py): {', '.join(skipped)}", file=sys.stderr)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"year": args.year, "calls": args.calls, "cache": args.cache, "tools": report}, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
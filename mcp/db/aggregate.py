@@ -0,0 +1,271 @@
+"""
+Check-in and leave aggregations built from one declarative spec.
+
+REPORTS says which columns a report selects and how it is ordered; compile_query
+turns a report plus the shape of its filters into SQL with every value bound as a
+parameter. The SQL text for a given shape is built once (lru_cache), and each pooled
+connection keeps a prepared statement per SQL text, so repeated tool calls only
+send the parameters and MySQL reuses the parsed statement.
+
+Metric expressions use the keys of the source dict from attendance_source
+({late_times}, {annual}, ...), so the same spec runs on the raw, typed and rollup
+tables. Adding a metric is one line in REPORTS.
+
+build_range() runs a report over several year tables: every SUM(...) in the metrics
+becomes a partial sum in the branches of each table, and the outer query sums the
+branches and applies the metric expressions, so the range tool uses the same spec and
+filters. A dated single-table query is built the same way, from DATED_BRANCHES; the
+range tool counts only undated leave outside the range (RANGE_BRANCHES).
+"""
+import re
+import threading
+import functools
+from collections import OrderedDict
+from datetime import date
+from db import metrics
+
+REPORTS = {
+    "check_in": {
+        "keys": ["employee_group", "employee_name"],
+        "metrics": [
+            ("จำนวนวันรวมการทำงาน", "ROUND(SUM(work_hours)/9, 2)"),
+            ("จำนวนวันรวมที่มาสาย", "ROUND(SUM(late_hours)/9, 2)"),
+            ("จำนวนครั้งที่มาสาย", "SUM({late_times})"),
+            ("จำนวนวันที่ลางาน", "ROUND(SUM(leave_hours)/9, 2)"),
+        ],
+        "order": "จำนวนวันรวมที่มาสาย DESC",
+    },
+    "leave": {
+        "keys": ["employee_name", "employee_group"],
+        "metrics": [
+            ("จำนวนวันที่ลาพักผ่อน", "SUM({annual})"),
+            ("จำนวนวันที่ลาป่วย", "SUM({sick})"),
+            ("จำนวนวันที่ลากิจ", "SUM({errand})"),
+            ("จำนวนวันที่ลาทั้งหมด", "SUM({annual} + {sick} + {errand})"),
+        ],
+        "order": "จำนวนวันที่ลาทั้งหมด",
+    },
+}
+
+# Prepared statements kept open per connection
+STATEMENTS_PER_CONNECTION = 32
+
+_stats = {"prepared": 0, "reused": 0, "closed": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+_SUM = re.compile(r"SUM\(([^()]*)\)")
+
+
+def _keys(spec: dict, teams: int) -> list:
+    return spec["keys"] + ["employee_team"] if teams else list(spec["keys"])
+
+
+# Branches of a dated query. Leave rows count whatever their date, as in the original
+# date tools; instead of one "date in range OR leave" filter, which no index can
+# serve, the rows in the range and the leave rows outside it (or without a date) are
+# two disjoint UNION ALL branches, each able to use an index of the typed tables.
+DATED_BRANCHES = ("in_range", "leave_outside")
+
+# build_range only adds the leave rows that have no date at all (full-day leave):
+# leave dated outside the range, such as half-day leave, is not counted there
+RANGE_BRANCHES = ("in_range", "leave_undated")
+
+
+def _conditions(src: dict, groups: int, teams: int, dated: str, leave_only: bool) -> list:
+    conditions = []
+    if leave_only:
+        conditions.append(src["has_leave"])
+    if groups:
+        conditions.append(f"employee_group IN ({', '.join(['%s'] * groups)})")
+    if teams:
+        conditions.append(f"employee_team IN ({', '.join(['%s'] * teams)})")
+    if dated == "in_range":
+        conditions.append("checkin_date BETWEEN %s AND %s")
+    elif dated == "leave_outside":
+        conditions.append(f"{src['has_leave']} AND (checkin_date IS NULL OR checkin_date NOT BETWEEN %s AND %s)")
+    elif dated == "leave_undated":
+        conditions.append(f"{src['has_leave']} AND {src['undated']}")
+    return conditions
+
+
+def _partial_sums(report: str) -> list:
+    """The distinct SUM(...) arguments of a report's metrics, in order."""
+    sums = []
+    for _, expr in REPORTS[report]["metrics"]:
+        for arg in _SUM.findall(expr):
+            if arg not in sums:
+                sums.append(arg)
+    return sums
+
+
+@functools.lru_cache(maxsize=256)
+def compile_query(report: str, source: tuple, groups: int, teams: int, dated: bool, leave_only: bool) -> str:
+    """
+    SQL for `report` over `source` (the attendance_source dict as sorted items).
+    groups / teams are the number of values in the IN lists (0 = no filter), dated adds
+    the start/end date filter (as the DATED_BRANCHES, each taking the filter params
+    once) and leave_only keeps only rows with leave hours.
+    """
+    if report not in REPORTS:
+        raise ValueError(f"Invalid report parameter. Must be one of {list(REPORTS)}.")
+    if dated:
+        branches = tuple(compile_branch(report, source, groups, teams, branch, leave_only)
+                         for branch in DATED_BRANCHES)
+        return compile_range(report, branches, teams)
+    spec = REPORTS[report]
+    src = dict(source)
+
+    keys = _keys(spec, teams)
+    select = keys + [f"{expr.format(**src)} AS {alias}" for alias, expr in spec["metrics"]]
+    conditions = _conditions(src, groups, teams, "", leave_only)
+
+    return f"""
+        SELECT
+            {", ".join(select)}
+        FROM
+            {src['table']}
+        WHERE
+            {src['scope']}
+            {" AND ".join(conditions) or "1 = 1"}
+        GROUP BY
+            {", ".join(keys)}
+        ORDER BY
+            employee_group,
+            {spec['order']},
+            employee_name
+    """
+
+
+@functools.lru_cache(maxsize=256)
+def compile_branch(report: str, source: tuple, groups: int, teams: int, dated: str, leave_only: bool) -> str:
+    """
+    Partial sums (part_0, part_1, ...) of one table, filtered like compile_query;
+    dated is "" or one of DATED_BRANCHES / RANGE_BRANCHES.
+    """
+    if report not in REPORTS:
+        raise ValueError(f"Invalid report parameter. Must be one of {list(REPORTS)}.")
+    src = dict(source)
+    keys = _keys(REPORTS[report], teams)
+    select = keys + [f"SUM({arg.format(**src)}) AS part_{i}" for i, arg in enumerate(_partial_sums(report))]
+    conditions = _conditions(src, groups, teams, dated, leave_only)
+    return f"""
+            SELECT {", ".join(select)}
+            FROM {src['table']}
+            WHERE {src['scope']} {" AND ".join(conditions) or "1 = 1"}
+            GROUP BY {", ".join(keys)}"""
+
+
+@functools.lru_cache(maxsize=64)
+def compile_range(report: str, branches: tuple, teams: int) -> str:
+    """The outer query of build_range: sums the branches and applies the report's metrics."""
+    spec = REPORTS[report]
+    sums = _partial_sums(report)
+    keys = _keys(spec, teams)
+    select = keys + [
+        f"{_SUM.sub(lambda m: f'SUM(part_{sums.index(m.group(1))})', expr)} AS {alias}"
+        for alias, expr in spec["metrics"]
+    ]
+    return f"""
+        SELECT
+            {", ".join(select)}
+        FROM ({" UNION ALL ".join(branches)}
+        ) AS per_year
+        GROUP BY
+            {", ".join(keys)}
+        ORDER BY
+            employee_group,
+            {spec['order']},
+            employee_name
+    """
+
+
+def _parse_date(name: str, value: str) -> str:
+    try:
+        return date.fromisoformat(value.strip()).isoformat()
+    except (ValueError, AttributeError):
+        raise ValueError(f"Invalid {name}. Must be YEAR-MONTH-DAY such as 2023-01-01.")
+
+
+def build(report: str, src: dict, groups=(), teams=(), start_date: str = "", end_date: str = "",
+          leave_only: bool = False):
+    """(query, params) for one aggregation; groups/teams are lists, empty for no filter."""
+    if bool(start_date) != bool(end_date):
+        raise ValueError("Give both start_date and end_date, or neither.")
+    source = tuple(sorted((k, v) for k, v in src.items() if k != "scope_params"))
+    query = compile_query(report, source, len(groups), len(teams), bool(start_date), leave_only)
+
+    params = [*src["scope_params"], *groups, *teams]
+    if start_date:
+        params += [_parse_date("start_date", start_date), _parse_date("end_date", end_date)]
+        params *= len(DATED_BRANCHES)
+    return query, tuple(params)
+
+
+def build_range(report: str, sources: list, groups=(), teams=(), start_date: str = "", end_date: str = "",
+                leave_only: bool = False):
+    """(query, params) for `report` over several tables; `sources` are attendance_source dicts."""
+    if bool(start_date) != bool(end_date):
+        raise ValueError("Give both start_date and end_date, or neither.")
+    dates = [_parse_date("start_date", start_date), _parse_date("end_date", end_date)] if start_date else []
+    branches, params = [], []
+    for src in sources:
+        source = tuple(sorted((k, v) for k, v in src.items() if k != "scope_params"))
+        for dated in (RANGE_BRANCHES if start_date else ("",)):
+            branches.append(compile_branch(report, source, len(groups), len(teams), dated, leave_only))
+            params += [*src["scope_params"], *groups, *teams]
+            if dated == "in_range":
+                params += dates
+    return compile_range(report, tuple(branches), len(teams)), tuple(params)
+
+
+def execute(conn, query: str, params: tuple):
+    """
+    Run `query` as a prepared statement on `conn` and return (columns, rows).
+
+    The cursor for each query text stays open on the connection; mysql.connector only
+    re-prepares when it is handed a different string object, and compile_query always
+    returns the same one for the same shape.
+    """
+    statements = getattr(conn, "_aggregate_statements", None)
+    if statements is None:
+        statements = conn._aggregate_statements = OrderedDict()
+
+    cursor = statements.get(query)
+    if cursor is None:
+        cursor = conn.cursor(prepared=True)
+        statements[query] = cursor
+        _count("prepared")
+        if len(statements) > STATEMENTS_PER_CONNECTION:
+            _, oldest = statements.popitem(last=False)
+            oldest.close()
+            _count("closed")
+    else:
+        statements.move_to_end(query)
+        _count("reused")
+
+    with metrics.phase("execute"):
+        cursor.execute(query, params)
+    with metrics.phase("fetch"):
+        rows = cursor.fetchall()
+    metrics.add_rows(len(rows))
+    columns = [desc[0] for desc in cursor.description] if cursor.description else []
+    return columns, rows
+
+
+def stats() -> dict:
+    info = compile_query.cache_info()
+    with _stats_lock:
+        return {
+            "compiled": info.currsize,
+            "compile_hits": info.hits,
+            "compile_misses": info.misses,
+            "statements_prepared": _stats["prepared"],
+            "statements_reused": _stats["reused"],
+            "statements_closed": _stats["closed"],
+        }
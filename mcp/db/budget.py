@@ -0,0 +1,90 @@
+"""
+Row / byte budget for tool results.
+
+A result within the budget is returned as usual. A larger one is replaced by summary
+statistics for every numeric column, the top-k rows per column, and a handle. The
+handle holds the tool name and its arguments, so fetch_result can re-run the tool
+without a budget and page through the full rows; nothing is kept on the server.
+"""
+import json
+import base64
+from decimal import Decimal
+from db.encode import convert_rows
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float, Decimal)) and not isinstance(value, bool)
+
+
+def _label_column(columns):
+    if "employee_name" in columns:
+        return "employee_name"
+    return columns[0] if columns else None
+
+
+def summarize(columns, rows, top_k: int = 5) -> dict:
+    """Totals, means, min/max and the top_k rows (by label) for each numeric column."""
+    columns = list(columns)
+    rows = convert_rows(columns, rows)
+    label = _label_column(columns)
+    label_index = columns.index(label) if label else None
+
+    stats, top = {}, {}
+    for i, column in enumerate(columns):
+        values = [(row[i], row) for row in rows if _is_number(row[i])]
+        if not values or i == label_index:
+            continue
+        numbers = [value for value, _ in values]
+        stats[column] = {
+            "total": round(sum(numbers), 2),
+            "mean": round(sum(numbers) / len(numbers), 2),
+            "min": min(numbers),
+            "max": max(numbers),
+        }
+        ranked = sorted(values, key=lambda pair: pair[0], reverse=True)[:top_k]
+        top[column] = [{label: row[label_index], column: value} for value, row in ranked]
+    return {"stats": stats, f"top_{top_k}": top}
+
+
+def encode_handle(tool: str, arguments: dict) -> str:
+    token = json.dumps({"t": tool, "a": arguments}, separators=(",", ":"), ensure_ascii=False)
+    return base64.urlsafe_b64encode(token.encode("utf-8")).decode("ascii")
+
+
+def decode_handle(handle: str):
+    """(tool, arguments) stored in a handle."""
+    try:
+        token = json.loads(base64.urlsafe_b64decode(handle.encode("ascii")))
+        return token["t"], dict(token["a"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid handle. Pass the handle value from the tool result unchanged.")
+
+
+def truncated(tool: str, arguments: dict, columns, rows, top_k: int = 5, **extra) -> dict:
+    """The payload sent instead of an over-budget result."""
+    return {
+        "truncated": True,
+        "total_rows": len(rows),
+        "columns": list(columns),
+        "summary": summarize(columns, rows, top_k),
+        "handle": encode_handle(tool, arguments),
+        "hint": "The full result is larger than the budget. Call fetch_result with this handle "
+                "(offset/limit) to page through every row, or call the tool again with a larger max_rows.",
+        **extra,
+    }
+
+
+def apply(tool: str, arguments: dict, columns, rows, encode, max_rows: int, max_bytes: int,
+          top_k: int = 5, **extra) -> str:
+    """
+    `encode()` when the result fits in max_rows / max_bytes (0 = no limit), otherwise
+    the truncated() payload.
+    """
+    encoded = None
+    over = max_rows and len(rows) > max_rows
+    if not over:
+        encoded = encode()
+        over = max_bytes and len(encoded.encode("utf-8")) > max_bytes
+    if not over:
+        return encoded
+    return json.dumps(truncated(tool, arguments, columns, rows, top_k, **extra), ensure_ascii=False)
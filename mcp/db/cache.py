@@ -0,0 +1,83 @@
+import time
+import json
+import threading
+from collections import OrderedDict
+
+
+class ResultCache:
+    """
+    In-process LRU cache for encoded tool results.
+
+    Every entry remembers the data version it was computed under; a lookup with a
+    newer version is a miss, so rows imported after the entry was stored are never
+    hidden by it. Entries also expire after `ttl` seconds, and the cache evicts
+    least-recently-used entries to stay under both `max_entries` and `max_bytes`.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl: float = 3600.0, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(name: str, arguments: dict) -> str:
+        normalized = {k: v.strip() if isinstance(v, str) else v for k, v in arguments.items()}
+        return name + ":" + json.dumps(normalized, sort_keys=True, ensure_ascii=False)
+
+    def _drop(self, key):
+        _, _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key: str, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, entry_version, stored_at, _ = entry
+                if entry_version == version and time.monotonic() - stored_at < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._drop(key)
+            self.misses += 1
+            return None
+
+    def put(self, key: str, version, value: str):
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, version, time.monotonic(), size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_s": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,79 @@
+import json
+from decimal import Decimal
+from datetime import date, datetime, timedelta
+from db import metrics
+
+RESULT_FORMATS = ("records", "compact")
+
+
+def _convert_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return str(value)
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode("utf-8", errors="replace")
+    return value
+
+
+def _converter(sample):
+    if isinstance(sample, Decimal):
+        return float
+    if isinstance(sample, (date, datetime)):
+        return lambda v: v.isoformat()
+    return _convert_value
+
+
+@metrics.timed("encode")
+def convert_rows(columns, rows) -> list:
+    """
+    Turn DB tuples into JSON-native lists. Only columns whose values are not already
+    JSON types get converted, with a converter picked once per column from the first
+    non-null value, instead of calling JSONEncoder.default for every Decimal.
+    """
+    rows = [list(row) for row in rows]
+    for i in range(len(columns)):
+        sample = next((row[i] for row in rows if row[i] is not None), None)
+        if sample is None or isinstance(sample, (str, int, float, bool)):
+            continue
+        convert = _converter(sample)
+        for row in rows:
+            value = row[i]
+            if value is not None:
+                try:
+                    row[i] = convert(value)
+                except (TypeError, AttributeError, ValueError):
+                    row[i] = _convert_value(value)
+    return rows
+
+
+@metrics.timed("encode")
+def to_payload(columns, rows, result_format: str = "records"):
+    """
+    "records": a list of {column: value} objects (the original tool output).
+    "compact": {"columns": [...], "rows": [[...], ...]}, so column names are sent once.
+    """
+    if result_format not in RESULT_FORMATS:
+        raise ValueError(f"Invalid result_format. Must be one of {list(RESULT_FORMATS)}.")
+    data = convert_rows(columns, rows)
+    if result_format == "compact":
+        return {"columns": list(columns), "rows": data}
+    return [dict(zip(columns, row)) for row in data]
+
+
+@metrics.timed("encode")
+def encode_result(columns, rows, result_format: str = "records") -> str:
+    return json.dumps(to_payload(columns, rows, result_format), ensure_ascii=False)
+
+
+@metrics.timed("encode")
+def encode_grouped(columns, rows, key: str, result_format: str = "records") -> str:
+    """Like encode_result, but split into {value of `key`: payload} in first-seen order."""
+    index = list(columns).index(key)
+    groups = {}
+    for row in rows:
+        groups.setdefault(row[index], []).append(row)
+    payload = {str(name): to_payload(columns, group_rows, result_format) for name, group_rows in groups.items()}
+    return json.dumps(payload, ensure_ascii=False)
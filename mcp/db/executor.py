@@ -0,0 +1,74 @@
+import time
+import asyncio
+import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from mysql.connector import connect, Error
+from db import metrics
+
+logger = logging.getLogger("MCP Server")
+
+
+class QueryTimeout(Exception):
+    pass
+
+
+class QueryExecutor:
+    """
+    Runs blocking mysql.connector work on a bounded thread pool so the event loop
+    stays free for other tool calls.
+
+    At most `max_workers` queries run at once (normally the connection pool size).
+    If a query outlives its timeout, or the awaiting task is cancelled because the
+    MCP client went away, the statement is stopped on the server with KILL QUERY
+    rather than being left to run to completion in the background.
+    """
+
+    def __init__(self, pool, max_workers: int, timeout: float = 30.0):
+        self.pool = pool
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db")
+
+    def _kill(self, connection_id):
+        try:
+            conn = connect(**self.pool.config)
+            try:
+                cursor = conn.cursor()
+                cursor.execute(f"KILL QUERY {int(connection_id)}")
+                cursor.close()
+            finally:
+                conn.close()
+        except Error as e:
+            logger.error(f"Could not kill query on connection {connection_id}: {e}")
+
+    async def run(self, fn, *args, timeout: float | None = None):
+        """Call `fn(conn, *args)` with a pooled connection in a worker thread."""
+        loop = asyncio.get_running_loop()
+        running = {}
+        # run_in_executor does not carry contextvars over; the metrics record lives in one
+        context = contextvars.copy_context()
+        submitted = time.perf_counter()
+
+        def work():
+            with self.pool.connection() as conn:
+                metrics.add_time("connect", time.perf_counter() - submitted)
+                running["connection_id"] = conn.connection_id
+                try:
+                    return fn(conn, *args)
+                finally:
+                    running.pop("connection_id", None)
+
+        future = loop.run_in_executor(self._executor, context.run, work)
+        try:
+            return await asyncio.wait_for(future, timeout or self.timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            connection_id = running.get("connection_id")
+            if connection_id is not None:
+                # Fire and forget: a cancelled task may not be allowed to await again.
+                loop.run_in_executor(None, self._kill, connection_id)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            raise QueryTimeout(f"Query exceeded {timeout or self.timeout}s and was cancelled")
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,70 @@
+"""
+Schema and dimension snapshot for the database_overview tool.
+
+One pass over information_schema plus one GROUP BY per year table gives everything
+the agent otherwise discovers with SHOW TABLES / DESCRIBE / SELECT DISTINCT.
+"""
+
+# Tables the API maintains for the MCP server itself; the agent has no use for them
+INTERNAL_TABLES = {"data_version", "rollup_state", "attendance_daily", "attendance_monthly", "import_progress"}
+
+
+def _columns(conn) -> dict:
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""SELECT table_name, column_name, data_type FROM information_schema.columns
+            WHERE table_schema = DATABASE() ORDER BY table_name, ordinal_position""")
+        columns = {}
+        for table, column, data_type in cursor.fetchall():
+            columns.setdefault(table, []).append({"name": column, "type": data_type})
+        return columns
+    finally:
+        cursor.close()
+
+
+def _year_summary(conn, table: str, typed: bool) -> dict:
+    # Untyped tables store a missing date as ''
+    date = "checkin_date" if typed else "NULLIF(checkin_date, '')"
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"""SELECT employee_group, employee_team, employee_name,
+                MIN({date}), MAX({date}), COUNT(*)
+            FROM {table}
+            GROUP BY employee_group, employee_team, employee_name
+            ORDER BY employee_group, employee_team, employee_name""")
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+
+    groups = {}
+    first, last, total = None, None, 0
+    for group, team, name, min_date, max_date, count in rows:
+        groups.setdefault(str(group), {}).setdefault(str(team), []).append(name)
+        if min_date is not None:
+            first = min_date if first is None else min(first, min_date)
+        if max_date is not None:
+            last = max_date if last is None else max(last, max_date)
+        total += count
+    return {
+        "rows": total,
+        "first_date": str(first) if first is not None else None,
+        "last_date": str(last) if last is not None else None,
+        "employees": len({row[2] for row in rows}),
+        "groups": groups,
+    }
+
+
+def load_snapshot(conn, year_tables: dict, typed: frozenset) -> dict:
+    """
+    {"tables": {name: [columns]}, "other_tables": [...], "years": {table: summary}}.
+    Column lists are given for the employee_* tables only.
+    """
+    columns = _columns(conn)
+    return {
+        "tables": {name: cols for name, cols in columns.items() if name.startswith("employee_")},
+        "other_tables": sorted(name for name in columns if not name.startswith("employee_") and name not in INTERNAL_TABLES),
+        "years": {
+            table: _year_summary(conn, table, table in typed)
+            for _, table in sorted(year_tables.items())
+        },
+    }
@@ -0,0 +1,173 @@
+"""
+Per-tool metrics in Prometheus text format, served on /metrics.
+
+Each tool call gets a record in a ContextVar. The pool, the query helpers and the
+encoders add the time they spend to it under a phase name:
+
+    connect  waiting for a worker thread and a pooled connection
+    execute  cursor.execute (the server running the statement)
+    fetch    pulling rows to the client
+    encode   converting rows and serialising the JSON result
+
+When the call ends the phases, the total, the rows fetched and the response size
+are added to the histograms below.
+"""
+import time
+import threading
+import functools
+import contextvars
+from contextlib import contextmanager
+
+PHASES = ("connect", "execute", "fetch", "encode")
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+ROW_BUCKETS = (0, 1, 10, 50, 100, 500, 1000, 5000, 10000, 50000)
+BYTE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+_current = contextvars.ContextVar("mcp_tool_call", default=None)
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = {}
+        self.errors = {}
+        self.duration = {}
+        self.rows = {}
+        self.response_bytes = {}
+
+    def record(self, tool, phases, total, rows, size, error):
+        with self._lock:
+            self.calls[tool] = self.calls.get(tool, 0) + 1
+            if error:
+                self.errors[tool] = self.errors.get(tool, 0) + 1
+            for phase, seconds in [*phases.items(), ("total", total)]:
+                self.duration.setdefault((tool, phase), _Histogram(LATENCY_BUCKETS)).observe(seconds)
+            self.rows.setdefault(tool, _Histogram(ROW_BUCKETS)).observe(rows)
+            self.response_bytes.setdefault(tool, _Histogram(BYTE_BUCKETS)).observe(size)
+
+    def render(self) -> str:
+        lines = []
+
+        def counter(name, help_text, values):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for tool, value in sorted(values.items()):
+                lines.append(f'{name}{{tool="{tool}"}} {value}')
+
+        def histogram(name, help_text, values, label):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, hist in sorted(values.items()):
+                labels = label(key)
+                for bound, count in zip(hist.buckets, hist.counts):
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {hist.count}')
+                lines.append(f"{name}_sum{{{labels}}} {hist.sum}")
+                lines.append(f"{name}_count{{{labels}}} {hist.count}")
+
+        with self._lock:
+            counter("mcp_tool_calls_total", "Tool calls.", self.calls)
+            counter("mcp_tool_errors_total", "Tool calls that returned an error.", self.errors)
+            histogram("mcp_tool_duration_seconds", "Tool latency by phase (total = whole call).",
+                      self.duration, lambda key: f'tool="{key[0]}",phase="{key[1]}"')
+            histogram("mcp_tool_rows", "Rows fetched from the database per call.",
+                      self.rows, lambda tool: f'tool="{tool}"')
+            histogram("mcp_tool_response_bytes", "Size of the tool result per call.",
+                      self.response_bytes, lambda tool: f'tool="{tool}"')
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+class _Call:
+    def __init__(self):
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.rows = 0
+        self.depth = 0
+
+
+def add_time(phase: str, seconds: float):
+    call = _current.get()
+    if call is not None:
+        call.phases[phase] += seconds
+
+
+def add_rows(count: int):
+    call = _current.get()
+    if call is not None:
+        call.rows += count
+
+
+@contextmanager
+def phase(name: str):
+    """Time a block under `name`; nested blocks are only counted by the outermost one."""
+    call = _current.get()
+    if call is None:
+        yield
+        return
+    call.depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        call.depth -= 1
+        if call.depth == 0:
+            call.phases[name] += time.perf_counter() - start
+
+
+def timed(name: str):
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _response_size(result) -> int:
+    if isinstance(result, (str, bytes)):
+        return len(result.encode("utf-8")) if isinstance(result, str) else len(result)
+    return len(repr(result).encode("utf-8"))
+
+
+def _is_error(result) -> bool:
+    return isinstance(result, dict) and result.get("status") == "error"
+
+
+def instrumented(fn):
+    """Record latency per phase, rows, response bytes and errors for an async tool."""
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        call = _Call()
+        token = _current.set(call)
+        start = time.perf_counter()
+        result, error = None, True
+        try:
+            result = await fn(*args, **kwargs)
+            error = _is_error(result)
+            return result
+        finally:
+            _current.reset(token)
+            registry.record(fn.__name__, call.phases, time.perf_counter() - start,
+                            call.rows, _response_size(result), error)
+
+    return wrapper
@@ -0,0 +1,177 @@
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from mysql.connector import connect, Error, OperationalError, InterfaceError
+
+logger = logging.getLogger("MCP Server")
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+# MySQL server has gone away, lost connection during query, connection not available
+CONNECTION_LOST = {2006, 2013, 2055}
+
+
+def is_disconnect(e: Error) -> bool:
+    """
+    True when `e` means the connection itself is unusable. Statement errors (bad SQL,
+    a missing table, ...) leave the connection fine, so it goes back to the pool.
+    """
+    return isinstance(e, (OperationalError, InterfaceError)) or e.errno in CONNECTION_LOST
+
+
+class _Slot:
+    """One physical connection plus the bookkeeping the pool needs for it."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of mysql.connector connections.
+
+    Connections are opened lazily up to `size`. A caller that finds the pool
+    exhausted waits up to `timeout` seconds for a connection to come back.
+    Idle connections older than `health_check` seconds are pinged before being
+    handed out, and connections older than `recycle` seconds (or that lost the
+    server while checked out, see is_disconnect) are closed instead of reused.
+    """
+
+    def __init__(self, config: dict, size: int = 10, timeout: float = 10.0,
+                 recycle: float = 1800.0, health_check: float = 30.0):
+        self.config = config
+        self.size = size
+        self.timeout = timeout
+        self.recycle = recycle
+        self.health_check = health_check
+
+        self._idle = []
+        self._in_use = 0
+        self._waiting = 0
+        self._cond = threading.Condition()
+
+        self._acquired = 0
+        self._timeouts = 0
+        self._recycled = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _open(self):
+        return _Slot(connect(**self.config))
+
+    def _discard(self, slot):
+        self._recycled += 1
+        try:
+            slot.conn.close()
+        except Exception:
+            pass
+
+    def _healthy(self, slot):
+        now = time.monotonic()
+        if now - slot.created_at > self.recycle:
+            return False
+        if now - slot.last_used > self.health_check:
+            try:
+                slot.conn.ping(reconnect=False)
+            except Error:
+                return False
+        return True
+
+    def acquire(self):
+        start = time.monotonic()
+        deadline = start + self.timeout
+        with self._cond:
+            self._waiting += 1
+            try:
+                while not self._idle and self._in_use >= self.size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeout(
+                            f"No database connection available after {self.timeout}s "
+                            f"(pool size {self.size}, all in use)"
+                        )
+                    self._cond.wait(remaining)
+                slot = self._idle.pop() if self._idle else None
+                self._in_use += 1
+            finally:
+                self._waiting -= 1
+
+            waited = time.monotonic() - start
+            self._acquired += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+
+        # Network work (ping / connect) happens outside the lock.
+        try:
+            if slot is not None and not self._healthy(slot):
+                self._discard(slot)
+                slot = None
+            if slot is None:
+                slot = self._open()
+        except Exception:
+            self._release_slot(None)
+            raise
+        return slot
+
+    def _release_slot(self, slot, broken: bool = False):
+        with self._cond:
+            self._in_use -= 1
+            if slot is not None:
+                if broken:
+                    self._discard(slot)
+                else:
+                    slot.last_used = time.monotonic()
+                    self._idle.append(slot)
+            self._cond.notify()
+
+    def release(self, slot, broken: bool = False):
+        if not broken:
+            try:
+                # Drop any unread result / open transaction before reuse.
+                slot.conn.rollback()
+            except Error:
+                broken = True
+        self._release_slot(slot, broken)
+
+    @contextmanager
+    def connection(self):
+        slot = self.acquire()
+        broken = False
+        try:
+            yield slot.conn
+        except Error as e:
+            broken = is_disconnect(e)
+            raise
+        finally:
+            self.release(slot, broken)
+
+    def close_all(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+        for slot in idle:
+            try:
+                slot.conn.close()
+            except Exception:
+                pass
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "size": self.size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "waiting": self._waiting,
+                "acquired": self._acquired,
+                "timeouts": self._timeouts,
+                "recycled": self._recycled,
+                "wait_time_total_s": round(self._wait_total, 6),
+                "wait_time_avg_s": round(self._wait_total / self._acquired, 6) if self._acquired else 0.0,
+                "wait_time_max_s": round(self._wait_max, 6),
+            }
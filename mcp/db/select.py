@@ -0,0 +1,164 @@
+import re
+import json
+import base64
+import hashlib
+from mysql.connector import Error
+from db import metrics
+
+FETCH_BATCH = 100
+
+# Query execution was interrupted, maximum statement execution time exceeded
+ER_QUERY_TIMEOUT = 3024
+# Duplicate column name: the derived table cannot hold SELECT a.*, b.* and the like
+ER_DUP_FIELDNAME = 1060
+
+_TRAILING_LIMIT = re.compile(r"\blimit\s+\d+\s*(?:(?:,|offset)\s*\d+\s*)?$", re.IGNORECASE)
+
+
+def normalize(query: str) -> str:
+    return query.strip().rstrip(";").strip()
+
+
+def _digest(query: str) -> str:
+    return hashlib.sha1(normalize(query).encode("utf-8")).hexdigest()[:16]
+
+
+def encode_cursor(query: str, offset: int) -> str:
+    token = json.dumps({"q": _digest(query), "o": offset}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(token.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(query: str, cursor: str) -> int:
+    """Offset stored in a continuation token; the token must belong to the same query."""
+    try:
+        token = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        digest, offset = token["q"], int(token["o"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor. Pass the next_cursor value from the previous page unchanged.")
+    if digest != _digest(query) or offset < 0:
+        raise ValueError("This cursor belongs to a different query. Re-run the query without a cursor.")
+    return offset
+
+
+class QueryRejected(Exception):
+    """A query refused before or during execution; `details` is returned to the agent as-is."""
+
+    def __init__(self, message: str, **details):
+        super().__init__(message)
+        self.details = {"error": message, **details}
+
+
+def explain(conn, query: str) -> list:
+    cursor = conn.cursor(dictionary=True)
+    try:
+        with metrics.phase("execute"):
+            cursor.execute(f"EXPLAIN {query}")
+            return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def estimate_rows(plan: list):
+    """
+    Result-size estimate for the outermost SELECT (rows x filtered, multiplied across
+    joined tables). None when the plan gives no estimate.
+    """
+    estimate, found = 1.0, False
+    for step in plan:
+        if step.get("id") == 1 and step.get("rows") is not None:
+            estimate *= float(step["rows"]) * float(step.get("filtered") or 100) / 100
+            found = True
+    return int(estimate) if found else None
+
+
+def examined_rows(plan: list) -> int:
+    """
+    Rough number of rows the server will read: the product of `rows` across the
+    tables joined in each SELECT of the plan, summed over the SELECTs.
+    """
+    per_select = {}
+    for step in plan:
+        if step.get("rows") is not None:
+            key = step.get("id")
+            per_select[key] = per_select.get(key, 1.0) * float(step["rows"])
+    return int(sum(per_select.values()))
+
+
+def check_cost(plan: list, max_examined_rows: int):
+    examined = examined_rows(plan)
+    if examined > max_examined_rows:
+        full_scans = [step.get("table") for step in plan if step.get("type") == "ALL"]
+        raise QueryRejected(
+            "Query rejected: it would read too many rows.",
+            code="QUERY_TOO_EXPENSIVE",
+            estimated_examined_rows=examined,
+            max_examined_rows=max_examined_rows,
+            full_table_scans=full_scans,
+            hint="Filter on employee_group, employee_team or checkin_date, avoid joins without "
+                 "an ON condition, or use one of the aggregation tools instead.",
+        )
+
+
+def fetch_page(conn, query: str, offset: int, limit: int, max_execution_ms: int = 0):
+    """
+    Return (columns, rows, has_more) for one page of `query`.
+
+    SELECTs are wrapped in a derived table with LIMIT/OFFSET so the server only sends
+    the requested page. A SELECT whose output has duplicate column names cannot be
+    wrapped; it runs as written, with LIMIT/OFFSET appended when it has no LIMIT of
+    its own and otherwise skipped through client-side like SHOW output. Rows are
+    pulled with fetchmany, so memory is bounded by the page size either way.
+    A SELECT running longer than `max_execution_ms` is stopped by the server.
+    """
+    query = normalize(query)
+    page = f"LIMIT {int(limit) + 1} OFFSET {int(offset)}"
+    cursor = conn.cursor()
+    try:
+        with metrics.phase("execute"):
+            if query.lower().startswith("select"):
+                hint = f"/*+ MAX_EXECUTION_TIME({int(max_execution_ms)}) */ " if max_execution_ms else ""
+                skip = 0
+                try:
+                    cursor.execute(f"SELECT {hint}* FROM ({query}) AS page {page}")
+                except Error as e:
+                    if e.errno != ER_DUP_FIELDNAME:
+                        raise
+                    unwrapped = f"SELECT {hint}{query[len('select'):]}"
+                    if _TRAILING_LIMIT.search(query):
+                        skip = offset
+                    else:
+                        unwrapped += f" {page}"
+                    cursor.execute(unwrapped)
+            else:
+                cursor.execute(query)
+                skip = offset
+
+        columns = [desc[0] for desc in cursor.description] if cursor.description else []
+        wanted = limit + 1
+        rows = []
+        with metrics.phase("fetch"):
+            while len(rows) < wanted:
+                batch = cursor.fetchmany(FETCH_BATCH)
+                if not batch:
+                    break
+                if skip:
+                    dropped = min(skip, len(batch))
+                    batch = batch[dropped:]
+                    skip -= dropped
+                rows.extend(batch[:wanted - len(rows)])
+            # Drain what is left (at most one batch for SELECTs) so the connection can be reused.
+            while cursor.fetchmany(FETCH_BATCH):
+                pass
+        metrics.add_rows(min(len(rows), limit))
+        return columns, rows[:limit], len(rows) > limit
+    except Error as e:
+        if e.errno == ER_QUERY_TIMEOUT:
+            raise QueryRejected(
+                f"Query stopped after {max_execution_ms} ms.",
+                code="QUERY_TIMEOUT",
+                max_execution_ms=max_execution_ms,
+                hint="Narrow the query with a WHERE filter or aggregate with GROUP BY.",
+            )
+        raise
+    finally:
+        cursor.close()
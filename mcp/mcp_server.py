@@ -4,11 +4,22 @@ load_dotenv()
 from fastmcp import FastMCP
 import logging
 import json
-from mysql.connector import connect, Error
-from decimal import Decimal
+import inspect
+import functools
+import asyncio
+from mysql.connector import Error
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse
 from langchain_openai import ChatOpenAI
 from datetime import datetime
+import time
 from typing import List
+from db.pool import ConnectionPool, PoolTimeout
+from db.executor import QueryExecutor, QueryTimeout
+from db.cache import ResultCache
+from db import select, metadata, metrics, aggregate, budget
+from db.encode import encode_result, encode_grouped, to_payload, convert_rows
+from analytics import overtime, columnar
 
 mcp = FastMCP(name="MCP Server")
 
@@ -19,12 +30,6 @@ logging.basicConfig(
 )
 logger = logging.getLogger("MCP Server")
 
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        return super().default(obj)
-    
 # llm = ChatOpenAI(
 #     base_url=os.environ.get("BASE_URL"),
 #     model='gpt-4o-mini',
@@ -41,14 +46,248 @@ DB_CONFIG = {
     "port": 6033
 }
 
+db_pool = ConnectionPool(
+    DB_CONFIG,
+    size=int(os.environ.get("MYSQL_POOL_SIZE", 10)),
+    timeout=float(os.environ.get("MYSQL_POOL_TIMEOUT", 10)),
+    recycle=float(os.environ.get("MYSQL_POOL_RECYCLE", 1800)),
+    health_check=float(os.environ.get("MYSQL_POOL_HEALTH_CHECK", 30)),
+)
+
 def get_db_connection():
+    """
+    Borrow a connection from the shared pool. Use as `with get_db_connection() as conn:`
+    so the connection goes back to the pool (or is recycled on a database error).
+    """
+    return db_pool.connection()
+
+db_executor = QueryExecutor(
+    db_pool,
+    max_workers=int(os.environ.get("MYSQL_QUERY_WORKERS", db_pool.size)),
+    timeout=float(os.environ.get("MYSQL_QUERY_TIMEOUT", 30)),
+)
+
+def _fetch(conn, query, params, dictionary):
+    cursor = conn.cursor(dictionary=dictionary)
+    try:
+        with metrics.phase("execute"):
+            cursor.execute(query, params)
+        with metrics.phase("fetch"):
+            results = cursor.fetchall()
+        metrics.add_rows(len(results))
+        columns = [desc[0] for desc in cursor.description] if cursor.description else []
+        return columns, results
+    finally:
+        cursor.close()
+
+async def run_query(query: str, params: tuple | None = None, dictionary: bool = False, timeout: float | None = None):
+    """
+    Run a query off the event loop on a pooled connection and return (columns, rows).
+    Raises QueryTimeout if it takes longer than `timeout` (default MYSQL_QUERY_TIMEOUT).
+    """
+    return await db_executor.run(_fetch, query, params, dictionary, timeout=timeout)
+
+result_cache = ResultCache(
+    max_entries=int(os.environ.get("RESULT_CACHE_ENTRIES", 512)),
+    ttl=float(os.environ.get("RESULT_CACHE_TTL", 3600)),
+    max_bytes=int(os.environ.get("RESULT_CACHE_MAX_BYTES", 64 * 1024 * 1024)),
+)
+
+async def data_version():
+    """
+    Current value of the data_version counter that /upload-csv bumps in the same
+    transaction as each batch of inserts, and again when the import finishes and the
+    rollups are refreshed. Before the first import the table does not exist yet.
+    """
     try:
-        return connect(**DB_CONFIG)
+        _, rows = await run_query("SELECT version FROM data_version WHERE id = 1")
     except Error as e:
-        logger.error(f"{e}")
-        raise Exception(f"{str(e)}")
+        if e.errno == 1146:
+            return 0
+        raise
+    return rows[0][0] if rows else 0
+
+def cached_tool(fn):
+    """Serve repeated calls with the same arguments from result_cache until the data changes."""
+    signature = inspect.signature(fn)
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        arguments = signature.bind(*args, **kwargs).arguments
+        key = ResultCache.make_key(fn.__name__, arguments)
+        version = await data_version()
+        cached = result_cache.get(key, version)
+        if cached is not None:
+            logger.info(f"Cache hit for {fn.__name__}: {arguments}")
+            return cached
+        result = await fn(*args, **kwargs)
+        if isinstance(result, str):
+            result_cache.put(key, version, result)
+        return result
+
+    return wrapper
+
+# Rollup tables maintained by the API on every /upload-csv (see api/db/rollup.py)
+ROLLUP_TABLES = {"daily": "attendance_daily", "monthly": "attendance_monthly"}
+
+RAW_METRICS = {
+    "late_times": "CASE WHEN late_count = 1 THEN 1 ELSE 0 END",
+    "annual": "CASE WHEN work_record LIKE '%Annual Leave%' THEN 1 ELSE 0 END",
+    "sick": "CASE WHEN work_record LIKE '%Sick Leave%' THEN 1 ELSE 0 END",
+    "errand": "CASE WHEN work_record LIKE '%Errand Leave%' THEN 1 ELSE 0 END",
+    "has_leave": "leave_hours > 0",
+    # Rows without a check-in date (full-day leave)
+    "undated": "(checkin_date IS NULL OR checkin_date = '')",
+}
+
+# Tables migrated with api/db/migrate.py carry the leave type classified at ingest
+TYPED_METRICS = {
+    **RAW_METRICS,
+    "annual": "leave_annual",
+    "sick": "leave_sick",
+    "errand": "leave_errand",
+    "undated": "checkin_date IS NULL",
+}
+
+ROLLUP_METRICS = {
+    "late_times": "late_times",
+    "annual": "annual_days",
+    "sick": "sick_days",
+    "errand": "errand_days",
+    "has_leave": "has_leave = 1",
+    "undated": "checkin_date = ''",
+}
+
+_rollup_state = {"version": None, "tables": frozenset()}
+
+async def _table_names(query: str) -> frozenset:
+    try:
+        _, rows = await run_query(query)
+    except Error as e:
+        if e.errno != 1146:
+            raise
+        rows = []
+    return frozenset(row[0] for row in rows)
+
+async def rolled_up_tables():
+    """
+    Year tables whose rollups are complete, re-read whenever the data version moves.
+    /upload-csv commits its rows batch by batch and refreshes the rollups only when it
+    finishes, so a table with a running import (finished = 0) that already committed
+    rows is left out and its raw rows are read. A failed import refreshes the rollups
+    for what it committed and is marked stopped (2), as is one whose process died once
+    `python -m db.rollup` rebuilds the table, so neither keeps the table off its rollups.
+    """
+    version = await data_version()
+    if _rollup_state["version"] != version:
+        rolled_up = await _table_names("SELECT source_table FROM rollup_state")
+        importing = await _table_names(
+            "SELECT DISTINCT table_name FROM import_progress WHERE finished = 0 AND rows_done > 0"
+        )
+        _rollup_state.update(version=version, tables=rolled_up - importing)
+    return _rollup_state["tables"]
+
+async def attendance_source(year: str, grain: str) -> dict:
+    """
+    Table, WHERE prefix (with its params) and metric expressions for querying `year`.
+    Uses the `grain` ("daily" or "monthly") rollup when it is built for that table,
+    otherwise the raw per-day rows; both give the same aggregates.
+    """
+    if year in await rolled_up_tables():
+        return {"table": ROLLUP_TABLES[grain], "scope": "source_table = %s AND", "scope_params": (year,), **ROLLUP_METRICS}
+    if year in await typed_tables():
+        return {"table": year, "scope": "", "scope_params": (), **TYPED_METRICS}
+    return {"table": year, "scope": "", "scope_params": (), **RAW_METRICS}
+
+YEAR_TABLE_TTL = float(os.environ.get("YEAR_TABLE_TTL", 300))
+
+_year_tables = {"loaded_at": None, "tables": {}, "typed": frozenset()}
+
+async def year_tables() -> dict:
+    """
+    {year: table name} for every employee_YYYY table in the database, so a new year
+    shows up without a code change. Re-read at most every YEAR_TABLE_TTL seconds.
+    """
+    now = time.monotonic()
+    if _year_tables["loaded_at"] is None or now - _year_tables["loaded_at"] > YEAR_TABLE_TTL:
+        _, rows = await run_query(
+            """SELECT table_name FROM information_schema.tables
+               WHERE table_schema = DATABASE() AND table_name REGEXP '^employee_[0-9]{4}$'""",
+        )
+        _, typed = await run_query(
+            """SELECT table_name FROM information_schema.columns
+               WHERE table_schema = DATABASE() AND table_name REGEXP '^employee_[0-9]{4}$'
+                 AND column_name = 'leave_annual'""",
+        )
+        _year_tables.update(
+            loaded_at=now,
+            tables={int(row[0][-4:]): row[0] for row in rows},
+            typed=frozenset(row[0] for row in typed),
+        )
+    return _year_tables["tables"]
+
+async def typed_tables() -> frozenset:
+    """Year tables that have the leave_* flag columns from the typed schema."""
+    await year_tables()
+    return _year_tables["typed"]
+
+async def validate_year_table(year: str):
+    tables = await year_tables()
+    if year not in tables.values():
+        names = " or ".join(f"'{t}'" for t in sorted(tables.values()))
+        raise ValueError(f"Invalid year parameter. Must be {names}.")
+
+# Closed years served from Parquet snapshots when duckdb is installed (see analytics/columnar.py)
+columnar_engine = columnar.ColumnarEngine(
+    os.environ.get("COLUMNAR_DIR", "snapshots"),
+    [t.strip() for t in os.environ.get("COLUMNAR_TABLES", "").split(",") if t.strip()],
+)
+
+async def run_aggregate(report: str, year: str, grain: str, groups: List[str], teams: List[str] = (),
+                        start_date: str = "", end_date: str = "", leave_only: bool = False):
+    """Run one aggregation from db.aggregate.REPORTS for `year` and return (columns, rows)."""
+    if year in columnar_engine.tables:
+        query, params = aggregate.build(report, columnar_engine.source(year), groups, teams, start_date, end_date, leave_only)
+        return await asyncio.to_thread(columnar_engine.execute, query, params)
+    src = await attendance_source(year, grain)
+    query, params = aggregate.build(report, src, groups, teams, start_date, end_date, leave_only)
+    return await db_executor.run(aggregate.execute, query, params)
+
+_metadata = {"key": None, "snapshot": None}
+_metadata_lock = asyncio.Lock()
+
+async def metadata_snapshot() -> dict:
+    """
+    In-memory schema/dimension snapshot, rebuilt only when an import bumps the data
+    version or the year table list changes.
+    """
+    key = (await data_version(), tuple(sorted((await year_tables()).items())), await typed_tables())
+    if _metadata["key"] != key:
+        async with _metadata_lock:
+            if _metadata["key"] != key:
+                snapshot = await db_executor.run(metadata.load_snapshot, dict(key[1]), key[2])
+                _metadata.update(key=key, snapshot=snapshot)
+                logger.info(f"Metadata snapshot rebuilt for data version {key[0]}")
+    return _metadata["snapshot"]
+
+@mcp.custom_route("/pool", methods=["GET"])
+async def pool_stats(request: Request) -> JSONResponse:
+    return JSONResponse(db_pool.stats())
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics_endpoint(request: Request) -> PlainTextResponse:
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+@mcp.custom_route("/statements", methods=["GET"])
+async def statement_stats(request: Request) -> JSONResponse:
+    return JSONResponse(aggregate.stats())
+
+@mcp.custom_route("/cache", methods=["GET"])
+async def cache_stats(request: Request) -> JSONResponse:
+    return JSONResponse(result_cache.stats())
     
 @mcp.tool("today_date")
+@metrics.instrumented
 async def today_date():
     """
     เครื่องมือนี้จะช่วยดูเวลา ณ ปัจจุบัน
@@ -62,6 +301,7 @@ async def today_date():
     }
 
 @mcp.tool("add_number")
+@metrics.instrumented
 async def add_number(number: List[float])-> dict:
     """
     เครื่องมือสำหรับการบวกเลข
@@ -76,34 +316,116 @@ async def add_number(number: List[float])-> dict:
     result = sum(number)
     return {"result": result}
 
+@mcp.tool("database_overview")
+@metrics.instrumented
+async def database_overview(year: str = "", include_employees: bool = False):
+    """
+    เครื่องมือนี้ใช้ดูภาพรวมของฐานข้อมูลในครั้งเดียว ควรเรียกก่อนใช้ SHOW TABLES, DESCRIBE หรือ SELECT DISTINCT
+    ได้รายชื่อตาราง, คอลัมน์ของตาราง employee_*, และของแต่ละตารางปี (employee_2023, ...) จะมี
+    จำนวนแถว, ช่วงวันที่ที่มีข้อมูล (first_date ถึง last_date), รายชื่อกลุ่ม (employee_group) และทีม (employee_team)
+
+    args:
+        year (str): เช่น 'employee_2025' เพื่อดูเฉพาะปีนั้น, ว่างไว้เพื่อดูทุกปี
+        include_employees (bool): True เพื่อแสดงรายชื่อพนักงานในแต่ละทีม, False แสดงแค่จำนวน
+    """
+    try:
+        logger.info(f"LLM is trying to use database_overview (year: {year}, include_employees: {include_employees})")
+        if year:
+            await validate_year_table(year)
+        snapshot = await metadata_snapshot()
+
+        years = {}
+        for table, summary in snapshot["years"].items():
+            if year and table != year:
+                continue
+            groups = summary["groups"]
+            if not include_employees:
+                groups = {group: {team: len(names) for team, names in teams.items()} for group, teams in groups.items()}
+            years[table] = {**summary, "groups": groups}
+
+        return json.dumps({
+            "tables": snapshot["tables"],
+            "other_tables": snapshot["other_tables"],
+            "years": years,
+        }, ensure_ascii=False)
+
+    except Exception as e:
+        logger.error(f"Error executing query: {e}")
+        return {"result": json.dumps({"error": str(e)}), "status": "error"}
+
+SELECT_PAGE_SIZE = int(os.environ.get("SELECT_PAGE_SIZE", 100))
+SELECT_MAX_ROWS = int(os.environ.get("SELECT_MAX_ROWS", 500))
+SELECT_MAX_EXAMINED_ROWS = int(os.environ.get("SELECT_MAX_EXAMINED_ROWS", 5_000_000))
+SELECT_MAX_EXECUTION_MS = int(os.environ.get("SELECT_MAX_EXECUTION_MS", 10_000))
+
+# Default result budget per tool call (see db/budget.py); 0 turns a limit off
+RESULT_MAX_ROWS = int(os.environ.get("RESULT_MAX_ROWS", 300))
+RESULT_MAX_BYTES = int(os.environ.get("RESULT_MAX_BYTES", 64 * 1024))
+RESULT_TOP_K = int(os.environ.get("RESULT_TOP_K", 5))
+
+def _select_page(conn, query, offset, limit, is_select):
+    # LLM-written SQL: refuse it up front if EXPLAIN says it reads too much
+    total_estimate = None
+    if is_select:
+        plan = select.explain(conn, select.normalize(query))
+        select.check_cost(plan, SELECT_MAX_EXAMINED_ROWS)
+        total_estimate = select.estimate_rows(plan)
+    columns, rows, has_more = select.fetch_page(conn, query, offset, limit, SELECT_MAX_EXECUTION_MS)
+    return columns, rows, has_more, total_estimate
+
 @mcp.tool("execute_select_or_show")
-async def execute_select_or_show(query: str):
+@metrics.instrumented
+async def execute_select_or_show(query: str, page_size: int = SELECT_PAGE_SIZE, cursor: str = "", max_bytes: int = RESULT_MAX_BYTES):
     """
     This is basic tool to Execute only SELECT or SHOW queries.
     If user want basic information try this basic tool first.
+    Results come back one page at a time. If "next_cursor" is not null, call again with
+    the same query and cursor=next_cursor to get the next page.
 
     args:
-        Execute only SELECT or SHOW queries
+        query (str): Execute only SELECT or SHOW queries
+        page_size (int): Number of rows per page (at most 500)
+        cursor (str): next_cursor from the previous page, empty for the first page
+        max_bytes (int): Byte budget for one page. A bigger page comes back as a summary plus a handle for fetch_result. 0 = no limit
     
     """
     try:
-        logger.info(f"LLM is trying to execute: {query}")
+        logger.info(f"LLM is trying to execute: {query} (page_size: {page_size}, cursor: {cursor})")
 
         cleaned_query = query.strip().lower()
         # cleaned_query = query
         if not (cleaned_query.startswith("select") or cleaned_query.startswith("show")):
             return {"result": json.dumps({"error": "Only SELECT or SHOW queries are allowed."}), "status": "error"}
-        
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(query)
-        results = cursor.fetchall()
-        columns = [desc[0] for desc in cursor.description] if cursor.description else []
-        conn.close()
-        
-        return json.dumps({"columns": columns,"rows": results},ensure_ascii=False, cls=DecimalEncoder)
+
+        offset = select.decode_cursor(query, cursor) if cursor else 0
+        limit = max(1, min(page_size, SELECT_MAX_ROWS))
+        is_select = cleaned_query.startswith("select")
+
+        columns, results, has_more, total_estimate = await db_executor.run(_select_page, query, offset, limit, is_select)
+
+        page = {
+            "columns": columns,
+            "rows": results,
+            "offset": offset,
+            "next_cursor": select.encode_cursor(query, offset + len(results)) if has_more else None,
+        }
+        if has_more:
+            page["estimated_total_rows"] = total_estimate
+        else:
+            page["total_rows"] = offset + len(results)
+
+        with metrics.phase("encode"):
+            page["rows"] = convert_rows(columns, results)
+            encoded = json.dumps(page, ensure_ascii=False)
+        return budget.apply("execute_select_or_show", {"query": query, "page_size": page_size, "cursor": cursor},
+                            columns, results, lambda: encoded, 0, max_bytes, RESULT_TOP_K,
+                            next_cursor=page["next_cursor"])
+
+    except select.QueryRejected as e:
+        logger.error(f"Query rejected: {e.details}")
+        return {"result": json.dumps(e.details, ensure_ascii=False), "status": "error"}
     
-    except Error as e:
+    except (Error, PoolTimeout, QueryTimeout, ValueError) as e:
         logger.error(f"Error executing query: {e}")
         return {"result": json.dumps({"error": str(e)}), "status": "error"}
 
@@ -167,98 +489,54 @@ async def execute_select_or_show(query: str):
 #YEAR
 ####################################################################################################################################
 @mcp.tool("check_in_data_year")
-async def check_in_data_year(group: str, year: str): 
+@metrics.instrumented
+@cached_tool
+async def check_in_data_year(group: str, year: str, result_format: str = "records", max_rows: int = RESULT_MAX_ROWS, max_bytes: int = RESULT_MAX_BYTES): 
     """
     เครื่องมือนี้เกี่ยวกับข้อมูลการเช็คอินหรือการเข้างานของทั้งปี
     args:
-        year (str): Must be "employee_2023" or "employee_2024" or "employee_2025"
+        year (str): Year table name "employee_YYYY" such as "employee_2025"; database_overview lists the years that exist
+        result_format (str): "records" (default) or "compact" for {"columns": [...], "rows": [[...]]} which is shorter
+        max_rows (int): Row budget. A bigger result comes back as a summary plus a handle for fetch_result. 0 = no limit
+        max_bytes (int): Same budget for the size of the result in bytes. 0 = no limit
     """
 
     try:
         logger.info(f"LLM is trying to use check_in_data_year and choose group: {group} and year: {year}")
 
-        if year not in ["employee_2023", "employee_2024","employee_2025"]:
-            raise ValueError("Invalid year parameter. Must be 'employee_2023' or 'employee_2024' or 'employee_2025'.")
+        await validate_year_table(year)
 
-        query = f"""
-            SELECT 
-                employee_group,
-                employee_name,
-                ROUND(SUM(work_hours)/9, 2) AS จำนวนวันรวมการทำงาน,
-                ROUND(SUM(late_hours)/9, 2) AS จำนวนวันรวมที่มาสาย,
-                SUM(CASE WHEN late_count = 1 THEN 1 ELSE 0 END) AS จำนวนครั้งที่มาสาย,
-                ROUND(SUM(leave_hours)/9, 2) AS จำนวนวันที่ลางาน
-            FROM 
-                {year}
-            WHERE 
-                employee_group = %s
-            GROUP BY 
-                employee_group,
-                employee_name
-            ORDER BY 
-                employee_group,
-                จำนวนวันรวมที่มาสาย DESC
-        """
-
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query, (group,))
-        results = cursor.fetchall()
-        cursor.close()
-        conn.close()
+        columns, results = await run_aggregate("check_in", year, "monthly", [group])
 
-        return json.dumps(results, ensure_ascii=False, cls=DecimalEncoder)
+        return budget.apply("check_in_data_year", {"group": group, "year": year}, columns, results,
+                            lambda: encode_result(columns, results, result_format), max_rows, max_bytes, RESULT_TOP_K)
 
     except Exception as e:
         logger.error(f"Error executing query: {e}")
         return {"result": json.dumps({"error": str(e)}), "status": "error"}
     
 @mcp.tool("sick_count_year")
-async def sick_count_year(group: str, year: str):
+@metrics.instrumented
+@cached_tool
+async def sick_count_year(group: str, year: str, result_format: str = "records", max_rows: int = RESULT_MAX_ROWS, max_bytes: int = RESULT_MAX_BYTES):
     """
     เครื่องมือนี้เกี่ยวข้องกับการลาป่วย,ลากิจ,ลาประจำปี ของทั้งปี
     args:
-        year (str): Must be "employee_2023" or "employee_2024" or "employee_2025"    
+        year (str): Year table name "employee_YYYY" such as "employee_2025"; database_overview lists the years that exist
+        result_format (str): "records" (default) or "compact" for {"columns": [...], "rows": [[...]]} which is shorter
+        max_rows (int): Row budget. A bigger result comes back as a summary plus a handle for fetch_result. 0 = no limit
+        max_bytes (int): Same budget for the size of the result in bytes. 0 = no limit
     """
 
     try:
         logger.info(f"LLM is trying to use sick_count_year and choose group: {group} and year: {year}")
 
-        if year not in ["employee_2023", "employee_2024","employee_2025"]:
-            raise ValueError("Invalid year parameter. Must be 'employee_2023' or 'employee_2024' or 'employee_2025'.")
+        await validate_year_table(year)
 
-        query = f"""
-            SELECT 
-                employee_name,
-                employee_group,
-                SUM(CASE WHEN work_record LIKE '%Annual Leave%' THEN 1 ELSE 0 END) AS จำนวนวันที่ลาพักผ่อน,
-                SUM(CASE WHEN work_record LIKE '%Sick Leave%' THEN 1 ELSE 0 END) AS จำนวนวันที่ลาป่วย,
-                SUM(CASE WHEN work_record LIKE '%Errand Leave%' THEN 1 ELSE 0 END) AS จำนวนวันที่ลากิจ,
-                SUM(
-                    CASE WHEN work_record LIKE '%Annual Leave%' THEN 1 ELSE 0 END +
-                    CASE WHEN work_record LIKE '%Sick Leave%' THEN 1 ELSE 0 END +
-                    CASE WHEN work_record LIKE '%Errand Leave%' THEN 1 ELSE 0 END
-                ) AS จำนวนวันที่ลาทั้งหมด
-            FROM 
-                {year}
-            WHERE 
-                leave_hours > 0
-                AND employee_group = %s
-            GROUP BY 
-                employee_name,
-                employee_group
-            ORDER BY 
-                employee_group;
-        """ 
-
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query, (group,))
-        results = cursor.fetchall()
-        cursor.close()
-        conn.close()
+        columns, results = await run_aggregate("leave", year, "monthly", [group], leave_only=True)
 
-        return json.dumps(results, ensure_ascii=False, cls=DecimalEncoder)
+        return budget.apply("sick_count_year", {"group": group, "year": year}, columns, results,
+                            lambda: encode_result(columns, results, result_format), max_rows, max_bytes, RESULT_TOP_K)
 
     except Exception as e:
         logger.error(f"Error executing query: {e}")
@@ -266,50 +544,28 @@ async def sick_count_year(group: str, year: str):
     
 
 @mcp.tool("check_in_RD_year")
-async def check_in_RD_year(group: str, team:str ,year: str): 
+@metrics.instrumented
+@cached_tool
+async def check_in_RD_year(group: str, team:str ,year: str, result_format: str = "records", max_rows: int = RESULT_MAX_ROWS, max_bytes: int = RESULT_MAX_BYTES): 
     """
     เครื่องมือนี้คือเครื่องมือเฉพาะเกี่ยวกับแผนก R&D โดยมีการแยกทีม เกี่ยวกับข้อมูลการเช็คอินหรือการเข้างานของทั้งปี
     args:
         team (str): Must be "Data" or "Dev."
-        year (str): Must be "employee_2023" or "employee_2024" or "employee_2025"
+        year (str): Year table name "employee_YYYY" such as "employee_2025"; database_overview lists the years that exist
+        result_format (str): "records" (default) or "compact" for {"columns": [...], "rows": [[...]]} which is shorter
+        max_rows (int): Row budget. A bigger result comes back as a summary plus a handle for fetch_result. 0 = no limit
+        max_bytes (int): Same budget for the size of the result in bytes. 0 = no limit
     """
 
     try:
         logger.info(f"LLM is trying to use check_in_RD_year and choose group: {group} ,team: {team} and year: {year}")
 
-        if year not in ["employee_2023", "employee_2024","employee_2025"]:
-            raise ValueError("Invalid year parameter. Must be 'employee_2023' or 'employee_2024' or 'employee_2025'.")
-
-        query = f"""
-            SELECT 
-                employee_group,
-                employee_name,
-                employee_team,
-                ROUND(SUM(work_hours)/9, 2) AS จำนวนวันรวมการทำงาน,
-                ROUND(SUM(late_hours)/9, 2) AS จำนวนวันรวมที่มาสาย,
-                SUM(CASE WHEN late_count = 1 THEN 1 ELSE 0 END) AS จำนวนครั้งที่มาสาย,
-                ROUND(SUM(leave_hours)/9, 2) AS จำนวนวันที่ลางาน
-            FROM 
-                {year}
-            WHERE 
-                employee_group = %s
-                AND employee_team  = '{team}'
-            GROUP BY 
-                employee_group,
-                employee_name
-            ORDER BY 
-                employee_group,
-                จำนวนวันรวมที่มาสาย DESC
-        """
+        await validate_year_table(year)
 
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query, (group,))
-        results = cursor.fetchall()
-        cursor.close()
-        conn.close()
+        columns, results = await run_aggregate("check_in", year, "monthly", [group], [team])
 
-        return json.dumps(results, ensure_ascii=False, cls=DecimalEncoder)
+        return budget.apply("check_in_RD_year", {"group": group, "team": team, "year": year}, columns, results,
+                            lambda: encode_result(columns, results, result_format), max_rows, max_bytes, RESULT_TOP_K)
 
     except Exception as e:
         logger.error(f"Error executing query: {e}")
@@ -317,54 +573,101 @@ async def check_in_RD_year(group: str, team:str ,year: str):
    
 
 @mcp.tool("sick_RD_year")
-async def sick_RD_year(group: str, team:str ,year: str):
+@metrics.instrumented
+@cached_tool
+async def sick_RD_year(group: str, team:str ,year: str, result_format: str = "records", max_rows: int = RESULT_MAX_ROWS, max_bytes: int = RESULT_MAX_BYTES):
     """
     เครื่องมือนี้คือเครื่องมือเฉพาะเกี่ยวกับแผนก R&D โดยมีการแยกทีม เกี่ยวข้องกับการลาป่วย,ลากิจ,ลาประจำปี ของทั้งปี
     args:
         team (str): Must be "Data" or "Dev."
-        year (str): Must be "employee_2023" or "employee_2024" or "employee_2025"
+        year (str): Year table name "employee_YYYY" such as "employee_2025"; database_overview lists the years that exist
+        result_format (str): "records" (default) or "compact" for {"columns": [...], "rows": [[...]]} which is shorter
+        max_rows (int): Row budget. A bigger result comes back as a summary plus a handle for fetch_result. 0 = no limit
+        max_bytes (int): Same budget for the size of the result in bytes. 0 = no limit
     """
 
     try:
         logger.info(f"LLM is trying to use sick_RD_year and choose group: {group} ,team: {team} and year: {year}")
 
-        if year not in ["employee_2023", "employee_2024","employee_2025"]:
-            raise ValueError("Invalid year parameter. Must be 'employee_2023' or 'employee_2024' or 'employee_2025'.")
+        await validate_year_table(year)
 
-        query = f"""
-            SELECT 
-                employee_name,
-                employee_group,
-                employee_team,
-                SUM(CASE WHEN work_record LIKE '%Annual Leave%' THEN 1 ELSE 0 END) AS จำนวนวันที่ลาพักผ่อน,
-                SUM(CASE WHEN work_record LIKE '%Sick Leave%' THEN 1 ELSE 0 END) AS จำนวนวันที่ลาป่วย,
-                SUM(CASE WHEN work_record LIKE '%Errand Leave%' THEN 1 ELSE 0 END) AS จำนวนวันที่ลากิจ,
-                SUM(
-                    CASE WHEN work_record LIKE '%Annual Leave%' THEN 1 ELSE 0 END +
-                    CASE WHEN work_record LIKE '%Sick Leave%' THEN 1 ELSE 0 END +
-                    CASE WHEN work_record LIKE '%Errand Leave%' THEN 1 ELSE 0 END
-                ) AS จำนวนวันที่ลาทั้งหมด
-            FROM 
-                {year}
-            WHERE 
-                leave_hours > 0
-                AND employee_group = %s
-                AND employee_team = "{team}"
-            GROUP BY 
-                employee_name,
-                employee_group
-            ORDER BY 
-                employee_group;
-        """ 
-
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query, (group,))
-        results = cursor.fetchall()
-        cursor.close()
-        conn.close()
+        columns, results = await run_aggregate("leave", year, "monthly", [group], [team], leave_only=True)
 
-        return json.dumps(results, ensure_ascii=False, cls=DecimalEncoder)
+        return budget.apply("sick_RD_year", {"group": group, "team": team, "year": year}, columns, results,
+                            lambda: encode_result(columns, results, result_format), max_rows, max_bytes, RESULT_TOP_K)
+
+    except Exception as e:
+        logger.error(f"Error executing query: {e}")
+        return {"result": json.dumps({"error": str(e)}), "status": "error"}
+#############################################################################################################
+
+#Batch (several groups / teams in one scan)
+#############################################################################################################
+def batch_groups(groups: List[str]) -> List[str]:
+    """The groups to filter on; ["all"] means no group filter."""
+    if not groups:
+        raise ValueError('groups must list at least one group, or be ["all"].')
+    if [g.strip().lower() for g in groups] == ["all"]:
+        return []
+    return groups
+
+@mcp.tool("check_in_data_groups")
+@metrics.instrumented
+@cached_tool
+async def check_in_data_groups(groups: List[str], year: str, teams: List[str] = [], result_format: str = "records", max_rows: int = RESULT_MAX_ROWS, max_bytes: int = RESULT_MAX_BYTES):
+    """
+    เครื่องมือนี้เกี่ยวกับข้อมูลการเช็คอินหรือการเข้างานของทั้งปี สำหรับหลายแผนกพร้อมกันในการเรียกครั้งเดียว (เช่น รายงานทั้งบริษัท)
+    ผลลัพธ์จะแยกตามแผนก {"Back Office": [...], "R&D": [...]}
+
+    args:
+        groups (List[str]): Such as ["Back Office", "R&D"] or ["all"] for every group
+        year (str): Year table name "employee_YYYY" such as "employee_2025"; database_overview lists the years that exist
+        teams (List[str]): Optional, only for R&D such as ["Data", "Dev."]
+        result_format (str): "records" (default) or "compact" for {"columns": [...], "rows": [[...]]} which is shorter
+        max_rows (int): Row budget. A bigger result comes back as a summary plus a handle for fetch_result. 0 = no limit
+        max_bytes (int): Same budget for the size of the result in bytes. 0 = no limit
+    """
+
+    try:
+        logger.info(f"LLM is trying to use check_in_data_groups and choose groups: {groups} teams: {teams} and year: {year}")
+
+        await validate_year_table(year)
+
+        columns, results = await run_aggregate("check_in", year, "monthly", batch_groups(groups), teams)
+
+        return budget.apply("check_in_data_groups", {"groups": groups, "year": year, "teams": teams}, columns, results,
+                            lambda: encode_grouped(columns, results, "employee_group", result_format), max_rows, max_bytes, RESULT_TOP_K)
+
+    except Exception as e:
+        logger.error(f"Error executing query: {e}")
+        return {"result": json.dumps({"error": str(e)}), "status": "error"}
+
+@mcp.tool("sick_count_groups")
+@metrics.instrumented
+@cached_tool
+async def sick_count_groups(groups: List[str], year: str, teams: List[str] = [], result_format: str = "records", max_rows: int = RESULT_MAX_ROWS, max_bytes: int = RESULT_MAX_BYTES):
+    """
+    เครื่องมือนี้เกี่ยวข้องกับการลาป่วย,ลากิจ,ลาประจำปี ของทั้งปี สำหรับหลายแผนกพร้อมกันในการเรียกครั้งเดียว (เช่น รายงานทั้งบริษัท)
+    ผลลัพธ์จะแยกตามแผนก {"Back Office": [...], "R&D": [...]}
+
+    args:
+        groups (List[str]): Such as ["Back Office", "R&D"] or ["all"] for every group
+        year (str): Year table name "employee_YYYY" such as "employee_2025"; database_overview lists the years that exist
+        teams (List[str]): Optional, only for R&D such as ["Data", "Dev."]
+        result_format (str): "records" (default) or "compact" for {"columns": [...], "rows": [[...]]} which is shorter
+        max_rows (int): Row budget. A bigger result comes back as a summary plus a handle for fetch_result. 0 = no limit
+        max_bytes (int): Same budget for the size of the result in bytes. 0 = no limit
+    """
+
+    try:
+        logger.info(f"LLM is trying to use sick_count_groups and choose groups: {groups} teams: {teams} and year: {year}")
+
+        await validate_year_table(year)
+
+        columns, results = await run_aggregate("leave", year, "monthly", batch_groups(groups), teams, leave_only=True)
+
+        return budget.apply("sick_count_groups", {"groups": groups, "year": year, "teams": teams}, columns, results,
+                            lambda: encode_grouped(columns, results, "employee_group", result_format), max_rows, max_bytes, RESULT_TOP_K)
 
     except Exception as e:
         logger.error(f"Error executing query: {e}")
@@ -374,55 +677,31 @@ async def sick_RD_year(group: str, team:str ,year: str):
 #Date
 #############################################################################################################
 @mcp.tool("check_in_data_date")
-async def check_in_data_date(group: str, year: str,start_date: str,end_date: str): 
+@metrics.instrumented
+@cached_tool
+async def check_in_data_date(group: str, year: str,start_date: str,end_date: str, result_format: str = "records", max_rows: int = RESULT_MAX_ROWS, max_bytes: int = RESULT_MAX_BYTES): 
     """
     เครื่องมือนี้เกี่ยวกับข้อมูลการเช็คอินหรือการเข้างาน ตามช่วงเวลาที่กำหนด
 
     args:
         group (str): Name of group such as "Back Office"
-        year (str): Must be "employee_2023" or "employee_2024" or "employee_2025"
+        year (str): Year table name "employee_YYYY" such as "employee_2025"; database_overview lists the years that exist
         start_date (str): Must be YEAR-MOUNTH-DAY such as "2023-01-01"
         end_date(str): Must be YEAR-MOUNTH-DAY such as "2023-01-01"
+        result_format (str): "records" (default) or "compact" for {"columns": [...], "rows": [[...]]} which is shorter
+        max_rows (int): Row budget. A bigger result comes back as a summary plus a handle for fetch_result. 0 = no limit
+        max_bytes (int): Same budget for the size of the result in bytes. 0 = no limit
     """
 
     try:
         logger.info(f"LLM is trying to use check_in_data_date and choose group: {group} and year: {year} and date: {start_date} to {end_date}")
 
-        if year not in ["employee_2023", "employee_2024","employee_2025"]:
-            raise ValueError("Invalid year parameter. Must be 'employee_2023' or 'employee_2024' or 'employee_2025'.")
-
-        query = f"""
-            SELECT 
-                employee_group,
-                employee_name,
-                ROUND(SUM(work_hours)/9, 2) AS จำนวนวันรวมการทำงาน,
-                ROUND(SUM(late_hours)/9, 2) AS จำนวนวันรวมที่มาสาย,
-                SUM(CASE WHEN late_count = 1 THEN 1 ELSE 0 END) AS จำนวนครั้งที่มาสาย,
-                ROUND(SUM(leave_hours)/9, 2) AS จำนวนวันที่ลางาน
-            FROM 
-                {year}
-            WHERE 
-                employee_group = %s
-                AND (
-                checkin_date BETWEEN '{start_date}' AND '{end_date}'
-                OR leave_hours > 0
-            )
-            GROUP BY 
-                employee_group,
-                employee_name
-            ORDER BY 
-                employee_group,
-                จำนวนวันรวมที่มาสาย DESC;
-        """
+        await validate_year_table(year)
 
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query, (group,))
-        results = cursor.fetchall()
-        cursor.close()
-        conn.close()
+        columns, results = await run_aggregate("check_in", year, "daily", [group], start_date=start_date, end_date=end_date)
 
-        return json.dumps(results, ensure_ascii=False, cls=DecimalEncoder)
+        return budget.apply("check_in_data_date", {"group": group, "year": year, "start_date": start_date, "end_date": end_date}, columns, results,
+                            lambda: encode_result(columns, results, result_format), max_rows, max_bytes, RESULT_TOP_K)
 
     except Exception as e:
         logger.error(f"Error executing query: {e}")
@@ -430,59 +709,31 @@ async def check_in_data_date(group: str, year: str,start_date: str,end_date: str
     
 
 @mcp.tool("sick_count_by_date")
-async def sick_count_by_date(group: str, year: str,start_date: str,end_date: str): 
+@metrics.instrumented
+@cached_tool
+async def sick_count_by_date(group: str, year: str,start_date: str,end_date: str, result_format: str = "records", max_rows: int = RESULT_MAX_ROWS, max_bytes: int = RESULT_MAX_BYTES): 
     """
     เครื่องมือนี้เกี่ยวข้องกับการลาป่วย,ลากิจ,ลาประจำปี ตามช่วงเวลาที่กำหนด
 
     args:
         group (str): Name of group such as "Back Office"
-        year (str): Must be "employee_2023" or "employee_2024" or "employee_2025"
+        year (str): Year table name "employee_YYYY" such as "employee_2025"; database_overview lists the years that exist
         start_date (str): Must be YEAR-MOUNTH-DAY such as "2023-01-01"
         end_date(str): Must be YEAR-MOUNTH-DAY such as "2023-01-01"
+        result_format (str): "records" (default) or "compact" for {"columns": [...], "rows": [[...]]} which is shorter
+        max_rows (int): Row budget. A bigger result comes back as a summary plus a handle for fetch_result. 0 = no limit
+        max_bytes (int): Same budget for the size of the result in bytes. 0 = no limit
     """
 
     try:
         logger.info(f"LLM is trying to use sick_count_by_date and choose group: {group} and year: {year} and date: {start_date} to {end_date}")
 
-        if year not in ["employee_2023", "employee_2024","employee_2025"]:
-            raise ValueError("Invalid year parameter. Must be 'employee_2023' or 'employee_2024' or 'employee_2025'.")
+        await validate_year_table(year)
 
-        query = f"""
-           SELECT 
-                employee_name,
-                employee_group,
-                SUM(CASE WHEN work_record LIKE '%Annual Leave%' THEN 1 ELSE 0 END) AS จำนวนวันที่ลาพักผ่อน,
-                SUM(CASE WHEN work_record LIKE '%Sick Leave%' THEN 1 ELSE 0 END) AS จำนวนวันที่ลาป่วย,
-                SUM(CASE WHEN work_record LIKE '%Errand Leave%' THEN 1 ELSE 0 END) AS จำนวนวันที่ลากิจ,
-                SUM(
-                    CASE WHEN work_record LIKE '%Annual Leave%' THEN 1 ELSE 0 END +
-                    CASE WHEN work_record LIKE '%Sick Leave%' THEN 1 ELSE 0 END +
-                    CASE WHEN work_record LIKE '%Errand Leave%' THEN 1 ELSE 0 END
-                ) AS จำนวนวันที่ลาทั้งหมด
-            FROM 
-                {year}
-            WHERE 
-                employee_group = %s
-                AND (
-                checkin_date BETWEEN '{start_date}' AND '{end_date}'
-                OR leave_hours > 0
-            )
-            GROUP BY 
-                employee_group,
-                employee_name
-            ORDER BY 
-                employee_group,
-                จำนวนวันที่ลาทั้งหมด
-        """
-
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query, (group,))
-        results = cursor.fetchall()
-        cursor.close()
-        conn.close()
+        columns, results = await run_aggregate("leave", year, "daily", [group], start_date=start_date, end_date=end_date)
 
-        return json.dumps(results, ensure_ascii=False, cls=DecimalEncoder)
+        return budget.apply("sick_count_by_date", {"group": group, "year": year, "start_date": start_date, "end_date": end_date}, columns, results,
+                            lambda: encode_result(columns, results, result_format), max_rows, max_bytes, RESULT_TOP_K)
 
     except Exception as e:
         logger.error(f"Error executing query: {e}")
@@ -490,58 +741,32 @@ async def sick_count_by_date(group: str, year: str,start_date: str,end_date: str
 
 
 @mcp.tool("check_in_RD_date")
-async def check_in_RD_date(group: str,team: str, year: str,start_date: str,end_date: str): 
+@metrics.instrumented
+@cached_tool
+async def check_in_RD_date(group: str,team: str, year: str,start_date: str,end_date: str, result_format: str = "records", max_rows: int = RESULT_MAX_ROWS, max_bytes: int = RESULT_MAX_BYTES): 
     """
     เครื่องมือนี้คือเครื่องมือเฉพาะเกี่ยวกับแผนก R&D โดยมีการแยกทีม เกี่ยวกับข้อมูลการเช็คอินหรือการเข้างาน ตามช่วงเวลาที่กำหนด
 
     args:
         group (str): Name of group such as "Back Office"
         team (str): Must be "Data" or "Dev."
-        year (str): Must be "employee_2023" or "employee_2024" or "employee_2025"
+        year (str): Year table name "employee_YYYY" such as "employee_2025"; database_overview lists the years that exist
         start_date (str): Must be YEAR-MOUNTH-DAY such as "2023-01-01"
         end_date(str): Must be YEAR-MOUNTH-DAY such as "2023-01-01"
+        result_format (str): "records" (default) or "compact" for {"columns": [...], "rows": [[...]]} which is shorter
+        max_rows (int): Row budget. A bigger result comes back as a summary plus a handle for fetch_result. 0 = no limit
+        max_bytes (int): Same budget for the size of the result in bytes. 0 = no limit
     """
 
     try:
         logger.info(f"LLM is trying to use check_in_RD_date and choose group: {group} team: {team} and year: {year} and date: {start_date} to {end_date}")
 
-        if year not in ["employee_2023", "employee_2024","employee_2025"]:
-            raise ValueError("Invalid year parameter. Must be 'employee_2023' or 'employee_2024' or 'employee_2025'.")
+        await validate_year_table(year)
 
-        query = f"""
-            SELECT 
-                employee_group,
-                employee_name,
-                employee_team,
-                ROUND(SUM(work_hours)/9, 2) AS จำนวนวันรวมการทำงาน,
-                ROUND(SUM(late_hours)/9, 2) AS จำนวนวันรวมที่มาสาย,
-                SUM(CASE WHEN late_count = 1 THEN 1 ELSE 0 END) AS จำนวนครั้งที่มาสาย,
-                ROUND(SUM(leave_hours)/9, 2) AS จำนวนวันที่ลางาน
-            FROM 
-                {year}
-            WHERE 
-                employee_group = %s
-                AND employee_team = '{team}'
-                AND (
-                checkin_date BETWEEN '{start_date}' AND '{end_date}'
-                OR leave_hours > 0
-            )
-            GROUP BY 
-                employee_group,
-                employee_name
-            ORDER BY 
-                employee_group,
-                จำนวนวันรวมที่มาสาย DESC;
-        """
-
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query, (group,))
-        results = cursor.fetchall()
-        cursor.close()
-        conn.close()
+        columns, results = await run_aggregate("check_in", year, "daily", [group], [team], start_date, end_date)
 
-        return json.dumps(results, ensure_ascii=False, cls=DecimalEncoder)
+        return budget.apply("check_in_RD_date", {"group": group, "team": team, "year": year, "start_date": start_date, "end_date": end_date}, columns, results,
+                            lambda: encode_result(columns, results, result_format), max_rows, max_bytes, RESULT_TOP_K)
 
     except Exception as e:
         logger.error(f"Error executing query: {e}")
@@ -549,62 +774,32 @@ async def check_in_RD_date(group: str,team: str, year: str,start_date: str,end_d
     
 
 @mcp.tool("sick_RD_date")
-async def sick_RD_date(group: str,team: str, year: str,start_date: str,end_date: str): 
+@metrics.instrumented
+@cached_tool
+async def sick_RD_date(group: str,team: str, year: str,start_date: str,end_date: str, result_format: str = "records", max_rows: int = RESULT_MAX_ROWS, max_bytes: int = RESULT_MAX_BYTES): 
     """
     เครื่องมือนี้คือเครื่องมือเฉพาะเกี่ยวกับแผนก R&D โดยมีการแยกทีม เกี่ยวข้องกับการลาป่วย,ลากิจ,ลาประจำปี ตามช่วงเวลาที่กำหนด
 
     args:
         group (str): Name of group such as "Back Office"
         team (str): Must be "Data" or "Dev."
-        year (str): Must be "employee_2023" or "employee_2024" or "employee_2025"
+        year (str): Year table name "employee_YYYY" such as "employee_2025"; database_overview lists the years that exist
         start_date (str): Must be YEAR-MOUNTH-DAY such as "2023-01-01"
         end_date(str): Must be YEAR-MOUNTH-DAY such as "2023-01-01"
+        result_format (str): "records" (default) or "compact" for {"columns": [...], "rows": [[...]]} which is shorter
+        max_rows (int): Row budget. A bigger result comes back as a summary plus a handle for fetch_result. 0 = no limit
+        max_bytes (int): Same budget for the size of the result in bytes. 0 = no limit
     """
 
     try:
         logger.info(f"LLM is trying to use sick_RD_date and choose group: {group} team: {team} and year: {year} and date: {start_date} to {end_date}")
 
-        if year not in ["employee_2023", "employee_2024","employee_2025"]:
-            raise ValueError("Invalid year parameter. Must be 'employee_2023' or 'employee_2024' or 'employee_2025'.")
+        await validate_year_table(year)
 
-        query = f"""
-           SELECT 
-                employee_name,
-                employee_group,
-                employee_team,
-                SUM(CASE WHEN work_record LIKE '%Annual Leave%' THEN 1 ELSE 0 END) AS จำนวนวันที่ลาพักผ่อน,
-                SUM(CASE WHEN work_record LIKE '%Sick Leave%' THEN 1 ELSE 0 END) AS จำนวนวันที่ลาป่วย,
-                SUM(CASE WHEN work_record LIKE '%Errand Leave%' THEN 1 ELSE 0 END) AS จำนวนวันที่ลากิจ,
-                SUM(
-                    CASE WHEN work_record LIKE '%Annual Leave%' THEN 1 ELSE 0 END +
-                    CASE WHEN work_record LIKE '%Sick Leave%' THEN 1 ELSE 0 END +
-                    CASE WHEN work_record LIKE '%Errand Leave%' THEN 1 ELSE 0 END
-                ) AS จำนวนวันที่ลาทั้งหมด
-            FROM 
-                {year}
-            WHERE 
-                employee_group = %s
-                AND employee_team = {team}
-                AND (
-                checkin_date BETWEEN '{start_date}' AND '{end_date}'
-                OR leave_hours > 0
-            )
-            GROUP BY 
-                employee_group,
-                employee_name
-            ORDER BY 
-                employee_group,
-                จำนวนวันที่ลาทั้งหมด
-        """
+        columns, results = await run_aggregate("leave", year, "daily", [group], [team], start_date, end_date)
 
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query, (group,))
-        results = cursor.fetchall()
-        cursor.close()
-        conn.close()
-
-        return json.dumps(results, ensure_ascii=False, cls=DecimalEncoder)
+        return budget.apply("sick_RD_date", {"group": group, "team": team, "year": year, "start_date": start_date, "end_date": end_date}, columns, results,
+                            lambda: encode_result(columns, results, result_format), max_rows, max_bytes, RESULT_TOP_K)
 
     except Exception as e:
         logger.error(f"Error executing query: {e}")
@@ -612,23 +807,85 @@ async def sick_RD_date(group: str,team: str, year: str,start_date: str,end_date:
     
 #############################################################################################################
 
+#Range (across year tables)
+#############################################################################################################
+async def build_range_query(report: str, group: str, team: str, start_date: str, end_date: str):
+    """
+    One UNION ALL query over every year table the date range touches, built from the
+    same db.aggregate spec and filters as the single-year date tools: each branch
+    pre-aggregates its own table (or its daily rollup), and the outer query merges
+    the per-year partial sums per employee.
+    """
+    start = datetime.strptime(start_date, "%Y-%m-%d").date()
+    end = datetime.strptime(end_date, "%Y-%m-%d").date()
+    if start > end:
+        raise ValueError("start_date must not be after end_date.")
+
+    tables = await year_tables()
+    touched = [tables[year] for year in range(start.year, end.year + 1) if year in tables]
+    if not touched:
+        raise ValueError(f"No attendance table covers {start_date} to {end_date}.")
+
+    sources = [await attendance_source(table, "daily") for table in touched]
+    return aggregate.build_range(report, sources, [group], [team] if team else [], start_date, end_date)
+
+@mcp.tool("attendance_by_range")
+@metrics.instrumented
+@cached_tool
+async def attendance_by_range(group: str, start_date: str, end_date: str, report: str = "check_in", team: str = "", result_format: str = "records", max_rows: int = RESULT_MAX_ROWS, max_bytes: int = RESULT_MAX_BYTES):
+    """
+    เครื่องมือนี้ดึงข้อมูลการเข้างานหรือการลา ตามช่วงเวลาที่กำหนด แม้ช่วงเวลาจะข้ามปี (เช่น 2024-12-01 ถึง 2025-02-28) ได้ในการเรียกครั้งเดียว
+    ไม่ต้องระบุ year เครื่องมือจะเลือกตารางของแต่ละปีให้เอง
+    นับเฉพาะแถวที่วันที่เข้างานอยู่ในช่วงเวลา และแถวการลาทั้งวันซึ่งไม่มีวันที่เข้างาน (ของทุกปีที่ช่วงเวลาครอบคลุม)
+    ต่างจากเครื่องมือแบบระบุวันที่ของแต่ละปี ที่นับแถวการลาทุกแถวของปีนั้นไม่ว่าวันที่จะอยู่ในช่วงหรือไม่
+
+    args:
+        group (str): Name of group such as "Back Office"
+        start_date (str): Must be YEAR-MOUNTH-DAY such as "2024-12-01"
+        end_date(str): Must be YEAR-MOUNTH-DAY such as "2025-02-28"
+        report (str): "check_in" for การเข้างาน or "leave" for ลาป่วย,ลากิจ,ลาประจำปี
+        team (str): Optional, only for R&D such as "Data" or "Dev."
+        result_format (str): "records" (default) or "compact" for {"columns": [...], "rows": [[...]]} which is shorter
+        max_rows (int): Row budget. A bigger result comes back as a summary plus a handle for fetch_result. 0 = no limit
+        max_bytes (int): Same budget for the size of the result in bytes. 0 = no limit
+    """
+
+    try:
+        logger.info(f"LLM is trying to use attendance_by_range: report: {report} group: {group} team: {team} and date: {start_date} to {end_date}")
+
+        query, params = await build_range_query(report, group, team, start_date, end_date)
+        columns, results = await run_query(query, params)
+
+        return budget.apply("attendance_by_range", {"group": group, "start_date": start_date, "end_date": end_date, "report": report, "team": team}, columns, results,
+                            lambda: encode_result(columns, results, result_format), max_rows, max_bytes, RESULT_TOP_K)
+
+    except Exception as e:
+        logger.error(f"Error executing query: {e}")
+        return {"result": json.dumps({"error": str(e)}), "status": "error"}
+
+#############################################################################################################
+
 @mcp.tool("get_overtime")
-async def get_overtime(name: str, year: str,start_date: str,end_date: str): 
+@metrics.instrumented
+async def get_overtime(name: str, year: str,start_date: str,end_date: str, include_days: bool = False, result_format: str = "records", max_rows: int = RESULT_MAX_ROWS): 
     """
-    เครื่องมือนี้จะแสดง กะเวลาทำงาน, การเช็คอิน, การเช็คเอาท์ เพื่อวิเคราะห์ว่าทำงานล่วงเวลากี่ชั่วโมง/นาที
+    เครื่องมือนี้คำนวณการทำงานล่วงเวลา (นาที) จากกะเวลาทำงาน, การเช็คอิน, การเช็คเอาท์ ให้เรียบร้อยแล้ว
+    ได้ผลรวมต่อพนักงาน (summary) และถ้า include_days เป็น true จะได้รายละเอียดรายวัน (days) ด้วย
 
     args:
         name(str) : Must be "%name%"
-        year (str): Must be "employee_2023" or "employee_2024" or "employee_2025"
+        year (str): Year table name "employee_YYYY" such as "employee_2025"; database_overview lists the years that exist
         start_date (str): Must be YEAR-MOUNTH-DAY such as "2023-01-01"
         end_date(str): Must be YEAR-MOUNTH-DAY such as "2023-01-01"
+        include_days (bool): true to also return overtime for each day
+        result_format (str): "records" (default) or "compact" for {"columns": [...], "rows": [[...]]} which is shorter
+        max_rows (int): Row budget for days. More days come back as a summary plus a handle for fetch_result. 0 = no limit
     """
 
     try:
         logger.info(f"LLM is trying to use get_overtime: year: {year} start: {start_date} END: {end_date} and Name: {name}")
 
-        if year not in ["employee_2023", "employee_2024","employee_2025"]:
-            raise ValueError("Invalid year parameter. Must be 'employee_2023' or 'employee_2024' or 'employee_2025'.")
+        await validate_year_table(year)
 
         query = f"""
         SELECT 
@@ -641,18 +898,87 @@ async def get_overtime(name: str, year: str,start_date: str,end_date: str):
         FROM 
             {year}
         WHERE 
-            employee_name LIKE '{name}'
-            AND checkin_date BETWEEN '{start_date}' AND '{end_date}'
+            employee_name LIKE %s
+            AND checkin_date BETWEEN %s AND %s
         """
 
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query)
-        results = cursor.fetchall()
-        cursor.close()
-        conn.close()
+        columns, results = await run_query(query, (name, start_date, end_date))
+
+        days = overtime.overtime_by_day(columns, results)
+        summary = overtime.overtime_summary(days)
+        payload = {
+            "summary": to_payload(overtime.SUMMARY_COLUMNS, overtime.to_rows(summary, overtime.SUMMARY_COLUMNS), result_format),
+        }
+        if include_days:
+            day_rows = overtime.to_rows(days, overtime.DAY_COLUMNS)
+            if max_rows and len(day_rows) > max_rows:
+                arguments = {"name": name, "year": year, "start_date": start_date, "end_date": end_date, "include_days": True}
+                payload["days"] = budget.truncated("get_overtime", arguments, overtime.DAY_COLUMNS, day_rows, RESULT_TOP_K)
+            else:
+                payload["days"] = to_payload(overtime.DAY_COLUMNS, day_rows, result_format)
+
+        with metrics.phase("encode"):
+            return json.dumps(payload, ensure_ascii=False)
+
+    except Exception as e:
+        logger.error(f"Error executing query: {e}")
+        return {"result": json.dumps({"error": str(e)}), "status": "error"}
 
-        return json.dumps(results, ensure_ascii=False, cls=DecimalEncoder)
+#############################################################################################################
+
+def _full_rows(payload):
+    """(columns, rows) of a compact tool result, whichever shape the tool returns."""
+    if "columns" in payload and "rows" in payload:
+        return payload["columns"], payload["rows"]
+    if "days" in payload:
+        return payload["days"]["columns"], payload["days"]["rows"]
+    # Grouped results ({group: compact payload}) keep employee_group in every row
+    columns, rows = [], []
+    for part in payload.values():
+        columns = part["columns"]
+        rows += part["rows"]
+    return columns, rows
+
+@mcp.tool("fetch_result")
+@metrics.instrumented
+async def fetch_result(handle: str, offset: int = 0, limit: int = 100, result_format: str = "records"):
+    """
+    เครื่องมือนี้ใช้ดึงข้อมูลทั้งหมดของผลลัพธ์ที่ถูกสรุปไว้ (truncated: true) ทีละหน้า โดยใช้ handle จากผลลัพธ์นั้น
+    ถ้า next_offset ไม่เป็น null ให้เรียกอีกครั้งด้วย offset=next_offset
+
+    args:
+        handle (str): handle from the truncated result, unchanged
+        offset (int): First row to return
+        limit (int): Number of rows to return (at most 500)
+        result_format (str): "records" (default) or "compact" for {"columns": [...], "rows": [[...]]} which is shorter
+    """
+    try:
+        logger.info(f"LLM is trying to use fetch_result (offset: {offset}, limit: {limit})")
+        name, arguments = budget.decode_handle(handle)
+        tools = await mcp.get_tools()
+        if name not in tools or name == "fetch_result":
+            raise ValueError("Invalid handle. Pass the handle value from the tool result unchanged.")
+
+        # Same call without a budget, in compact form
+        accepted = tools[name].parameters.get("properties", {})
+        unlimited = {key: value for key, value in [("max_rows", 0), ("max_bytes", 0), ("result_format", "compact")]
+                     if key in accepted}
+        result = await tools[name].run({**arguments, **unlimited})
+        payload = json.loads("".join(part.text for part in result))
+        if payload.get("status") == "error":
+            return payload
+
+        columns, rows = _full_rows(payload)
+        limit = max(1, min(limit, SELECT_MAX_ROWS))
+        offset = max(0, offset)
+        page = rows[offset:offset + limit]
+        next_offset = offset + len(page) if offset + len(page) < len(rows) else None
+        return json.dumps({
+            "total_rows": len(rows),
+            "offset": offset,
+            "next_offset": next_offset,
+            "rows": to_payload(columns, page, result_format),
+        }, ensure_ascii=False)
 
     except Exception as e:
         logger.error(f"Error executing query: {e}")